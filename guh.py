@@ -1,10 +1,16 @@
 import ee
 import geemap
-import plotly.graph_objects as go
-import matplotlib.colors as mcolors
-import plotly.graph_objects as go
-import numpy as np
-import calendar
+import os
+import sys
+
+# Reuse the dashboard's raster store and statistics from src/python
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src", "python")
+)
+from display_mode import show_html
+from legend import save_legend
+from map_engine import fetch_map_raster
+from zonal_stats import city_zonal_stats
 
 # Initialize the Earth Engine API
 ee.Authenticate()
@@ -69,17 +75,14 @@ XCO = CO_mean.divide(TC_dry_air).rename("XCO")
 # Convert XCO to ppb
 XCO_ppb = XCO.multiply(1e9).rename("XCO_ppb")
 
-# Calculate the minimum and maximum CO values
-min_max = XCO_ppb.reduceRegion(
-    reducer=ee.Reducer.minMax(),
-    geometry=buffered_city_geometry,
-    scale=1113.2,
-    maxPixels=1e9,
-)
+# Calculate the minimum, maximum and 2nd/98th percentile CO values locally
+# from the cached XCO raster instead of separate reduceRegion calls
+XCO_values = fetch_map_raster("CO", city, start_date, end_date)
+stats = city_zonal_stats(XCO_values, city, qs=(2, 98))
 
 # Get min and max values and round them to three decimal places
-CO_min = round(min_max.get("XCO_ppb_min").getInfo(), 3)
-CO_max = round(min_max.get("XCO_ppb_max").getInfo(), 3)
+CO_min = round(stats["min"], 3)
+CO_max = round(stats["max"], 3)
 
 # Print the minimum and maximum CO values
 print("Minimum CO value:", CO_min)
@@ -107,14 +110,8 @@ vis_params = {
 }
 
 # Apply a 98% stretch
-stretch = XCO_ppb.reduceRegion(
-    reducer=ee.Reducer.percentile([2, 98]),
-    geometry=buffered_city_geometry,
-    scale=1113.2,
-    maxPixels=1e9,
-)
-min_val = stretch.get("XCO_ppb_p2").getInfo()
-max_val = stretch.get("XCO_ppb_p98").getInfo()
+min_val = stats["p2"]
+max_val = stats["p98"]
 vis_params["min"] = min_val
 vis_params["max"] = max_val
 
@@ -122,7 +119,7 @@ vis_params["max"] = max_val
 m.addLayer(XCO_ppb, vis_params, "XCO_ppb Concentration")
 
 
-# Define the color palette and value range for Plotly color bar
+# Define the color palette for the color bar
 color_palette = [
     "#5e4fa2",
     "#378dba",
@@ -136,50 +133,17 @@ color_palette = [
     "#9e0142",
 ]
 
-# Create a figure with only a horizontal colorbar
-fig = go.Figure()
-
-# Add a colorbar trace with no data
-fig.add_trace(
-    go.Heatmap(
-        z=[np.linspace(min_val, max_val, 100)],
-        colorscale=color_palette,
-        colorbar=dict(
-            title="XCO Concentration (ppb)",
-            titleside="top",
-            tickvals=[min_val, max_val],
-            ticktext=[f"{min_val:.3f}", f"{max_val:.3f}"],
-            orientation="h",  # Horizontal colorbar
-        ),
-        showscale=True,
-    )
-)
-
-# Update layout to remove axes and labels
-fig.update_layout(
-    xaxis=dict(showticklabels=False),
-    yaxis=dict(showticklabels=False),
-    coloraxis_colorbar=dict(
-        title="XCO Concentration (ppb)",
-        titleside="top",
-        tickvals=[min_val, max_val],
-        ticktext=[f"{min_val}", f"{max_val}"],
-        orientation="h",  # Horizontal colorbar
-    ),
-    height=200,  # Adjust height for better visualization
+# Draw the horizontal colorbar locally; legends are cached by palette, range,
+# orientation and label, so repeated runs reuse the same PNG
+save_legend(
+    "horizontal_colorbar_legend.png",
+    round(min_val, 3),
+    round(max_val, 3),
+    "XCO Concentration (ppb)",
+    colors=color_palette,
 )
 
-# Save the colorbar figure as an image
-fig.write_image("horizontal_colorbar_legend.png")
-
-# Optionally, display the figure
-fig.show(renderer="browser")  # Opens the plot in your default web browser
-
 
-# Save the map to an HTML file and then open it in a browser
+# Save the map to an HTML file and display it in interactive mode
 m.to_html("city_map.html")
-
-# Optionally display the saved HTML in the default web browser
-import webbrowser
-
-webbrowser.open("city_map.html")
+show_html("city_map.html", m)
@@ -16,6 +16,8 @@ const App = () => {
   const [duration, setDuration] = useState("");
   const [timeframe, setTimeframe] = useState("");
   const [mapImageSrc, setMapImageSrc] = useState("");
+  const [reportSummary, setReportSummary] = useState("");
+  const [reportSeriesHtml, setReportSeriesHtml] = useState("");
 
   // Separate loading states
   const [loadingPollution, setLoadingPollution] = useState(false);
@@ -224,27 +226,33 @@ const App = () => {
     }
 
     try {
-      const response = await fetch("http://localhost:3001/pollution-data", {
-        method: "POST",
-        headers: {
-          "Content-Type": "application/json",
-        },
-        body: JSON.stringify({
-          city,
-          pollutant,
-          startDate: formattedStartDate,
-          endDate: formattedEndDate,
-        }),
+      // One report job renders the map and returns the period series and the
+      // stats; GET requests let the browser revalidate them with their ETags
+      const query = new URLSearchParams({
+        city,
+        pollutant,
+        startDate: formattedStartDate,
+        endDate: formattedEndDate,
       });
+      const response = await fetch(
+        `http://localhost:3001/city-report?${query}`
+      );
 
       if (!response.ok) {
         throw new Error(`HTTP error! Status: ${response.status}`);
       }
 
-      const blob = await response.blob(); // Get the response as a blob (binary large object)
-      const imageUrl = URL.createObjectURL(blob); // Create a URL for the image blob
-
-      setMapImageSrc(imageUrl); // This will hold the image URL
+      const report = await response.json();
+      setMapImageSrc(`http://localhost:3001/pollution-data?${query}`);
+      setReportSeriesHtml(report.timeSeriesHtml);
+
+      const { map, series } = report.stats;
+      setReportSummary(
+        map.count > 0
+          ? `Mean ${map.mean} ppb, min ${map.min} ppb, max ${map.max} ppb ` +
+              `(${series.sparse} of ${series.periods} periods sparsely observed)`
+          : ""
+      );
     } catch (error) {
       console.error("Error fetching data:", error);
     } finally {
@@ -260,24 +268,15 @@ const App = () => {
     }
     console.log(ntlCity, ntlYear, halfYear);
     try {
-      const response = await fetch("http://localhost:3001/ntl-data", {
-        method: "POST",
-        headers: {
-          "Content-Type": "application/json",
-        },
-        body: JSON.stringify({
-          ntlCity,
-          ntlYear,
-          halfYear,
-        }),
-      });
+      const query = new URLSearchParams({ ntlCity, ntlYear, halfYear });
+      const response = await fetch(`http://localhost:3001/ntl-data?${query}`);
 
       if (!response.ok) {
         throw new Error(`HTTP error! Status: ${response.status}`);
       }
 
-      const data = await response.json();
-      setNtlImageSrc(`data:image/png;base64,${data.ntlPlot}`);
+      const blob = await response.blob(); // The plot is sent as a binary PNG
+      setNtlImageSrc(URL.createObjectURL(blob));
     } catch (error) {
       console.error("Error fetching NTL data:", error);
     } finally {
@@ -313,18 +312,15 @@ const App = () => {
     }
 
     try {
-      const response = await fetch("http://localhost:3001/time-series-data", {
-        method: "POST",
-        headers: {
-          "Content-Type": "application/json",
-        },
-        body: JSON.stringify({
-          timeSeriesCity,
-          timeSeriesPollutant,
-          timeSeriesStartDate: formattedStartDate,
-          timeSeriesEndDate: formattedEndDate,
-        }),
+      const query = new URLSearchParams({
+        timeSeriesCity,
+        timeSeriesPollutant,
+        timeSeriesStartDate: formattedStartDate,
+        timeSeriesEndDate: formattedEndDate,
       });
+      const response = await fetch(
+        `http://localhost:3001/time-series-data?${query}`
+      );
 
       if (!response.ok) {
         throw new Error(`HTTP error! Status: ${response.status}`);
@@ -548,6 +544,14 @@ const App = () => {
               <div className="image-container">
                 <img src={mapImageSrc} alt="Pollution Map" className="image" />
               </div>
+              {reportSummary && <p>{reportSummary}</p>}
+              {reportSeriesHtml && (
+                <iframe
+                  srcDoc={reportSeriesHtml}
+                  title="City Report Time Series"
+                  style={{ width: "100%", height: "500px", border: "none" }}
+                />
+              )}
             </div>
           )}
         </div>
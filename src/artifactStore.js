@@ -0,0 +1,369 @@
+// Artifact storage shared by the API nodes and the Python workers.
+// ARTIFACT_STORE=local keeps artifacts under src/plots/cache; ARTIFACT_STORE=s3
+// keeps them in an S3-compatible bucket (S3_BUCKET, S3_ENDPOINT, S3_REGION,
+// AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY), so any node can serve any result.
+// python/artifact_store.py implements the same keys and job records.
+const crypto = require("crypto");
+const fs = require("fs");
+const fsPromises = require("fs/promises");
+const os = require("os");
+const path = require("path");
+const { Readable } = require("stream");
+
+// Identifies this process in the job index
+const NODE_ID = `${os.hostname()}:${process.pid}`;
+
+const partialName = (filePath) => {
+  const { dir, name, ext } = path.parse(filePath);
+  return path.join(dir, `${name}.partial${ext}`);
+};
+
+class LocalArtifactStore {
+  constructor(root) {
+    this.root = root;
+  }
+
+  path(key) {
+    return path.join(this.root, ...key.split("/"));
+  }
+
+  // Size and modification time, or null when the artifact does not exist
+  async stat(key) {
+    try {
+      const stats = await fsPromises.stat(this.path(key));
+      return { size: stats.size, mtimeMs: stats.mtimeMs };
+    } catch (error) {
+      if (error.code === "ENOENT") {
+        return null;
+      }
+      throw error;
+    }
+  }
+
+  async createReadStream(key) {
+    return fs.createReadStream(this.path(key));
+  }
+
+  // Jobs write here; next to the artifact, so putFile is a rename
+  async scratchPath(key) {
+    const scratchPath = partialName(this.path(key));
+    await fsPromises.mkdir(path.dirname(scratchPath), { recursive: true });
+    return scratchPath;
+  }
+
+  async putFile(key, filePath) {
+    await fsPromises.mkdir(path.dirname(this.path(key)), { recursive: true });
+    await fsPromises.rename(filePath, this.path(key));
+  }
+
+  async readText(key) {
+    try {
+      return await fsPromises.readFile(this.path(key), "utf8");
+    } catch (error) {
+      if (error.code === "ENOENT") {
+        return null;
+      }
+      throw error;
+    }
+  }
+
+  // Version of the stored object for replaceIf; a write is a rename, so the
+  // inode changes with every write
+  async version(key) {
+    try {
+      const stats = await fsPromises.stat(this.path(key), { bigint: true });
+      return `${stats.ino}-${stats.mtimeNs}`;
+    } catch (error) {
+      if (error.code === "ENOENT") {
+        return null;
+      }
+      throw error;
+    }
+  }
+
+  async readVersioned(key) {
+    let handle;
+    try {
+      handle = await fsPromises.open(this.path(key), "r");
+    } catch (error) {
+      if (error.code === "ENOENT") {
+        return null;
+      }
+      throw error;
+    }
+    try {
+      const stats = await handle.stat({ bigint: true });
+      const text = await handle.readFile("utf8");
+      return { text, version: `${stats.ino}-${stats.mtimeNs}` };
+    } finally {
+      await handle.close();
+    }
+  }
+
+  // Small records are written by several nodes, so each write has its own
+  // scratch file
+  async writeText(key, text) {
+    await fsPromises.mkdir(path.dirname(this.path(key)), { recursive: true });
+    const scratchPath = partialName(
+      `${this.path(key)}.${process.pid}-${crypto.randomUUID()}`
+    );
+    await fsPromises.writeFile(scratchPath, text);
+    await fsPromises.rename(scratchPath, this.path(key));
+  }
+
+  // Replace the object only if it is still at the version read. Takeovers
+  // of one version are serialised by an exclusive lock file, and the
+  // version is checked again under it.
+  async replaceIf(key, text, version) {
+    const lockPath = `${this.path(key)}.${version}.lock`;
+    try {
+      await fsPromises.writeFile(lockPath, "", { flag: "wx" });
+    } catch (error) {
+      if (error.code === "EEXIST") {
+        return false;
+      }
+      throw error;
+    }
+    try {
+      if ((await this.version(key)) !== version) {
+        return false;
+      }
+      await this.writeText(key, text);
+      return true;
+    } finally {
+      await fsPromises.unlink(lockPath);
+    }
+  }
+
+  async putIfAbsent(key, text) {
+    await fsPromises.mkdir(path.dirname(this.path(key)), { recursive: true });
+    try {
+      await fsPromises.writeFile(this.path(key), text, { flag: "wx" });
+      return true;
+    } catch (error) {
+      if (error.code === "EEXIST") {
+        return false;
+      }
+      throw error;
+    }
+  }
+}
+
+const sha256 = (data) => crypto.createHash("sha256").update(data).digest("hex");
+const hmac = (key, data) =>
+  crypto.createHmac("sha256", key).update(data).digest();
+
+const EMPTY_PAYLOAD_HASH = sha256("");
+
+// Minimal S3 client (path-style requests signed with AWS Signature V4), so
+// the server needs no SDK and works against MinIO or any S3-compatible store
+class S3ArtifactStore {
+  constructor({ bucket, endpoint, region, accessKeyId, secretAccessKey }) {
+    this.bucket = bucket;
+    this.endpoint = endpoint || `https://s3.${region}.amazonaws.com`;
+    this.region = region;
+    this.accessKeyId = accessKeyId;
+    this.secretAccessKey = secretAccessKey;
+  }
+
+  url(key) {
+    const encodedKey = key.split("/").map(encodeURIComponent).join("/");
+    return new URL(`${this.endpoint}/${this.bucket}/${encodedKey}`);
+  }
+
+  signedHeaders(method, url, payloadHash, extraHeaders = {}) {
+    const amzDate = new Date().toISOString().replace(/[:-]|\.\d{3}/g, "");
+    const dateStamp = amzDate.slice(0, 8);
+    const headers = {
+      host: url.host,
+      "x-amz-content-sha256": payloadHash,
+      "x-amz-date": amzDate,
+      ...extraHeaders,
+    };
+
+    const names = Object.keys(headers).sort();
+    const canonicalRequest = [
+      method,
+      url.pathname,
+      "",
+      names.map((name) => `${name}:${String(headers[name]).trim()}\n`).join(""),
+      names.join(";"),
+      payloadHash,
+    ].join("\n");
+    const scope = `${dateStamp}/${this.region}/s3/aws4_request`;
+    const stringToSign = [
+      "AWS4-HMAC-SHA256",
+      amzDate,
+      scope,
+      sha256(canonicalRequest),
+    ].join("\n");
+
+    const signingKey = ["s3", "aws4_request"].reduce(
+      hmac,
+      hmac(hmac(`AWS4${this.secretAccessKey}`, dateStamp), this.region)
+    );
+    const signature = hmac(signingKey, stringToSign).toString("hex");
+
+    delete headers.host; // Set by fetch from the URL
+    headers.authorization =
+      `AWS4-HMAC-SHA256 Credential=${this.accessKeyId}/${scope}, ` +
+      `SignedHeaders=${names.join(";")}, Signature=${signature}`;
+    return headers;
+  }
+
+  request(method, key, { body, headers } = {}) {
+    const url = this.url(key);
+    const payloadHash = body ? sha256(body) : EMPTY_PAYLOAD_HASH;
+    return fetch(url, {
+      method,
+      body,
+      headers: this.signedHeaders(method, url, payloadHash, headers),
+    });
+  }
+
+  async stat(key) {
+    const response = await this.request("HEAD", key);
+    if (response.status === 404) {
+      return null;
+    }
+    if (!response.ok) {
+      throw new Error(`S3 HEAD ${key} failed with ${response.status}`);
+    }
+    return {
+      size: Number(response.headers.get("content-length")),
+      mtimeMs: new Date(response.headers.get("last-modified")).getTime(),
+    };
+  }
+
+  async createReadStream(key) {
+    const response = await this.request("GET", key);
+    if (!response.ok) {
+      throw new Error(`S3 GET ${key} failed with ${response.status}`);
+    }
+    return Readable.fromWeb(response.body);
+  }
+
+  async scratchPath(key) {
+    const scratchPath = partialName(
+      path.join(os.tmpdir(), "artifacts", ...key.split("/"))
+    );
+    await fsPromises.mkdir(path.dirname(scratchPath), { recursive: true });
+    return scratchPath;
+  }
+
+  async put(key, body, headers) {
+    const response = await this.request("PUT", key, { body, headers });
+    // 412: the condition failed; 409: a concurrent conditional write won
+    if (response.status === 412 || response.status === 409) {
+      return false;
+    }
+    if (!response.ok) {
+      throw new Error(`S3 PUT ${key} failed with ${response.status}`);
+    }
+    return true;
+  }
+
+  async putFile(key, filePath) {
+    await this.put(key, await fsPromises.readFile(filePath));
+    await fsPromises.unlink(filePath);
+  }
+
+  async readText(key) {
+    const response = await this.request("GET", key);
+    if (response.status === 404) {
+      return null;
+    }
+    if (!response.ok) {
+      throw new Error(`S3 GET ${key} failed with ${response.status}`);
+    }
+    return response.text();
+  }
+
+  async readVersioned(key) {
+    const response = await this.request("GET", key);
+    if (response.status === 404) {
+      return null;
+    }
+    if (!response.ok) {
+      throw new Error(`S3 GET ${key} failed with ${response.status}`);
+    }
+    const text = await response.text();
+    return { text, version: response.headers.get("etag") };
+  }
+
+  async writeText(key, text) {
+    await this.put(key, Buffer.from(text));
+  }
+
+  // Conditional write on the ETag read, so only one node takes over a job
+  replaceIf(key, text, version) {
+    return this.put(key, Buffer.from(text), { "if-match": version });
+  }
+
+  // Conditional write, so only one node claims a job
+  putIfAbsent(key, text) {
+    return this.put(key, Buffer.from(text), { "if-none-match": "*" });
+  }
+}
+
+const createArtifactStore = (localRoot) => {
+  if ((process.env.ARTIFACT_STORE || "local") === "s3") {
+    return new S3ArtifactStore({
+      bucket: process.env.S3_BUCKET,
+      endpoint: process.env.S3_ENDPOINT,
+      region: process.env.S3_REGION || "us-east-1",
+      accessKeyId: process.env.AWS_ACCESS_KEY_ID,
+      secretAccessKey: process.env.AWS_SECRET_ACCESS_KEY,
+    });
+  }
+  return new LocalArtifactStore(localRoot);
+};
+
+const jobKey = (key) => `jobs/${key}.json`;
+
+// Record this node as producing the artifact unless another node holds an
+// unexpired lease on it
+const claimJob = async (store, key, leaseMs) => {
+  const now = Date.now();
+  const record = JSON.stringify({
+    state: "running",
+    node: NODE_ID,
+    started: now / 1000,
+    lease_until: (now + leaseMs) / 1000,
+  });
+  if (await store.putIfAbsent(jobKey(key), record)) {
+    return true;
+  }
+
+  const current = await store.readVersioned(jobKey(key));
+  if (!current) {
+    return false; // Removed meanwhile; the caller polls again
+  }
+  const existing = JSON.parse(current.text);
+  if (existing.state === "running" && existing.lease_until * 1000 > now) {
+    return false;
+  }
+
+  // Finished, failed or abandoned by a node that went away. Other nodes may
+  // have read the same record, so only the first to replace it wins.
+  return store.replaceIf(jobKey(key), record, current.version);
+};
+
+const finishJob = (store, key, state, details = {}) =>
+  store.writeText(
+    jobKey(key),
+    JSON.stringify({
+      state,
+      node: NODE_ID,
+      finished: Date.now() / 1000,
+      ...details,
+    })
+  );
+
+module.exports = {
+  LocalArtifactStore,
+  S3ArtifactStore,
+  createArtifactStore,
+  claimJob,
+  finishJob,
+};
@@ -0,0 +1,94 @@
+// Load test for the artifact endpoints: N concurrent clients each issue
+// repeated GET requests and the latency percentiles are printed.
+//
+//   node src/loadtest.js <url> [clients] [requestsPerClient]
+//
+// e.g. node src/loadtest.js "http://localhost:3001/time-series-data?timeSeriesCity=Delhi&timeSeriesPollutant=NO2&timeSeriesStartDate=2023-01-01&timeSeriesEndDate=2023-12-31" 50 20
+const http = require("http");
+
+const DEFAULT_CLIENTS = 50;
+const DEFAULT_REQUESTS_PER_CLIENT = 20;
+
+// Keep one connection per client, as browsers would
+const agent = new http.Agent({ keepAlive: true, maxSockets: Infinity });
+
+// Time a request until its whole body has been received
+const timedRequest = (url) =>
+  new Promise((resolve) => {
+    const started = process.hrtime.bigint();
+    const req = http.get(
+      url,
+      { agent, headers: { "Accept-Encoding": "br, gzip" } },
+      (res) => {
+        res.on("data", () => {});
+        res.on("end", () =>
+          resolve({
+            status: res.statusCode,
+            ms: Number(process.hrtime.bigint() - started) / 1e6,
+          })
+        );
+      }
+    );
+    req.on("error", (error) =>
+      resolve({
+        status: error.code,
+        ms: Number(process.hrtime.bigint() - started) / 1e6,
+      })
+    );
+  });
+
+const runClient = async (url, requests, results) => {
+  for (let i = 0; i < requests; i++) {
+    results.push(await timedRequest(url));
+  }
+};
+
+const percentile = (sorted, q) =>
+  sorted[Math.min(sorted.length - 1, Math.ceil((q / 100) * sorted.length) - 1)];
+
+const main = async () => {
+  const [url, clients, requests] = process.argv.slice(2);
+  if (!url) {
+    console.log(
+      "Usage: node src/loadtest.js <url> [clients] [requestsPerClient]"
+    );
+    process.exit(1);
+  }
+
+  const clientCount = Number(clients) || DEFAULT_CLIENTS;
+  const requestCount = Number(requests) || DEFAULT_REQUESTS_PER_CLIENT;
+
+  // One warm-up request so the artifact exists and the job time is excluded
+  const warmUp = await timedRequest(url);
+  console.log(`Warm-up: ${warmUp.status} in ${warmUp.ms.toFixed(1)} ms`);
+
+  const results = [];
+  const started = Date.now();
+  await Promise.all(
+    Array.from({ length: clientCount }, () =>
+      runClient(url, requestCount, results)
+    )
+  );
+  const elapsed = (Date.now() - started) / 1000;
+
+  const latencies = results.map(({ ms }) => ms).sort((a, b) => a - b);
+  const statuses = {};
+  results.forEach(({ status }) => {
+    statuses[status] = (statuses[status] || 0) + 1;
+  });
+
+  const rate = (results.length / elapsed).toFixed(1);
+  console.log(
+    `${results.length} requests from ${clientCount} clients ` +
+      `in ${elapsed.toFixed(1)} s (${rate} req/s)`
+  );
+  console.log("Status codes:", statuses);
+  ["50", "95", "99"].forEach((q) =>
+    console.log(`p${q}: ${percentile(latencies, Number(q)).toFixed(1)} ms`)
+  );
+  console.log(`max: ${latencies[latencies.length - 1].toFixed(1)} ms`);
+
+  agent.destroy();
+};
+
+main();
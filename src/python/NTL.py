@@ -2,49 +2,28 @@ import ee
 import requests
 from PIL import Image
 import numpy as np
+import matplotlib
+
+# Plots are only ever written to files, so no GUI backend is set up
+matplotlib.use("Agg")
 import matplotlib.ticker as ticker
 import matplotlib.pyplot as plt
 from matplotlib.colors import LinearSegmentedColormap
 from io import BytesIO
+import json
+import os
 import sys
 
-# Initialize the Earth Engine API
-ee.Authenticate()
-ee.Initialize(project="ee-narravarsha1")
-
-
-def NTL(city, start_date, end_date):
-    # Define city coordinates
-    city_coords = {
-        "Mumbai": (19.076090, 72.877426),
-        "Delhi": (28.704060, 77.102493),
-        "Chennai": (13.082680, 80.270718),
-        "Kolkata": (22.572646, 88.363895),
-        "Bangalore": (12.971599, 77.594566),
-        "Pune": (18.520430, 73.856743),
-        "Ahmedabad": (23.022505, 72.571365),
-        "Surat": (21.170240, 72.831062),
-        "Agra": (27.176670, 78.008072),
-        "Chandigarh": (30.733315, 76.779419),
-        "Asansol": (23.683333, 86.983333),
-        "Moradabad": (28.838686, 78.773331),
-        "Muzaffarpur": (26.120886, 85.364720),
-        "Patna": (25.594095, 85.137566),
-        "Agartala": (23.831457, 91.286778),
-        "Bhopal": (23.259933, 77.412613),
-        "Rourkela": (22.260423, 84.853584),
-        "Jodhpur": (26.238947, 73.024309),
-        "Indore": (22.719568, 75.857727),
-        "Hyderabad": (17.3850, 78.4867),
-    }
+from cities import get_bounding_box, get_city_geometry
+from deadline import check_deadline
+from ee_raster import RASTER_DIMENSIONS, fetch_raster, grid_extent
+from raster_store import get_store
+from result_cache import REFRESH_SECONDS, is_historical, ntl_date_range
 
-    lat, long = city_coords.get(
-        city, (13.0827, 80.2707)
-    )  # Default to Chennai if city not found
 
-    # Define a buffer around the point to cover an area around the selected city (50 kilometers)
-    buffer_radius = 50000  # 50 kilometers in meters
-    buffered_city_geometry = ee.Geometry.Point([long, lat]).buffer(buffer_radius)
+def NTL(city, start_date, end_date, plot_file_path):
+    # 50 km buffer around the city, as for the pollutant maps
+    buffered_city_geometry = get_city_geometry(city)
 
     # Filter the NOAA VIIRS image collection for specified city and date range
     viirs_collection = (
@@ -63,6 +42,8 @@ def NTL(city, start_date, end_date):
         "palette": ["black", "purple", "cyan", "green", "yellow", "red", "white"],
     }
 
+    check_deadline("min/max reduction")
+
     # Calculate the minimum and maximum NTL values
     min_max = viirs_collection.reduceRegion(
         reducer=ee.Reducer.minMax(),
@@ -79,6 +60,8 @@ def NTL(city, start_date, end_date):
     print("Minimum NTL value:", NTL_min)
     print("Maximum NTL value:", NTL_max)
 
+    check_deadline("thumbnail download")
+
     # Get a URL to a thumbnail image of the NTL data
     thumbnail_url = viirs_collection.getThumbURL(
         {
@@ -95,6 +78,8 @@ def NTL(city, start_date, end_date):
     img = Image.open(BytesIO(response.content))
     img_array = np.array(img)
 
+    check_deadline("rendering")
+
     # Get the geographic extent
     coords = buffered_city_geometry.bounds().getInfo()["coordinates"][0]
     extent = [coords[0][0], coords[2][0], coords[0][1], coords[2][1]]
@@ -107,7 +92,7 @@ def NTL(city, start_date, end_date):
     # Plot the image using Matplotlib with the custom colormap
     fig, ax = plt.subplots()
     cax = ax.imshow(img_array, extent=extent, origin="upper", cmap=custom_cmap)
-    ax.set_title(f"NTL around {city} in {year}")
+    ax.set_title(f"NTL around {city} in {start_date[:4]}")
     ax.set_xlabel("Longitude (E°)")
     ax.set_ylabel("Latitude (N°)")
 
@@ -143,24 +128,165 @@ def NTL(city, start_date, end_date):
     print(f"Plot saved successfully to {plot_file_path}.")
 
 
+# Per-period mean NTL rasters, fetched together for the periods not stored yet
+def load_NTL_rasters(city, periods):
+    store = get_store()
+    bbox = get_bounding_box(city)
+    keys = [
+        (
+            "NOAA/VIIRS/001/VNP46A2",
+            "Gap_Filled_DNB_BRDF_Corrected_NTL",
+            (start, end),
+            bbox,
+            RASTER_DIMENSIONS,
+        )
+        for _, start, end in periods
+    ]
+    rasters = [
+        store.get(*key, max_age=None if is_historical(end) else REFRESH_SECONDS)
+        for key, (_, _, end) in zip(keys, periods)
+    ]
+    missing = [i for i, raster in enumerate(rasters) if raster is None]
+
+    if missing:
+        check_deadline("NTL raster download")
+        buffered_city_geometry = get_city_geometry(city)
+        viirs_collection = (
+            ee.ImageCollection("NOAA/VIIRS/001/VNP46A2")
+            .filterBounds(buffered_city_geometry)
+            .select("Gap_Filled_DNB_BRDF_Corrected_NTL")
+        )
+
+        # One band per missing period, so a single request returns all of them
+        stack = ee.Image.cat(
+            [
+                viirs_collection.filterDate(periods[i][1], periods[i][2])
+                .mean()
+                .rename(f"period_{i}")
+                for i in missing
+            ]
+        ).clip(buffered_city_geometry)
+        bands, _ = fetch_raster(stack, bbox)
+
+        for i, band in zip(missing, bands):
+            rasters[i] = store.put(*keys[i], band)
+
+    return rasters
+
+
+def NTL_stats(raster):
+    valid = raster[np.isfinite(raster)]
+    if valid.size == 0:
+        return {"mean": None, "min": None, "max": None, "std": None, "count": 0}
+    return {
+        "mean": round(float(valid.mean()), 3),
+        "min": round(float(valid.min()), 3),
+        "max": round(float(valid.max()), 3),
+        "std": round(float(valid.std()), 3),
+        "count": int(valid.size),
+    }
+
+
+# Compare NTL across periods: per-period stats plus difference and ratio
+# rasters of each period against the first one (returned alongside the stats)
+def NTL_change(city, periods, plot_file_path=None):
+    rasters = load_NTL_rasters(city, periods)
+    baseline = rasters[0]
+
+    result = {
+        "city": city,
+        "periods": [
+            dict(period=label, start=start, end=end, **NTL_stats(raster))
+            for (label, start, end), raster in zip(periods, rasters)
+        ],
+        "changes": [],
+    }
+
+    differences = []
+    ratios = []
+    for (label, _, _), raster in zip(periods[1:], rasters[1:]):
+        difference = raster - baseline
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = np.where(baseline > 0, raster / baseline, np.nan)
+        differences.append(difference)
+        ratios.append(ratio)
+        result["changes"].append(
+            {
+                "period": label,
+                "baseline": periods[0][0],
+                "difference": NTL_stats(difference),
+                "ratio": NTL_stats(ratio),
+            }
+        )
+
+    if plot_file_path and differences:
+        check_deadline("rendering")
+        extent = grid_extent(get_bounding_box(city))
+        limit = max(float(np.nanmax(np.abs(d), initial=0)) for d in differences)
+        limit = limit or 1.0
+
+        fig, axes = plt.subplots(1, len(differences), squeeze=False)
+        for ax, (label, _, _), difference in zip(axes[0], periods[1:], differences):
+            cax = ax.imshow(
+                difference,
+                extent=extent,
+                origin="upper",
+                cmap="RdBu_r",
+                vmin=-limit,
+                vmax=limit,
+            )
+            ax.set_title(f"NTL change around {city}: {label} vs {periods[0][0]}")
+            ax.set_xlabel("Longitude (E°)")
+            ax.set_ylabel("Latitude (N°)")
+
+        cbar = plt.colorbar(cax, ax=axes[0].tolist(), orientation="vertical")
+        cbar.set_label("NTL Difference")
+
+        plt.savefig(plot_file_path, bbox_inches="tight", dpi=300)
+        plt.close()
+
+    return result, differences, ratios
+
+
 if __name__ == "__main__":
-    if len(sys.argv) != 4:
-        print("Usage: python CO.py <city> <start_date> <end_date>")
+    # Initialize the Earth Engine API
+    ee.Authenticate()
+    ee.Initialize(project="ee-narravarsha1")
+
+    if len(sys.argv) == 6 and sys.argv[2] == "compare":
+        # python NTL.py <city> compare <year,year,...> <half_year> <plot_file_path>
+        city = sys.argv[1]
+        half_year = sys.argv[4]
+        periods = [
+            (year, *ntl_date_range(year, half_year)) for year in sys.argv[3].split(",")
+        ]
+        if len(periods) < 2:
+            print("At least two years are needed for a comparison")
+            sys.exit(1)
+        plot_file_path = sys.argv[5]
+        result, differences, ratios = NTL_change(city, periods, plot_file_path)
+
+        # Keep the change rasters next to the plot for further analysis
+        np.savez_compressed(
+            os.path.splitext(plot_file_path)[0] + ".npz",
+            difference=np.stack(differences),
+            ratio=np.stack(ratios),
+        )
+        print(json.dumps(result))
+        sys.exit(0)
+
+    if len(sys.argv) not in (4, 5):
+        print("Usage: python NTL.py <city> <year> <half_year> [plot_file_path]")
+        print(
+            "       python NTL.py <city> compare <year,year,...> <half_year> <plot_file_path>"
+        )
         sys.exit(1)
 
     city = sys.argv[1]
     year = sys.argv[2]
     half_year = sys.argv[3]
-    if half_year == "jan-jun":
-        # Create the start and end dates for the specific month
-        start_date = f"{year}-01-01"
-        end_date = f"{year}-06-30"
-    elif half_year == "jan-dec":
-        start_date = f"{year}-01-01"
-        end_date = f"{year}-12-31"
-    else:
-        start_date = f"{year}-07-01"
-        end_date = f"{year}-12-30"
-
-    plot_file_path = "plots/NTL.png"  # Static filename
-    NTL(city, start_date, end_date)
+    start_date, end_date = ntl_date_range(year, half_year)
+
+    # Static filename unless the caller asks for a specific (cache) path
+    plot_file_path = sys.argv[4] if len(sys.argv) == 5 else "plots/NTL.png"
+    NTL(city, start_date, end_date, plot_file_path)
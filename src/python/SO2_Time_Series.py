@@ -0,0 +1,27 @@
+import ee
+import sys
+
+from time_series_plot import pollutant_time_series
+
+# Initialize the Earth Engine API
+ee.Authenticate()
+ee.Initialize(project="ee-narravarsha1")
+
+
+def SO2_Time_Series(city, start_date, end_date, plot_file_path):
+    pollutant_time_series("SO2", city, start_date, end_date, plot_file_path)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (4, 5):
+        print("Usage: python script.py <city> <start_date> <end_date> [plot_file_path]")
+        sys.exit(1)
+
+    city = sys.argv[1]
+    start_date = sys.argv[2]
+    end_date = sys.argv[3]
+    # Static filename unless the caller asks for a specific (cache) path
+    plot_file_path = (
+        sys.argv[4] if len(sys.argv) == 5 else "plots/latest_Timeseries.html"
+    )
+    SO2_Time_Series(city, start_date, end_date, plot_file_path)
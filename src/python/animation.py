@@ -0,0 +1,189 @@
+import ee
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+import numpy as np
+from PIL import Image
+
+from cities import get_bounding_box
+from deadline import check_deadline
+from ee_raster import grid_extent
+from map_engine import MAP_POLLUTANTS, map_title, render_map
+from raster_cube import window_means
+from shared_raster import RENDER_WORKERS, SharedRasters
+from time_series_engine import filter_end, generate_periods
+
+# Output formats, chosen by the file extension
+FORMATS = ["gif", "webp", "mp4"]
+
+# Frames are smaller than the 300 dpi single maps to keep downloads light
+FRAME_DPI = 100
+
+# How long each period is shown, in milliseconds
+FRAME_MS = 800
+
+
+# First and last day of each frame; periods are whole calendar months, so the
+# first and last frames are clamped to the requested window
+def frame_periods(start_date, end_date, interval="month"):
+    first, last = date.fromisoformat(start_date), date.fromisoformat(end_date)
+    return [
+        (max(start, first), min(end, last))
+        for _, start, end in generate_periods(start_date, end_date, interval)
+    ]
+
+
+# Frame windows as [start, end) date pairs, so a month includes its last day
+def frame_windows(start_date, end_date, interval="month"):
+    return [
+        (start.isoformat(), filter_end(end))
+        for start, end in frame_periods(start_date, end_date, interval)
+    ]
+
+
+# Runs in a worker process on a view of the shared frame stack
+def render_frame(frames, index, vmin, vmax, title, label, extent, path):
+    render_map(frames[index], extent, vmin, vmax, title, label, path, dpi=FRAME_DPI)
+    return path
+
+
+# Titles shift the tight bounding box a little, so frames are centred on a
+# white canvas of the largest frame's size
+def load_frames(paths):
+    images = [Image.open(path).convert("RGB") for path in paths]
+    width = max(image.width for image in images)
+    height = max(image.height for image in images)
+
+    frames = []
+    for image in images:
+        canvas = Image.new("RGB", (width, height), "white")
+        canvas.paste(image, ((width - image.width) // 2, (height - image.height) // 2))
+        frames.append(canvas)
+    return frames
+
+
+def encode_animation(paths, output_path, file_format):
+    frames = load_frames(paths)
+
+    if file_format in ("gif", "webp"):
+        frames[0].save(
+            output_path,
+            format=file_format.upper(),
+            save_all=True,
+            append_images=frames[1:],
+            duration=FRAME_MS,
+            loop=0,
+        )
+        return
+
+    # MP4 needs ffmpeg; H.264 also needs even frame dimensions
+    if shutil.which("ffmpeg") is None:
+        raise RuntimeError("MP4 output requires ffmpeg on the PATH")
+    width, height = frames[0].size
+    frame_dir = os.path.dirname(paths[0])
+    for i, frame in enumerate(frames):
+        frame.crop((0, 0, width - width % 2, height - height % 2)).save(
+            os.path.join(frame_dir, f"even_{i:04d}.png")
+        )
+    subprocess.run(
+        [
+            "ffmpeg",
+            "-y",
+            "-loglevel",
+            "error",
+            "-framerate",
+            f"{1000 / FRAME_MS:g}",
+            "-i",
+            os.path.join(frame_dir, "even_%04d.png"),
+            "-c:v",
+            "libx264",
+            "-pix_fmt",
+            "yuv420p",
+            "-f",
+            "mp4",
+            output_path,
+        ],
+        check=True,
+    )
+
+
+# One frame per period (monthly by default) with a colour scale shared by all
+# frames. The frames come from a single cube update covering the whole window
+# and are rendered in parallel from one shared stack.
+def pollutant_animation(
+    pollutant,
+    city,
+    start_date,
+    end_date,
+    output_path,
+    interval="month",
+    workers=RENDER_WORKERS,
+):
+    file_format = os.path.splitext(output_path)[1].lstrip(".").lower()
+    if file_format not in FORMATS:
+        raise ValueError(f"Unsupported animation format: {file_format}")
+
+    spec = MAP_POLLUTANTS[pollutant]
+    windows = frame_windows(start_date, end_date, interval)
+    frames = window_means(spec["collection"], spec["band"], city, windows)
+    if np.isnan(frames).all():
+        raise ValueError(
+            f"No {pollutant} data around {city} from {start_date} to {end_date}"
+        )
+
+    vmin = round(float(np.nanmin(frames)), 3)
+    vmax = round(float(np.nanmax(frames)), 3)
+    print(f"{len(windows)} frames, {pollutant} scale {vmin} to {vmax}")
+
+    check_deadline("rendering")
+    extent = grid_extent(get_bounding_box(city))
+    label = f"{pollutant} Concentration (ppb)"
+
+    rasters = SharedRasters()
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as frame_dir:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            handle = rasters.share(frames)
+            futures = [
+                rasters.submit(
+                    pool,
+                    render_frame,
+                    handle,
+                    i,
+                    vmin,
+                    vmax,
+                    map_title(pollutant, city, start.isoformat(), end.isoformat()),
+                    label,
+                    extent,
+                    os.path.join(frame_dir, f"frame_{i:04d}.png"),
+                )
+                for i, (start, end) in enumerate(
+                    frame_periods(start_date, end_date, interval)
+                )
+            ]
+            rasters.release(handle)
+            paths = [future.result() for future in futures]
+
+        encode_animation(paths, output_path, file_format)
+    print(f"Animation saved successfully to {output_path}.")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 6:
+        print(
+            "Usage: python animation.py <pollutant> <city> <start_date> <end_date> <output_path>"
+        )
+        sys.exit(1)
+
+    # Initialize the Earth Engine API
+    ee.Authenticate()
+    ee.Initialize(project="ee-narravarsha1")
+
+    pollutant, city, start_date, end_date, output_path = sys.argv[1:6]
+    pollutant_animation(pollutant, city, start_date, end_date, output_path)
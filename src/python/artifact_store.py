@@ -0,0 +1,262 @@
+import json
+import os
+import socket
+import tempfile
+import time
+
+from result_cache import CACHE_ROOT, REFRESH_SECONDS, is_historical, partial_path
+
+# "local" keeps artifacts under src/plots/cache; "s3" shares them between
+# API nodes and workers through an S3-compatible bucket. server.js reads
+# the same variables and uses the same key layout and job records.
+ARTIFACT_STORE_ENV = "ARTIFACT_STORE"
+
+# Identifies this process in the job index
+NODE_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+# S3 errors for a conditional write that lost to another writer
+CONDITION_FAILED_CODES = ("PreconditionFailed", "412", "ConditionalRequestConflict")
+
+
+class LocalArtifactStore:
+    def __init__(self, root=CACHE_ROOT):
+        self.root = root
+
+    def path(self, key):
+        return os.path.join(self.root, *key.split("/"))
+
+    def stat(self, key):
+        try:
+            stats = os.stat(self.path(key))
+        except FileNotFoundError:
+            return None
+        return {"size": stats.st_size, "mtime": stats.st_mtime}
+
+    # Jobs write here; for the local store it is next to the artifact, so
+    # put_file is a rename
+    def scratch_path(self, key):
+        path = partial_path(self.path(key))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+    def put_file(self, key, path):
+        os.makedirs(os.path.dirname(self.path(key)), exist_ok=True)
+        os.replace(path, self.path(key))
+
+    def read_text(self, key):
+        try:
+            with open(self.path(key)) as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    # Version of the stored object for replace_if; a write is a rename, so the
+    # inode changes with every write
+    def version(self, key):
+        try:
+            stats = os.stat(self.path(key))
+        except FileNotFoundError:
+            return None
+        return f"{stats.st_ino}-{stats.st_mtime_ns}"
+
+    def read_versioned(self, key):
+        try:
+            with open(self.path(key)) as f:
+                stats = os.fstat(f.fileno())
+                return f.read(), f"{stats.st_ino}-{stats.st_mtime_ns}"
+        except FileNotFoundError:
+            return None
+
+    # Small records are written by several nodes, so each write has its own
+    # scratch file
+    def write_text(self, key, text):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, scratch_path = tempfile.mkstemp(
+            dir=os.path.dirname(path), suffix=".partial"
+        )
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+        os.replace(scratch_path, path)
+
+    # Replace the object only if it is still at the version read. Takeovers
+    # of one version are serialised by an exclusive lock file, and the
+    # version is checked again under it.
+    def replace_if(self, key, text, version):
+        lock_path = f"{self.path(key)}.{version}.lock"
+        try:
+            os.close(os.open(lock_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL))
+        except FileExistsError:
+            return False
+        try:
+            if self.version(key) != version:
+                return False
+            self.write_text(key, text)
+            return True
+        finally:
+            os.remove(lock_path)
+
+    def put_if_absent(self, key, text):
+        os.makedirs(os.path.dirname(self.path(key)), exist_ok=True)
+        try:
+            fd = os.open(self.path(key), os.O_WRONLY | os.O_CREAT | os.O_EXCL)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+        return True
+
+
+class S3ArtifactStore:
+    def __init__(self, bucket, endpoint_url=None, region="us-east-1"):
+        # Only needed when artifacts are shared through S3
+        import boto3
+
+        self.bucket = bucket
+        self.client = boto3.client("s3", endpoint_url=endpoint_url, region_name=region)
+
+    def stat(self, key):
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=key)
+        except self.client.exceptions.ClientError as error:
+            if error.response["Error"]["Code"] in ("404", "NoSuchKey"):
+                return None
+            raise
+        return {
+            "size": head["ContentLength"],
+            "mtime": head["LastModified"].timestamp(),
+        }
+
+    def scratch_path(self, key):
+        path = os.path.join(tempfile.gettempdir(), "artifacts", *key.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return partial_path(path)
+
+    def put_file(self, key, path):
+        self.client.upload_file(path, self.bucket, key)
+        os.remove(path)
+
+    def read_text(self, key):
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=key)
+        except self.client.exceptions.NoSuchKey:
+            return None
+        return response["Body"].read().decode()
+
+    def read_versioned(self, key):
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=key)
+        except self.client.exceptions.NoSuchKey:
+            return None
+        return response["Body"].read().decode(), response["ETag"]
+
+    def write_text(self, key, text):
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=text.encode())
+
+    # Conditional write on the ETag read, so only one node takes over a job
+    def replace_if(self, key, text, version):
+        try:
+            self.client.put_object(
+                Bucket=self.bucket, Key=key, Body=text.encode(), IfMatch=version
+            )
+        except self.client.exceptions.ClientError as error:
+            if error.response["Error"]["Code"] in CONDITION_FAILED_CODES:
+                return False
+            raise
+        return True
+
+    # Conditional write, so only one node claims a job
+    def put_if_absent(self, key, text):
+        try:
+            self.client.put_object(
+                Bucket=self.bucket, Key=key, Body=text.encode(), IfNoneMatch="*"
+            )
+        except self.client.exceptions.ClientError as error:
+            if error.response["Error"]["Code"] in CONDITION_FAILED_CODES:
+                return False
+            raise
+        return True
+
+
+def is_fresh(store, key, end_date):
+    stats = store.stat(key)
+    if stats is None:
+        return False
+    if is_historical(end_date):
+        return True
+    return time.time() - stats["mtime"] < REFRESH_SECONDS
+
+
+def job_key(key):
+    return f"jobs/{key}.json"
+
+
+# Record this node as producing the artifact unless another node holds an
+# unexpired lease on it
+def claim_job(store, key, lease_seconds):
+    now = time.time()
+    record = json.dumps(
+        {
+            "state": "running",
+            "node": NODE_ID,
+            "started": now,
+            "lease_until": now + lease_seconds,
+        }
+    )
+    if store.put_if_absent(job_key(key), record):
+        return True
+
+    current = store.read_versioned(job_key(key))
+    if current is None:
+        return False  # Removed meanwhile; the caller retries or skips
+    text, version = current
+    existing = json.loads(text)
+    if existing["state"] == "running" and existing["lease_until"] > now:
+        return False
+
+    # Finished, failed or abandoned by a node that went away. Other nodes may
+    # have read the same record, so only the first to replace it wins.
+    return store.replace_if(job_key(key), record, version)
+
+
+# Claim the job producing an artifact unless it is fresh ("fresh") or another
+# node holds it ("busy"); freshness is checked again after the claim, since
+# another node may have finished it just before. With force the artifact is
+# produced even when fresh.
+def claim_artifact(store, key, end_date, lease_seconds, force=False):
+    if not force and is_fresh(store, key, end_date):
+        return "fresh"
+    if not claim_job(store, key, lease_seconds):
+        return "busy"
+    if not force and is_fresh(store, key, end_date):
+        finish_job(store, key, "done")
+        return "fresh"
+    return "claimed"
+
+
+def finish_job(store, key, state, **details):
+    store.write_text(
+        job_key(key),
+        json.dumps(
+            {"state": state, "node": NODE_ID, "finished": time.time(), **details}
+        ),
+    )
+
+
+_store = None
+
+
+# Store selected by ARTIFACT_STORE; S3 settings come from S3_BUCKET,
+# S3_ENDPOINT and S3_REGION, credentials from the usual AWS variables
+def get_artifact_store():
+    global _store
+    if _store is None:
+        if os.environ.get(ARTIFACT_STORE_ENV, "local") == "s3":
+            _store = S3ArtifactStore(
+                os.environ["S3_BUCKET"],
+                endpoint_url=os.environ.get("S3_ENDPOINT"),
+                region=os.environ.get("S3_REGION", "us-east-1"),
+            )
+        else:
+            _store = LocalArtifactStore()
+    return _store
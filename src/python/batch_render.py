@@ -0,0 +1,164 @@
+import ee
+import logging
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+
+from artifact_store import claim_artifact, finish_job, get_artifact_store
+from cities import city_coords
+from color_scales import MAP_SCALES, map_kind
+from map_engine import prepare_map, render_pollutant_map
+from prewarm import JOB_TIMEOUT_SECONDS, POLLUTANTS, app_month_window
+from result_cache import artifact_key
+from shared_raster import RENDER_WORKERS, SharedRasters
+
+logger = logging.getLogger("batch_render")
+
+
+# Every city and pollutant for each month of the year up to the current one
+def build_targets(year, scale="auto", today=None):
+    today = today or date.today()
+    last_month = today.month if year == today.year else 12
+
+    targets = []
+    for month in range(1, last_month + 1):
+        start_date, end_date = app_month_window(year, month)
+        for city in city_coords:
+            for pollutant in POLLUTANTS:
+                targets.append(
+                    {
+                        "pollutant": pollutant,
+                        "city": city,
+                        "start_date": start_date,
+                        "end_date": end_date,
+                        "scale": scale,
+                        "key": artifact_key(
+                            map_kind(scale),
+                            pollutant,
+                            city,
+                            start_date,
+                            end_date,
+                            "png",
+                        ),
+                    }
+                )
+    return targets
+
+
+# Runs in a worker process on a view of the shared raster
+def render_job(values, stats, target, plot_file_path):
+    started = time.perf_counter()
+    render_pollutant_map(
+        values,
+        stats,
+        target["pollutant"],
+        target["city"],
+        target["start_date"],
+        target["end_date"],
+        plot_file_path,
+    )
+    return time.perf_counter() - started
+
+
+# Fetch rasters in this process and render them on a process pool as they
+# arrive; artifacts land under the same keys the server serves
+def batch_render(targets, workers=RENDER_WORKERS, force=False):
+    store = get_artifact_store()
+    summary = {"rendered": 0, "fresh": 0, "busy": 0, "no_data": 0, "failed": 0}
+    fetch_seconds = render_seconds = 0.0
+    started = time.perf_counter()
+
+    # Spawned workers do not inherit the Earth Engine client's threads
+    context = multiprocessing.get_context("spawn")
+    rasters = SharedRasters()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        jobs = {}
+        for target in targets:
+            claim = claim_artifact(
+                store, target["key"], target["end_date"], JOB_TIMEOUT_SECONDS, force
+            )
+            if claim != "claimed":
+                summary[claim] += 1
+                continue
+
+            fetch_started = time.perf_counter()
+            try:
+                values, stats = prepare_map(
+                    target["pollutant"],
+                    target["city"],
+                    target["start_date"],
+                    target["end_date"],
+                    target["scale"],
+                )
+            except Exception as error:
+                summary["no_data" if isinstance(error, ValueError) else "failed"] += 1
+                finish_job(store, target["key"], "failed")
+                logger.warning("Skipped %s: %s", target["key"], error)
+                continue
+            fetch_seconds += time.perf_counter() - fetch_started
+
+            # Workers map the raster instead of receiving a pickled copy; the
+            # block is unlinked as soon as its render job finishes
+            handle = rasters.share(values)
+            scratch_path = store.scratch_path(target["key"])
+            future = rasters.submit(
+                pool, render_job, handle, stats, target, scratch_path
+            )
+            rasters.release(handle)
+            jobs[future] = (target, scratch_path)
+
+        total = len(jobs)
+        for done, future in enumerate(as_completed(jobs), 1):
+            target, scratch_path = jobs.pop(future)
+            try:
+                render_seconds += future.result()
+            except Exception as error:
+                summary["failed"] += 1
+                finish_job(store, target["key"], "failed")
+                logger.warning("Failed %s: %s", target["key"], error)
+                continue
+
+            store.put_file(target["key"], scratch_path)
+            finish_job(store, target["key"], "done")
+            summary["rendered"] += 1
+            logger.info("[%d/%d] %s", done, total, target["key"])
+
+    elapsed = time.perf_counter() - started
+    summary.update(
+        {
+            "workers": workers,
+            "seconds": round(elapsed, 1),
+            "fetch_seconds": round(fetch_seconds, 1),
+            "render_seconds": round(render_seconds, 1),
+            "maps_per_second": round(summary["rendered"] / elapsed, 2),
+        }
+    )
+    return summary
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    flags = [arg for arg in sys.argv[1:] if arg.startswith("--")]
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    scale = next(
+        (flag.split("=", 1)[1] for flag in flags if flag.startswith("--scale=")),
+        "auto",
+    )
+    if len(args) not in (1, 2) or scale not in MAP_SCALES:
+        print(
+            "Usage: python batch_render.py <year> [workers] [--force] [--scale=<name>]"
+        )
+        sys.exit(1)
+
+    # Initialize the Earth Engine API
+    ee.Authenticate()
+    ee.Initialize(project="ee-narravarsha1")
+
+    year = int(args[0])
+    workers = int(args[1]) if len(args) == 2 else RENDER_WORKERS
+
+    summary = batch_render(build_targets(year, scale), workers, "--force" in flags)
+    logger.info("Batch render: %s", summary)
@@ -0,0 +1,150 @@
+import ee
+import json
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import time_series_engine
+from cities import get_city_geometry
+from daily_archive import FIRST_DAY, DailyArchive
+from time_series_engine import (
+    POLLUTANTS,
+    dry_air_column,
+    evaluate,
+    filter_end,
+    generate_periods,
+    iter_time_series,
+    qa_collection,
+)
+
+
+# The previous per-period path: blocking size checks before each period's value
+def legacy_time_series(pollutant, city, start_date, end_date, interval=None):
+    spec = POLLUTANTS[pollutant]
+    geometry = get_city_geometry(city)
+    values = []
+    for _, start, end in generate_periods(start_date, end_date, interval):
+        start, end = start.isoformat(), filter_end(end)
+        collection = qa_collection(
+            spec["collection"], spec["band"], geometry, start, end
+        )
+        if evaluate(collection.size()) == 0:
+            values.append(None)
+            continue
+
+        image = collection.mean()
+        if spec["dry_air"]:
+            TC_dry_air, sizes = dry_air_column(geometry, start, end)
+            if min(evaluate(size) for size in sizes) == 0:
+                values.append(None)
+                continue
+            image = image.divide(TC_dry_air)
+
+        value = (
+            image.multiply(1e9)
+            .rename("ppb")
+            .reduceRegion(
+                reducer=ee.Reducer.mean(), geometry=geometry, scale=spec["scale"]
+            )
+        )
+        values.append(evaluate(value.get("ppb")))
+    return values
+
+
+def measure(label, func, *args):
+    time_series_engine.round_trips = 0
+    started = time.perf_counter()
+    periods = len(list(func(*args)))
+    return {
+        "mode": label,
+        "periods": periods,
+        "round_trips": time_series_engine.round_trips,
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+# Synthetic daily means for 20 cities x 4 gases x 6 years (a fifth of the days
+# cloudy), queried over random windows by slicing the raw days and through
+# the prefix-sum archive; no Earth Engine calls are made
+def archive_benchmark(queries, cities=20, years=6, seed=0):
+    rng = np.random.default_rng(seed)
+    names = [f"city_{i}" for i in range(cities)]
+    n_days = years * 365
+    days = np.datetime64(FIRST_DAY) + np.arange(n_days)
+
+    results = []
+    with tempfile.TemporaryDirectory() as root:
+        for pollutant in POLLUTANTS:
+            raw = rng.gamma(2.0, 10.0, size=(cities, n_days))
+            raw[rng.random(raw.shape) < 0.2] = np.nan
+
+            started = time.perf_counter()
+            archive = DailyArchive(pollutant, root=root, cities=names)
+            for row, city in enumerate(names):
+                archive.add_days(city, days, raw[row])
+            build_seconds = time.perf_counter() - started
+
+            rows = rng.integers(0, cities, queries)
+            start = rng.integers(0, n_days - 1, queries)
+            end = np.minimum(start + rng.integers(1, 2 * 365, queries), n_days)
+
+            started = time.perf_counter()
+            naive_mean = np.empty(queries)
+            naive_std = np.empty(queries)
+            for i in range(queries):
+                window = raw[rows[i], start[i] : end[i]]
+                window = window[np.isfinite(window)]
+                naive_mean[i] = window.mean() if window.size else np.nan
+                naive_std[i] = window.std() if window.size else np.nan
+            naive_seconds = time.perf_counter() - started
+
+            started = time.perf_counter()
+            mean, std, _ = archive.window_stats(rows, start, end)
+            prefix_seconds = time.perf_counter() - started
+
+            results.append(
+                {
+                    "mode": "archive",
+                    "pollutant": pollutant,
+                    "cities": cities,
+                    "days": n_days,
+                    "queries": queries,
+                    "build_seconds": round(build_seconds, 3),
+                    "slice_seconds": round(naive_seconds, 4),
+                    "prefix_seconds": round(prefix_seconds, 4),
+                    "max_mean_error": float(np.nanmax(np.abs(mean - naive_mean))),
+                    "max_std_error": float(np.nanmax(np.abs(std - naive_std))),
+                }
+            )
+    return results
+
+
+if __name__ == "__main__":
+    if len(sys.argv) in (2, 3) and sys.argv[1] == "archive":
+        queries = int(sys.argv[2]) if len(sys.argv) == 3 else 100000
+        for result in archive_benchmark(queries):
+            print(json.dumps(result))
+        sys.exit(0)
+
+    if len(sys.argv) not in (5, 6):
+        print(
+            "Usage: python benchmark.py <pollutant> <city> <start_date> <end_date> [interval]"
+        )
+        print("       python benchmark.py archive [queries]")
+        sys.exit(1)
+
+    # Initialize the Earth Engine API
+    ee.Authenticate()
+    ee.Initialize(project="ee-narravarsha1")
+
+    pollutant, city, start_date, end_date = sys.argv[1:5]
+    interval = sys.argv[5] if len(sys.argv) == 6 else None
+    args = (pollutant, city, start_date, end_date, interval)
+
+    for result in (
+        measure("per-period", legacy_time_series, *args),
+        measure("batched", iter_time_series, *args),
+    ):
+        print(json.dumps(result))
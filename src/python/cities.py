@@ -0,0 +1,55 @@
+import ee
+import math
+
+# Define city coordinates
+city_coords = {
+    "Mumbai": (19.076090, 72.877426),
+    "Delhi": (28.704060, 77.102493),
+    "Chennai": (13.082680, 80.270718),
+    "Kolkata": (22.572646, 88.363895),
+    "Bangalore": (12.971599, 77.594566),
+    "Pune": (18.520430, 73.856743),
+    "Ahmedabad": (23.022505, 72.571365),
+    "Surat": (21.170240, 72.831062),
+    "Agra": (27.176670, 78.008072),
+    "Chandigarh": (30.733315, 76.779419),
+    "Asansol": (23.683333, 86.983333),
+    "Moradabad": (28.838686, 78.773331),
+    "Muzaffarpur": (26.120886, 85.364720),
+    "Patna": (25.594095, 85.137566),
+    "Agartala": (23.831457, 91.286778),
+    "Bhopal": (23.259933, 77.412613),
+    "Rourkela": (22.260423, 84.853584),
+    "Jodhpur": (26.238947, 73.024309),
+    "Indore": (22.719568, 75.857727),
+    "Hyderabad": (17.3850, 78.4867),
+}
+
+# Buffer around the city point (50 kilometers in meters)
+buffer_radius = 50000
+
+
+def get_city_coords(city):
+    # Default to Chennai if city not found
+    return city_coords.get(city, (13.0827, 80.2707))
+
+
+def get_city_geometry(city, radius=buffer_radius):
+    lat, long = get_city_coords(city)
+    return ee.Geometry.Point(long, lat).buffer(radius)
+
+
+# Bounding box of the buffer computed locally, so no bounds().getInfo() is needed
+def get_bounding_box(city, radius=buffer_radius):
+    lat, long = get_city_coords(city)
+    km_per_degree_lat = 111  # Approximate value
+
+    lat_degree_diff = radius / 1000 / km_per_degree_lat
+    lon_degree_diff = radius / 1000 / (km_per_degree_lat * math.cos(math.radians(lat)))
+
+    return [
+        long - lon_degree_diff,
+        lat - lat_degree_diff,
+        long + lon_degree_diff,
+        lat + lat_degree_diff,
+    ]
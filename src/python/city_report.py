@@ -0,0 +1,89 @@
+import ee
+import json
+import sys
+from datetime import datetime
+
+import numpy as np
+
+from deadline import check_deadline
+from artifact_store import get_artifact_store
+from map_engine import pollutant_map
+from result_cache import artifact_key
+from time_series_engine import time_series
+from time_series_plot import time_series_figure
+
+# Windows up to a month are reported per day, longer ones per engine default
+DAILY_SERIES_MAX_DAYS = 31
+
+
+def report_interval(start_date, end_date):
+    days = (
+        datetime.strptime(end_date, "%Y-%m-%d")
+        - datetime.strptime(start_date, "%Y-%m-%d")
+    ).days
+    return "day" if days <= DAILY_SERIES_MAX_DAYS else None
+
+
+def series_summary(series):
+    values = series.value[series.valid()].astype(np.float64)
+    return {
+        "periods": len(series),
+        "sparse": int(series.sparse.sum()),
+        "mean": round(float(values.mean()), 3) if values.size else None,
+        "min": round(float(values.min()), 3) if values.size else None,
+        "max": round(float(values.max()), 3) if values.size else None,
+    }
+
+
+# Map, period series and summary statistics for one city and window in one job
+def city_report(pollutant, city, start_date, end_date):
+    # The map is written to the artifact store, where server.js serves it as
+    # a binary PNG; its raster also provides the window statistics
+    store = get_artifact_store()
+    map_key = artifact_key("map", pollutant, city, start_date, end_date, "png")
+    scratch_path = store.scratch_path(map_key)
+    map_stats = pollutant_map(
+        pollutant, city, start_date, end_date, scratch_path, scale="auto"
+    )
+    store.put_file(map_key, scratch_path)
+
+    check_deadline("time series")
+    series = time_series(
+        pollutant, city, start_date, end_date, report_interval(start_date, end_date)
+    )
+    fig = time_series_figure(pollutant, city, start_date, end_date, series)
+
+    return {
+        "city": city,
+        "pollutant": pollutant,
+        "startDate": start_date,
+        "endDate": end_date,
+        # A fragment loading plotly.js from its CDN, not the whole bundle inline
+        "timeSeriesHtml": fig.to_html(full_html=False, include_plotlyjs="cdn"),
+        "series": series.to_records(),
+        "stats": {
+            "map": {
+                key: round(value, 3) if isinstance(value, float) else value
+                for key, value in map_stats.items()
+            },
+            "series": series_summary(series),
+        },
+    }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 6:
+        print(
+            "Usage: python city_report.py <pollutant> <city> <start_date> <end_date> <report_file_path>"
+        )
+        sys.exit(1)
+
+    # Initialize the Earth Engine API
+    ee.Authenticate()
+    ee.Initialize(project="ee-narravarsha1")
+
+    pollutant, city, start_date, end_date, report_file_path = sys.argv[1:6]
+    report = city_report(pollutant, city, start_date, end_date)
+    with open(report_file_path, "w") as f:
+        json.dump(report, f)
+    print(f"Report saved to {report_file_path}")
@@ -0,0 +1,197 @@
+import ee
+import calendar
+import json
+import os
+import sys
+from datetime import date, datetime
+
+import numpy as np
+
+from result_cache import CACHE_ROOT, is_historical
+from time_series_engine import iter_time_series
+
+# Baselines are stored per pollutant and city as small JSON files
+CLIMATOLOGY_ROOT = os.path.join(CACHE_ROOT, "climatology")
+
+# First complete month of Sentinel-5P OFFL data
+FIRST_MONTH = (2018, 7)
+
+
+def climatology_path(pollutant, city):
+    return os.path.join(CLIMATOLOGY_ROOT, pollutant, f"{city}.json")
+
+
+def load_climatology(pollutant, city):
+    path = climatology_path(pollutant, city)
+    if not os.path.exists(path):
+        return {"months": {}, "last_month": None, "baseline": {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_climatology(pollutant, city, climatology):
+    path = climatology_path(pollutant, city)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial = path + ".partial"
+    with open(partial, "w") as f:
+        json.dump(climatology, f)
+    os.replace(partial, path)
+
+
+def month_key(year, month):
+    return f"{year}-{month:02d}"
+
+
+def previous_month(today):
+    return (today.year - 1, 12) if today.month == 1 else (today.year, today.month - 1)
+
+
+def next_month(year, month):
+    return (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def month_end(year, month):
+    return f"{year}-{month:02d}-{calendar.monthrange(year, month)[1]}"
+
+
+# Latest month whose last day is past the data latency, so late OFFL and
+# ERA5-Land days are in before the month is stored for good
+def last_settled_month(today):
+    now = datetime.combine(today, datetime.min.time())
+    year, month = previous_month(today)
+    while not is_historical(month_end(year, month), now):
+        year, month = previous_month(date(year, month, 1))
+    return year, month
+
+
+# Running sums per calendar month, so a new month is added without
+# recomputing; values are keyed by YYYY-MM so a month can be left out of its
+# own baseline
+def add_to_baseline(baseline, key, month, value):
+    entry = baseline.setdefault(
+        str(month), {"n": 0, "sum": 0.0, "sumsq": 0.0, "values": {}}
+    )
+    entry["n"] += 1
+    entry["sum"] += value
+    entry["sumsq"] += value * value
+    entry["values"][key] = value
+
+
+# Fetch only the months settled since the last update, in one batched series
+def update_climatology(pollutant, city, today=None):
+    climatology = load_climatology(pollutant, city)
+    last_complete = last_settled_month(today or date.today())
+
+    if climatology["last_month"]:
+        year, month = map(int, climatology["last_month"].split("-"))
+        start = next_month(year, month)
+    else:
+        start = FIRST_MONTH
+
+    if start > last_complete:
+        return climatology
+
+    start_date = f"{start[0]}-{start[1]:02d}-01"
+    end_date = month_end(*last_complete)
+    for point in iter_time_series(
+        pollutant, city, start_date, end_date, interval="month"
+    ):
+        month = point.start.month
+        key = month_key(point.start.year, month)
+        climatology["months"][key] = point.value
+        # Sparsely observed months are kept but left out of the baseline
+        if point.value is not None and not point.sparse:
+            add_to_baseline(climatology["baseline"], key, month, point.value)
+
+    climatology["last_month"] = month_key(*last_complete)
+    save_climatology(pollutant, city, climatology)
+    return climatology
+
+
+def baseline_stats(entry, exclude=None):
+    n, total, sumsq = entry["n"], entry["sum"], entry["sumsq"]
+    values = dict(entry["values"])
+
+    # Leave the month being compared out of its own baseline
+    if exclude in values:
+        value = values.pop(exclude)
+        n, total, sumsq = n - 1, total - value, sumsq - value * value
+    if n == 0:
+        return None
+
+    mean = total / n
+    std = max(sumsq / n - mean * mean, 0.0) ** 0.5
+    p10, p50, p90 = np.percentile(list(values.values()), [10, 50, 90])
+    return {
+        "n": n,
+        "mean": round(mean, 3),
+        "std": round(std, 3),
+        "p10": round(float(p10), 3),
+        "p50": round(float(p50), 3),
+        "p90": round(float(p90), 3),
+    }
+
+
+# Monthly values for the window with their anomaly against the baseline
+def anomalies(pollutant, city, start_date, end_date, today=None):
+    climatology = update_climatology(pollutant, city, today)
+    stored = climatology["months"]
+
+    # Months outside the stored archive (e.g. the current month, or one
+    # still within the data latency) are fetched together in one batched
+    # series
+    periods = []
+    year, month = int(start_date[:4]), int(start_date[5:7])
+    while (year, month) <= (int(end_date[:4]), int(end_date[5:7])):
+        periods.append((year, month))
+        year, month = next_month(year, month)
+
+    missing = [p for p in periods if month_key(*p) not in stored]
+    fetched = {}
+    if missing:
+        first, last = missing[0], missing[-1]
+        for point in iter_time_series(
+            pollutant,
+            city,
+            f"{first[0]}-{first[1]:02d}-01",
+            month_end(*last),
+            interval="month",
+        ):
+            fetched[month_key(point.start.year, point.start.month)] = point.value
+
+    results = []
+    for year, month in periods:
+        key = month_key(year, month)
+        value = stored[key] if key in stored else fetched.get(key)
+        entry = climatology["baseline"].get(str(month))
+        baseline = baseline_stats(entry, key) if entry else None
+
+        anomaly = z_score = None
+        if value is not None and baseline is not None:
+            anomaly = round(value - baseline["mean"], 3)
+            if baseline["std"] > 0:
+                z_score = round(anomaly / baseline["std"], 2)
+
+        results.append(
+            {
+                "month": key,
+                "value": value,
+                "baseline": baseline,
+                "anomaly": anomaly,
+                "z_score": z_score,
+            }
+        )
+    return results
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 5:
+        print("Usage: python climatology.py <pollutant> <city> <start_date> <end_date>")
+        sys.exit(1)
+
+    # Initialize the Earth Engine API
+    ee.Authenticate()
+    ee.Initialize(project="ee-narravarsha1")
+
+    pollutant, city, start_date, end_date = sys.argv[1:5]
+    print(json.dumps(anomalies(pollutant, city, start_date, end_date)))
@@ -0,0 +1,138 @@
+import json
+import os
+from datetime import date
+
+import numpy as np
+
+from artifact_store import get_artifact_store
+from cities import city_coords
+from raster_cube import window_means
+from zonal_stats import percentiles
+
+# Environment variable naming the scale a map job renders with, set by
+# server.js from the request
+SCALE_ENV = "MAP_SCALE"
+
+# "auto" is each map's own min/max; the others come from the tables, for
+# all of India or the map's city, over the whole year or the window's season
+MAP_SCALES = ["auto", "global", "global-season", "city", "city-season"]
+
+SEASONS = {
+    "winter": (12, 1, 2),
+    "summer": (3, 4, 5),
+    "monsoon": (6, 7, 8, 9),
+    "post-monsoon": (10, 11),
+}
+
+# Complete years of monthly means the percentiles are taken over
+REFERENCE_YEARS = 3
+
+# Percentiles bounding a scale, so a few extreme pixels cannot stretch it
+SCALE_QUANTILES = (2, 98)
+
+
+# Robust colour ranges per pollutant are small JSON tables in the artifact
+# store, so a table built by prewarm on one node serves every node
+def scale_key(pollutant):
+    return f"scales/{pollutant}.json"
+
+
+def get_scale_name():
+    return os.environ.get(SCALE_ENV, "auto")
+
+
+# Artifact kind for maps rendered with a scale, so every scale is cached apart
+def map_kind(scale):
+    return "map" if scale == "auto" else f"map-{scale}"
+
+
+def season_of(month):
+    return next(name for name, months in SEASONS.items() if month in months)
+
+
+def reference_years(today=None):
+    last = (today or date.today()).year - 1
+    return list(range(last - REFERENCE_YEARS + 1, last + 1))
+
+
+def value_range(values):
+    if values.size == 0:
+        return None
+    low, high = percentiles(values, SCALE_QUANTILES)
+    return [round(float(low), 3), round(float(high), 3)]
+
+
+# Monthly mean rasters of every city over the reference years, composed from
+# the daily cube, reduced to p2/p98 per city and season and for all cities
+def build_scale_table(pollutant, collection_id, band, cities=None, today=None):
+    years = reference_years(today)
+    windows = [
+        (f"{year}-{month:02d}-01", f"{year + month // 12}-{month % 12 + 1:02d}-01")
+        for year in years
+        for month in range(1, 13)
+    ]
+    seasons = [season_of(int(start[5:7])) for start, _ in windows]
+
+    scales = {}
+    pooled = {season: [] for season in SEASONS}
+    for city in cities or list(city_coords):
+        frames = window_means(collection_id, band, city, windows)
+        scales[city] = {}
+        for season in SEASONS:
+            index = [i for i, s in enumerate(seasons) if s == season]
+            values = frames[index]
+            values = values[np.isfinite(values)]
+            scales[city][season] = value_range(values)
+            pooled[season].append(values)
+        scales[city]["all"] = value_range(
+            np.concatenate([pooled[season][-1] for season in SEASONS])
+        )
+
+    scales["global"] = {
+        season: value_range(np.concatenate(pooled[season])) for season in SEASONS
+    }
+    scales["global"]["all"] = value_range(
+        np.concatenate([values for season in SEASONS for values in pooled[season]])
+    )
+
+    table = {
+        "pollutant": pollutant,
+        "years": years,
+        "quantiles": list(SCALE_QUANTILES),
+        "scales": scales,
+    }
+    save_scale_table(pollutant, table)
+    return table
+
+
+def save_scale_table(pollutant, table):
+    get_artifact_store().write_text(scale_key(pollutant), json.dumps(table, indent=2))
+
+
+def load_scale_table(pollutant):
+    text = get_artifact_store().read_text(scale_key(pollutant))
+    return json.loads(text) if text is not None else None
+
+
+# Whether the table covers the current reference years
+def is_current(table, today=None):
+    return table is not None and table["years"] == reference_years(today)
+
+
+# (vmin, vmax) of a named scale for a map of the city over the window; the
+# season is the one of the window's midpoint
+def scale_range(pollutant, city, scale, start_date, end_date):
+    table = load_scale_table(pollutant)
+    if table is None:
+        raise ValueError(f"No colour scales for {pollutant} yet")
+
+    area = "global" if scale.startswith("global") else city
+    season = "all"
+    if scale.endswith("-season"):
+        start, end = date.fromisoformat(start_date), date.fromisoformat(end_date)
+        season = season_of((start + (end - start) / 2).month)
+
+    bounds = table["scales"].get(area, {}).get(season)
+    if bounds is None:
+        raise ValueError(f"No {scale} colour scale for {pollutant} around {city}")
+    return bounds
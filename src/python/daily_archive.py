@@ -0,0 +1,205 @@
+import ee
+import contextlib
+import fcntl
+import json
+import os
+import sys
+from datetime import date, timedelta
+
+import numpy as np
+
+from cities import city_coords
+from result_cache import CACHE_ROOT, is_historical
+from time_series_engine import MIN_VALID_PIXELS, time_series
+
+# Daily city means per pollutant, stored as prefix sums so the mean and std of
+# any date window are answered from two rows
+ARCHIVE_ROOT = os.path.join(CACHE_ROOT, "daily")
+
+# First day held by the archive (first complete month of S5P OFFL data)
+FIRST_DAY = date(2018, 7, 1)
+
+# Daily periods resolved per getInfo() round trip when filling the archive
+DAYS_PER_BATCH = 31
+
+CITIES = list(city_coords)
+
+
+# Days since FIRST_DAY for a date, ISO string or array of either
+def day_index(day):
+    offset = np.asarray(day, dtype="datetime64[D]") - np.datetime64(FIRST_DAY)
+    return offset.astype(int)
+
+
+class DailyArchive:
+    def __init__(self, pollutant, root=ARCHIVE_ROOT, cities=CITIES):
+        self.path = os.path.join(root, f"{pollutant}.npz")
+        self.cities = {city: i for i, city in enumerate(cities)}
+
+        if os.path.exists(self.path):
+            with np.load(self.path) as data:
+                self.sum = data["sum"]
+                self.sumsq = data["sumsq"]
+                self.count = data["count"]
+                self.days = data["days"]
+        else:
+            # Row c, column d holds the totals of city c before day d
+            self.sum = np.zeros((len(cities), 1), dtype=np.float64)
+            self.sumsq = np.zeros((len(cities), 1), dtype=np.float64)
+            self.count = np.zeros((len(cities), 1), dtype=np.int32)
+            self.days = np.zeros((len(cities), 0), dtype=bool)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        partial = self.path.replace(".npz", ".partial.npz")
+        np.savez(
+            partial, sum=self.sum, sumsq=self.sumsq, count=self.count, days=self.days
+        )
+        os.replace(partial, self.path)
+
+    # Grow the day axis; the prefix sums carry their last column forward
+    def extend(self, n_days):
+        extra = n_days - self.days.shape[1]
+        if extra <= 0:
+            return
+        self.days = np.pad(self.days, ((0, 0), (0, extra)))
+        for name in ["sum", "sumsq", "count"]:
+            array = getattr(self, name)
+            setattr(self, name, np.pad(array, ((0, 0), (0, extra)), mode="edge"))
+
+    def missing_days(self, city, start_date, end_date):
+        start, end = max(int(day_index(start_date)), 0), int(day_index(end_date))
+        stored = np.zeros(max(end - start, 0), dtype=bool)
+        have = self.days[self.cities[city], start : min(end, self.days.shape[1])]
+        stored[: have.size] = have
+        return [
+            FIRST_DAY + timedelta(days=start + i)
+            for i in np.flatnonzero(~stored).tolist()
+        ]
+
+    # Add daily values (NaN when missing) with one cumulative sum per array
+    def add_days(self, city, days, values):
+        index = day_index(days)
+        if index.size == 0:
+            return
+        self.extend(index.max() + 1)
+
+        row = self.cities[city]
+        value = np.asarray(values, dtype=np.float64)
+
+        # Days already archived are skipped, so they are never counted twice
+        new = ~self.days[row, index]
+        index, value = index[new], value[new]
+        valid = np.isfinite(value)
+        n = self.days.shape[1]
+
+        for name, delta in [
+            ("sum", np.where(valid, value, 0.0)),
+            ("sumsq", np.where(valid, value * value, 0.0)),
+            ("count", valid.astype(np.int32)),
+        ]:
+            daily = np.zeros(n, dtype=getattr(self, name).dtype)
+            daily[index] = delta
+            getattr(self, name)[row, 1:] += np.cumsum(daily)
+        self.days[row, index] = True
+
+    # Mean, std and number of valid days for windows [start, end), excluding
+    # the end day as filterDate does; all arguments may be arrays
+    def window_stats(self, rows, start, end):
+        n = self.days.shape[1]
+        start = np.clip(start, 0, n)
+        end = np.clip(end, 0, n)
+
+        total = self.sum[rows, end] - self.sum[rows, start]
+        total_sq = self.sumsq[rows, end] - self.sumsq[rows, start]
+        count = self.count[rows, end] - self.count[rows, start]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = np.where(count > 0, total / count, np.nan)
+            variance = np.where(count > 0, total_sq / count - mean * mean, np.nan)
+        return mean, np.sqrt(np.maximum(variance, 0.0)), count
+
+    def window(self, city, start_date, end_date):
+        mean, std, count = self.window_stats(
+            self.cities[city], day_index(start_date), day_index(end_date)
+        )
+        return {
+            "mean": None if count == 0 else round(float(mean), 3),
+            "std": None if count == 0 else round(float(std), 3),
+            "days": int(count),
+        }
+
+
+# Shared while loading and exclusive while saving; a separate fetch lock
+# serialises backfills, so readers never wait for Earth Engine
+@contextlib.contextmanager
+def archive_lock(pollutant, mode, suffix="lock"):
+    os.makedirs(ARCHIVE_ROOT, exist_ok=True)
+    with open(os.path.join(ARCHIVE_ROOT, f"{pollutant}.{suffix}"), "a") as lock:
+        fcntl.flock(lock, mode)
+        yield
+
+
+def load_archive(pollutant):
+    with archive_lock(pollutant, fcntl.LOCK_SH):
+        return DailyArchive(pollutant, root=ARCHIVE_ROOT)
+
+
+def missing_historical(archive, city, start_date, end_date):
+    return [
+        day
+        for day in archive.missing_days(city, start_date, end_date)
+        if is_historical(day.isoformat())
+    ]
+
+
+# Fetch the historical days of the window not yet archived for the city
+def update_archive(pollutant, city, start_date, end_date):
+    archive = load_archive(pollutant)
+    if not missing_historical(archive, city, start_date, end_date):
+        return archive
+
+    with archive_lock(pollutant, fcntl.LOCK_EX, "fetch.lock"):
+        # Another process may have fetched them while this one waited
+        archive = load_archive(pollutant)
+        missing = missing_historical(archive, city, start_date, end_date)
+        if not missing:
+            return archive
+
+        series = time_series(
+            pollutant,
+            city,
+            missing[0].isoformat(),
+            missing[-1].isoformat(),
+            interval="day",
+            batch_size=DAYS_PER_BATCH,
+        )
+
+        # One overpass a day is normal, so only the pixel count decides whether
+        # a day is too cloudy to enter the means
+        values = np.where(series.count >= MIN_VALID_PIXELS, series.value, np.nan)
+        wanted = np.isin(series.start, np.array(missing, dtype="datetime64[D]"))
+        archive.add_days(city, series.start[wanted], values[wanted])
+        with archive_lock(pollutant, fcntl.LOCK_EX):
+            archive.save()
+        return archive
+
+
+def window_stats(pollutant, city, start_date, end_date):
+    archive = update_archive(pollutant, city, start_date, end_date)
+    return archive.window(city, start_date, end_date)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 5:
+        print(
+            "Usage: python daily_archive.py <pollutant> <city> <start_date> <end_date>"
+        )
+        sys.exit(1)
+
+    # Initialize the Earth Engine API
+    ee.Authenticate()
+    ee.Initialize(project="ee-narravarsha1")
+
+    pollutant, city, start_date, end_date = sys.argv[1:5]
+    print(json.dumps(window_stats(pollutant, city, start_date, end_date)))
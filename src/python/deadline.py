@@ -0,0 +1,41 @@
+import contextvars
+import os
+import time
+
+# Environment variable carrying the job deadline (seconds since the epoch),
+# set by server.js from the request's time budget
+DEADLINE_ENV = "JOB_DEADLINE"
+
+
+# Set by ee_async for the calls it runs on its thread pool; once the caller
+# is cancelled, a multi-request call stops at its next stage check
+cancel_event = contextvars.ContextVar("cancel_event", default=None)
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def get_deadline():
+    value = os.environ.get(DEADLINE_ENV)
+    return float(value) if value else None
+
+
+def deadline_from_budget(budget_ms):
+    return time.time() + budget_ms / 1000 if budget_ms else None
+
+
+# Abort before starting the next stage once the budget is spent or the
+# caller has gone away
+def check_deadline(stage, deadline=None):
+    event = cancel_event.get()
+    if event is not None and event.is_set():
+        raise JobCancelled(f"Cancelled before {stage}")
+    if deadline is None:
+        deadline = get_deadline()
+    if deadline is not None and time.time() >= deadline:
+        raise DeadlineExceeded(f"Deadline exceeded before {stage}")
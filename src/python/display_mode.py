@@ -0,0 +1,43 @@
+import os
+
+# Entry points only write files unless display is wanted: INTERACTIVE=1 turns
+# it on (INTERACTIVE=0 off); without the variable, notebooks are interactive
+# and scripts, server jobs and workers are headless
+INTERACTIVE_ENV = "INTERACTIVE"
+
+
+def in_notebook():
+    try:
+        from IPython import get_ipython
+    except ImportError:
+        return False
+    shell = get_ipython()
+    return shell is not None and "IPKernelApp" in shell.config
+
+
+def is_interactive():
+    value = os.environ.get(INTERACTIVE_ENV)
+    if value is not None:
+        return value == "1"
+    return in_notebook()
+
+
+def show_figure(fig):
+    if is_interactive():
+        fig.show()
+
+
+# Show a map or page already saved to html_path: inline in a notebook when the
+# object is given, otherwise in the default browser
+def show_html(html_path, obj=None):
+    if not is_interactive():
+        return
+    if obj is not None and in_notebook():
+        from IPython.display import display
+
+        display(obj)
+        return
+
+    import webbrowser
+
+    webbrowser.open("file://" + os.path.abspath(html_path))
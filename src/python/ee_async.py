@@ -0,0 +1,134 @@
+import ee
+import asyncio
+import contextvars
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import aiohttp
+
+from cities import get_city_geometry
+from deadline import cancel_event, check_deadline
+from time_series_engine import (
+    BATCH_SIZE,
+    build_batch,
+    evaluate,
+    generate_periods,
+    make_points,
+)
+
+# Maximum number of Earth Engine requests in flight at once (quota control)
+MAX_CONCURRENT_REQUESTS = 20
+
+# Connections kept open by the pooled session used for thumbnail downloads
+CONNECTION_POOL_SIZE = 40
+
+
+class AsyncEEClient:
+    def __init__(
+        self,
+        max_concurrent=MAX_CONCURRENT_REQUESTS,
+        pool_size=CONNECTION_POOL_SIZE,
+    ):
+        self.semaphore = asyncio.Semaphore(max_concurrent)
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrent)
+        self.pool_size = pool_size
+        self.session = None
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def open(self):
+        if self.session is None:
+            connector = aiohttp.TCPConnector(limit=self.pool_size)
+            self.session = aiohttp.ClientSession(
+                connector=connector, raise_for_status=True
+            )
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    # Run a blocking EE call on the thread pool while holding a quota slot.
+    # A cancelled caller sends no further requests: a call still waiting for a
+    # slot is never submitted, and a running one stops at its next
+    # check_deadline. A request already sent cannot be recalled and runs to
+    # completion.
+    async def run(self, func, *args, **kwargs):
+        await self.semaphore.acquire()
+        loop = asyncio.get_running_loop()
+        cancelled = threading.Event()
+
+        def call():
+            cancel_event.set(cancelled)
+            check_deadline(getattr(func, "__name__", "call"))
+            return func(*args, **kwargs)
+
+        try:
+            future = self.executor.submit(contextvars.copy_context().run, call)
+        except BaseException:
+            self.semaphore.release()
+            raise
+
+        # The slot is only freed once the call really returns, so a cancelled
+        # caller cannot push the number of in-flight requests above the quota
+        def release(_):
+            try:
+                loop.call_soon_threadsafe(self.semaphore.release)
+            except RuntimeError:
+                pass  # Event loop already closed
+
+        future.add_done_callback(release)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async def compute_value(self, obj):
+        return await self.run(evaluate, obj)
+
+    async def compute_pixels(self, params):
+        return await self.run(ee.data.computePixels, params)
+
+    async def get_map_id(self, image, vis_params=None):
+        return await self.run(image.getMapId, vis_params)
+
+    async def get_thumbnail(self, image, params):
+        thumbnail_url = await self.run(image.getThumbURL, params)
+        async with self.semaphore:
+            async with self.session.get(thumbnail_url) as response:
+                return await response.read()
+
+
+# Async counterpart of time_series_engine.iter_time_series
+async def iter_time_series_async(
+    client,
+    pollutant,
+    city,
+    start_date,
+    end_date,
+    interval=None,
+    batch_size=BATCH_SIZE,
+    deadline=None,
+):
+    geometry = get_city_geometry(city)
+    periods = generate_periods(start_date, end_date, interval)
+
+    while True:
+        batch = list(itertools.islice(periods, batch_size))
+        if not batch:
+            break
+        check_deadline(f"period {batch[0][1]}", deadline)
+
+        values = await client.compute_value(
+            ee.List(build_batch(pollutant, geometry, batch))
+        )
+        for point in make_points(batch, dict(enumerate(values))):
+            yield point
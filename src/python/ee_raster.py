@@ -0,0 +1,53 @@
+import ee
+import numpy as np
+
+# Width and height of fetched rasters, matching the 512 px map thumbnails
+RASTER_DIMENSIONS = 512
+
+# Fill value for masked pixels, turned into NaN once downloaded
+NODATA = -9999.0
+
+
+# Pixel grid covering a [min_lon, min_lat, max_lon, max_lat] box in EPSG:4326
+def make_grid(bounding_box, dimensions=RASTER_DIMENSIONS):
+    min_lon, min_lat, max_lon, max_lat = bounding_box
+    return {
+        "dimensions": {"width": dimensions, "height": dimensions},
+        "affineTransform": {
+            "scaleX": (max_lon - min_lon) / dimensions,
+            "shearX": 0,
+            "translateX": min_lon,
+            "shearY": 0,
+            "scaleY": -(max_lat - min_lat) / dimensions,
+            "translateY": max_lat,
+        },
+        "crsCode": "EPSG:4326",
+    }
+
+
+# Extent in the order matplotlib's imshow expects
+def grid_extent(bounding_box):
+    min_lon, min_lat, max_lon, max_lat = bounding_box
+    return [min_lon, max_lon, min_lat, max_lat]
+
+
+# Download every band of an image as float values in one computePixels call.
+# Returns a (bands, height, width) float32 array and the band names.
+def fetch_raster(image, bounding_box, dimensions=RASTER_DIMENSIONS):
+    data = ee.data.computePixels(
+        {
+            "expression": image.toFloat().unmask(NODATA, False),
+            "fileFormat": "NUMPY_NDARRAY",
+            "grid": make_grid(bounding_box, dimensions),
+        }
+    )
+
+    band_names = list(data.dtype.names)
+    bands = np.stack([data[name] for name in band_names]).astype(np.float32)
+    bands[bands == NODATA] = np.nan
+    return bands, band_names
+
+
+# Raster artifact for downstream tools, loadable with np.load
+def save_raster(values, path):
+    np.save(path, values)
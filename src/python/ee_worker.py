@@ -0,0 +1,174 @@
+import ee
+import asyncio
+import json
+import multiprocessing
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from aiohttp import web
+
+from artifact_store import get_artifact_store
+from color_scales import MAP_SCALES, map_kind, scale_range
+from deadline import DeadlineExceeded, check_deadline, deadline_from_budget
+from ee_async import AsyncEEClient, iter_time_series_async
+from ee_raster import save_raster
+from map_engine import MAP_POLLUTANTS, fetch_map_raster, render_pollutant_map
+from result_cache import artifact_key
+from shared_raster import RENDER_WORKERS, SharedRasters
+from time_series_engine import POLLUTANTS
+from zonal_stats import city_zonal_stats
+
+# Port the worker service listens on (the Express server runs on 3001)
+WORKER_PORT = 3002
+
+
+async def time_series(request):
+    body = await request.json()
+    pollutant = body.get("pollutant")
+    city = body.get("city")
+    start_date = body.get("startDate")
+    end_date = body.get("endDate")
+
+    if not city or not start_date or not end_date or pollutant not in POLLUTANTS:
+        raise web.HTTPBadRequest(text="All fields are required.")
+
+    budget_ms = body.get("budgetMs")
+    deadline = deadline_from_budget(budget_ms)
+
+    response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+    await response.prepare(request)
+
+    # If the client disconnects the handler is cancelled, so no further
+    # batches of this request are sent; a batch already sent still completes.
+    # The timeout also bounds a single hung call, which the between-batch
+    # check cannot
+    try:
+        async with asyncio.timeout(budget_ms / 1000 if budget_ms else None):
+            async for point in iter_time_series_async(
+                request.app["ee_client"],
+                pollutant,
+                city,
+                start_date,
+                end_date,
+                body.get("interval"),
+                deadline=deadline,
+            ):
+                await response.write((json.dumps(point.to_dict()) + "\n").encode())
+    except (DeadlineExceeded, TimeoutError):
+        error = {"error": "Deadline exceeded"}
+        await response.write((json.dumps(error) + "\n").encode())
+
+    await response.write_eof()
+    return response
+
+
+# Fetch a map raster once, then compute its statistics, render it and export
+# it in the render processes, which only receive a shared memory handle
+async def map_image(request):
+    body = await request.json()
+    pollutant = body.get("pollutant")
+    city = body.get("city")
+    start_date = body.get("startDate")
+    end_date = body.get("endDate")
+    scale = body.get("scale", "auto")
+
+    if not city or not start_date or not end_date or pollutant not in MAP_POLLUTANTS:
+        raise web.HTTPBadRequest(text="All fields are required.")
+    if scale not in MAP_SCALES:
+        raise web.HTTPBadRequest(text="Unknown colour scale.")
+
+    deadline = deadline_from_budget(body.get("budgetMs"))
+    rasters = request.app["rasters"]
+    pool = request.app["render_pool"]
+    store = get_artifact_store()
+    map_key = artifact_key(
+        map_kind(scale), pollutant, city, start_date, end_date, "png"
+    )
+    raster_key = artifact_key("raster", pollutant, city, start_date, end_date, "npy")
+
+    # A disconnect stops the cube update between its computePixels requests
+    values = await request.app["ee_client"].run(
+        fetch_map_raster, pollutant, city, start_date, end_date
+    )
+    if not np.isfinite(values).any():
+        raise web.HTTPNotFound(text="No data for the selected window.")
+    handle = rasters.share(values)
+    del values
+
+    # Jobs keep their own references, so the block outlives a cancelled request
+    # until the last job using it has finished
+    try:
+        # A named scale needs no statistics pass over the raster
+        if scale == "auto":
+            stats = await asyncio.wrap_future(
+                rasters.submit(pool, city_zonal_stats, handle, city)
+            )
+        else:
+            vmin, vmax = scale_range(pollutant, city, scale, start_date, end_date)
+            stats = {"scale": scale, "min": vmin, "max": vmax}
+        check_deadline("rendering", deadline)
+
+        map_path = store.scratch_path(map_key)
+        raster_path = store.scratch_path(raster_key)
+        await asyncio.gather(
+            asyncio.wrap_future(
+                rasters.submit(
+                    pool,
+                    render_pollutant_map,
+                    handle,
+                    stats,
+                    pollutant,
+                    city,
+                    start_date,
+                    end_date,
+                    map_path,
+                )
+            ),
+            asyncio.wrap_future(rasters.submit(pool, save_raster, handle, raster_path)),
+        )
+    except DeadlineExceeded:
+        raise web.HTTPGatewayTimeout(text="Deadline exceeded")
+    except ValueError as error:
+        raise web.HTTPNotFound(text=str(error))
+    finally:
+        rasters.release(handle)
+
+    await asyncio.to_thread(store.put_file, map_key, map_path)
+    await asyncio.to_thread(store.put_file, raster_key, raster_path)
+    return web.json_response({"map": map_key, "raster": raster_key, "stats": stats})
+
+
+async def start_client(app):
+    app["ee_client"] = AsyncEEClient()
+    await app["ee_client"].open()
+
+    # Spawned, so the render processes do not inherit the client's threads
+    app["render_pool"] = ProcessPoolExecutor(
+        max_workers=RENDER_WORKERS, mp_context=multiprocessing.get_context("spawn")
+    )
+    app["rasters"] = SharedRasters()
+
+
+async def stop_client(app):
+    await app["ee_client"].close()
+    app["render_pool"].shutdown(wait=True, cancel_futures=True)
+    app["rasters"].close()
+
+
+def create_app():
+    app = web.Application()
+    app.router.add_post("/time-series", time_series)
+    app.router.add_post("/map", map_image)
+    app.on_startup.append(start_client)
+    app.on_cleanup.append(stop_client)
+    return app
+
+
+if __name__ == "__main__":
+    # Initialize the Earth Engine API
+    ee.Authenticate()
+    ee.Initialize(project="ee-narravarsha1")
+
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else WORKER_PORT
+    web.run_app(create_app(), port=port, handler_cancellation=True)
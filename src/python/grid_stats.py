@@ -0,0 +1,164 @@
+import ee
+import json
+import sys
+
+import numpy as np
+
+from cities import get_bounding_box, get_city_geometry
+from map_engine import build_map_image
+
+# Scale used for the per-cell reductions, as for the map statistics
+GRID_SCALE = 1113.2
+
+# Default number of cells along each side of the city's bounding box
+GRID_SIZE = 8
+
+
+# N x N rectangles over the city's bounding box, clipped to the 50 km buffer
+def make_grid_cells(city, n=GRID_SIZE):
+    min_lon, min_lat, max_lon, max_lat = get_bounding_box(city)
+    lon_step = (max_lon - min_lon) / n
+    lat_step = (max_lat - min_lat) / n
+    buffered_city_geometry = get_city_geometry(city)
+
+    cells = []
+    for row in range(n):
+        for col in range(n):
+            # Row 0 is the northern edge, matching raster orientation
+            top = max_lat - row * lat_step
+            left = min_lon + col * lon_step
+            cell = ee.Geometry.Rectangle(
+                [left, top - lat_step, left + lon_step, top], "EPSG:4326", False
+            )
+            cells.append(
+                ee.Feature(
+                    cell.intersection(buffered_city_geometry, 1),
+                    {"row": row, "col": col},
+                )
+            )
+    return ee.FeatureCollection(cells)
+
+
+# Ward polygons from a local GeoJSON file, keyed by the given property
+def load_ward_features(geojson_path, name_property="name"):
+    with open(geojson_path) as f:
+        data = json.load(f)
+
+    return ee.FeatureCollection(
+        [
+            ee.Feature(
+                feature["geometry"],
+                {"name": str(feature["properties"].get(name_property, i))},
+            )
+            for i, feature in enumerate(data["features"])
+        ]
+    )
+
+
+# Per-zone mean and valid-pixel count from a single reduceRegions evaluation,
+# as one property dict per zone. Zones without valid pixels have a null or
+# missing mean, so each zone's properties are fetched together rather than
+# as per-property columns, which would skip the nulls and misalign.
+def reduce_zones(image, zones, properties):
+    reducer = ee.Reducer.mean().combine(ee.Reducer.count(), sharedInputs=True)
+    reduced = image.reduceRegions(collection=zones, reducer=reducer, scale=GRID_SCALE)
+
+    features = reduced.select(properties + ["mean", "count"], None, False).getInfo()
+    return [feature["properties"] for feature in features["features"]]
+
+
+# N x N mean and count arrays from the grid cells' reductions
+def grid_arrays(zones, n):
+    means = np.full((n, n), np.nan, dtype=np.float32)
+    counts = np.zeros((n, n), dtype=np.int32)
+    for zone in zones:
+        row, col = zone["row"], zone["col"]
+        if zone.get("mean") is not None:
+            means[row, col] = zone["mean"]
+        counts[row, col] = zone.get("count") or 0
+    return means, counts
+
+
+def grid_stats(pollutant, city, start_date, end_date, n=GRID_SIZE):
+    image = build_map_image(pollutant, get_city_geometry(city), start_date, end_date)
+    zones = reduce_zones(image, make_grid_cells(city, n), ["row", "col"])
+    means, counts = grid_arrays(zones, n)
+
+    return {"bbox": get_bounding_box(city), "mean": means, "count": counts}
+
+
+def ward_stats(pollutant, city, start_date, end_date, geojson_path):
+    image = build_map_image(pollutant, get_city_geometry(city), start_date, end_date)
+    zones = reduce_zones(image, load_ward_features(geojson_path), ["name"])
+
+    return {
+        "name": [zone["name"] for zone in zones],
+        "mean": np.array(
+            [np.nan if zone.get("mean") is None else zone["mean"] for zone in zones],
+            dtype=np.float32,
+        ),
+        "count": np.array([zone.get("count") or 0 for zone in zones], dtype=np.int32),
+    }
+
+
+# Highest-mean cells with their center coordinates
+def grid_hotspots(result, top=10):
+    min_lon, min_lat, max_lon, max_lat = result["bbox"]
+    n = result["mean"].shape[0]
+    lon_step = (max_lon - min_lon) / n
+    lat_step = (max_lat - min_lat) / n
+
+    means = np.where(np.isnan(result["mean"]), -np.inf, result["mean"])
+    order = np.argsort(means, axis=None)[::-1][:top]
+
+    hotspots = []
+    for index in order:
+        row, col = np.unravel_index(index, means.shape)
+        if not np.isfinite(means[row, col]):
+            break
+        hotspots.append(
+            {
+                "row": int(row),
+                "col": int(col),
+                "lat": round(max_lat - (row + 0.5) * lat_step, 5),
+                "lon": round(min_lon + (col + 0.5) * lon_step, 5),
+                "mean": round(float(result["mean"][row, col]), 3),
+                "count": int(result["count"][row, col]),
+            }
+        )
+    return hotspots
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (5, 6):
+        print(
+            "Usage: python grid_stats.py <pollutant> <city> <start_date> <end_date> [grid_size | wards.geojson]"
+        )
+        sys.exit(1)
+
+    # Initialize the Earth Engine API
+    ee.Authenticate()
+    ee.Initialize(project="ee-narravarsha1")
+
+    pollutant, city, start_date, end_date = sys.argv[1:5]
+    zones = sys.argv[5] if len(sys.argv) == 6 else str(GRID_SIZE)
+
+    if zones.endswith(".geojson") or zones.endswith(".json"):
+        result = ward_stats(pollutant, city, start_date, end_date, zones)
+        table = sorted(
+            (
+                {"name": name, "mean": round(float(mean), 3), "count": int(count)}
+                for name, mean, count in zip(
+                    result["name"], result["mean"], result["count"]
+                )
+                if not np.isnan(mean)
+            ),
+            key=lambda ward: ward["mean"],
+            reverse=True,
+        )
+    else:
+        table = grid_hotspots(
+            grid_stats(pollutant, city, start_date, end_date, int(zones))
+        )
+
+    print(json.dumps(table))
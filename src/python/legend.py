@@ -0,0 +1,149 @@
+import functools
+import hashlib
+import io
+import json
+import os
+import sys
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from result_cache import CACHE_ROOT
+
+# Rendered legends, addressed by a hash of everything drawn on them
+LEGEND_ROOT = os.path.join(CACHE_ROOT, "legends")
+
+# Colour bar size in pixels, and room around it for the labels
+BAR_LENGTH = 400
+BAR_THICKNESS = 20
+PADDING = 40
+FONT_SIZE = 14
+
+# Evenly spaced tick labels, as on the map colour bars
+NUM_TICKS = 5
+
+# Same spectral palette as the maps
+palette = [
+    "#5e4fa2",
+    "#378dba",
+    "#73c7a4",
+    "#bee5a0",
+    "#f0f9a8",
+    "#feeda1",
+    "#fdbe6e",
+    "#f57948",
+    "#d8424d",
+    "#9e0142",
+]
+
+
+# Colours linearly interpolated between the palette stops, as (n, 3) uint8
+def gradient(colors, n):
+    stops = np.array(
+        [[int(c[i : i + 2], 16) for i in (1, 3, 5)] for c in colors], dtype=float
+    )
+    positions = np.linspace(0, 1, len(colors))
+    samples = np.linspace(0, 1, n)
+    channels = [np.interp(samples, positions, stops[:, i]) for i in range(3)]
+    return np.rint(np.stack(channels, axis=1)).astype(np.uint8)
+
+
+def render_legend(colors, vmin, vmax, orientation, label):
+    font = ImageFont.load_default(size=FONT_SIZE)
+    ticks = np.linspace(vmin, vmax, NUM_TICKS)
+    tick_labels = [f"{tick:.3f}" for tick in ticks]
+    text_height = FONT_SIZE + 4
+    bar = gradient(colors, BAR_LENGTH)
+
+    if orientation == "horizontal":
+        width = BAR_LENGTH + 2 * PADDING
+        height = 2 * text_height + BAR_THICKNESS + 16
+        image = Image.new("RGB", (width, height), "white")
+        draw = ImageDraw.Draw(image)
+        draw.text((width / 2, 2), label, fill="black", font=font, anchor="ma")
+
+        top = text_height + 4
+        strip = np.broadcast_to(bar[None, :, :], (BAR_THICKNESS, BAR_LENGTH, 3))
+        image.paste(Image.fromarray(np.ascontiguousarray(strip)), (PADDING, top))
+        for tick, text in zip(ticks, tick_labels):
+            x = PADDING + (tick - vmin) / (vmax - vmin or 1) * (BAR_LENGTH - 1)
+            y = top + BAR_THICKNESS
+            draw.line([(x, y), (x, y + 4)], fill="black")
+            draw.text((x, y + 6), text, fill="black", font=font, anchor="ma")
+
+    elif orientation == "vertical":
+        label_width = max(draw_width(font, text) for text in tick_labels)
+        width = max(BAR_THICKNESS + label_width + 16, draw_width(font, label)) + 8
+        height = BAR_LENGTH + text_height + PADDING
+        image = Image.new("RGB", (width, height), "white")
+        draw = ImageDraw.Draw(image)
+        draw.text((4, 2), label, fill="black", font=font)
+
+        top = text_height + PADDING // 2
+        # Highest values at the top, as on the map colour bars
+        strip = np.broadcast_to(bar[::-1, None, :], (BAR_LENGTH, BAR_THICKNESS, 3))
+        image.paste(Image.fromarray(np.ascontiguousarray(strip)), (4, top))
+        for tick, text in zip(ticks, tick_labels):
+            y = top + (vmax - tick) / (vmax - vmin or 1) * (BAR_LENGTH - 1)
+            x = 4 + BAR_THICKNESS
+            draw.line([(x, y), (x + 4, y)], fill="black")
+            draw.text((x + 8, y), text, fill="black", font=font, anchor="lm")
+
+    else:
+        raise ValueError(f"Unknown legend orientation: {orientation}")
+
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def draw_width(font, text):
+    left, _, right, _ = font.getbbox(text)
+    return right - left
+
+
+def legend_path(colors, vmin, vmax, orientation, label):
+    key = json.dumps([list(colors), vmin, vmax, orientation, label])
+    name = hashlib.sha1(key.encode()).hexdigest()
+    return os.path.join(LEGEND_ROOT, f"{name}.png")
+
+
+# PNG bytes of a legend. Hits are served from memory, then from the disk
+# cache shared by all processes; only a miss draws anything.
+@functools.lru_cache(maxsize=256)
+def legend_png(colors, vmin, vmax, orientation="horizontal", label=""):
+    path = legend_path(colors, vmin, vmax, orientation, label)
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            return f.read()
+
+    png = render_legend(colors, vmin, vmax, orientation, label)
+    os.makedirs(LEGEND_ROOT, exist_ok=True)
+    partial = path.replace(".png", f".{os.getpid()}.partial.png")
+    with open(partial, "wb") as f:
+        f.write(png)
+    os.replace(partial, path)
+    return png
+
+
+# Write a legend to output_path; colors may be any sequence of hex colours
+def save_legend(
+    output_path, vmin, vmax, label="", orientation="horizontal", colors=palette
+):
+    png = legend_png(tuple(colors), vmin, vmax, orientation, label)
+    with open(output_path, "wb") as f:
+        f.write(png)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (4, 5, 6):
+        print(
+            "Usage: python legend.py <min> <max> <output_path> [label] [horizontal|vertical]"
+        )
+        sys.exit(1)
+
+    vmin, vmax, output_path = float(sys.argv[1]), float(sys.argv[2]), sys.argv[3]
+    label = sys.argv[4] if len(sys.argv) > 4 else ""
+    orientation = sys.argv[5] if len(sys.argv) > 5 else "horizontal"
+    save_legend(output_path, vmin, vmax, label, orientation)
+    print(f"Legend saved to {output_path}")
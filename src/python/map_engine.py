@@ -0,0 +1,202 @@
+import numpy as np
+import matplotlib
+
+# Plots are only ever written to files, so no GUI backend is set up
+matplotlib.use("Agg")
+import matplotlib.ticker as ticker
+import matplotlib.pyplot as plt
+from matplotlib.colors import LinearSegmentedColormap
+from datetime import datetime, timedelta
+
+from cities import get_bounding_box
+from color_scales import get_scale_name, scale_range
+from deadline import check_deadline
+from ee_raster import grid_extent
+from raster_cube import window_mean
+from time_series_engine import dry_air_column, qa_collection
+from zonal_stats import city_zonal_stats
+
+# Dataset and column band drawn on each pollutant's map
+MAP_POLLUTANTS = {
+    "CO": {
+        "collection": "COPERNICUS/S5P/OFFL/L3_CO",
+        "band": "CO_column_number_density",
+    },
+    "NO2": {
+        "collection": "COPERNICUS/S5P/OFFL/L3_NO2",
+        "band": "NO2_column_number_density",
+    },
+    "SO2": {
+        "collection": "COPERNICUS/S5P/OFFL/L3_SO2",
+        "band": "SO2_column_number_density",
+    },
+    "HCHO": {
+        "collection": "COPERNICUS/S5P/OFFL/L3_HCHO",
+        "band": "tropospheric_HCHO_column_number_density",
+    },
+}
+
+# Define a color palette based on concentration levels
+palette = [
+    "#5e4fa2",
+    "#378dba",
+    "#73c7a4",
+    "#bee5a0",
+    "#f0f9a8",
+    "#feeda1",
+    "#fdbe6e",
+    "#f57948",
+    "#d8424d",
+    "#9e0142",
+]
+
+
+# Dry-air mole fraction (ppb) of the pollutant averaged over the window
+def build_map_image(pollutant, geometry, start_date, end_date):
+    spec = MAP_POLLUTANTS[pollutant]
+    collection = qa_collection(
+        spec["collection"], spec["band"], geometry, start_date, end_date
+    )
+    TC_dry_air, _ = dry_air_column(geometry, start_date, end_date)
+
+    return (
+        collection.mean()
+        .divide(TC_dry_air)
+        .multiply(1e9)
+        .rename(f"X{pollutant}_ppb")
+        .clip(geometry)
+    )
+
+
+# Map values for a window, composed locally from the daily raster cube; only
+# days not in the cube yet are fetched from Earth Engine
+def fetch_map_raster(pollutant, city, start_date, end_date):
+    spec = MAP_POLLUTANTS[pollutant]
+    values, _ = window_mean(
+        spec["collection"], spec["band"], city, start_date, end_date
+    )
+    return values
+
+
+def map_title(pollutant, city, start_date, end_date):
+    # Assuming start_date and end_date are in the format 'YYYY-MM-DD'
+    start_date = datetime.strptime(start_date, "%Y-%m-%d")
+    end_date = datetime.strptime(end_date, "%Y-%m-%d")
+
+    # Check if the difference is less than 3 days (a single-day request)
+    if (end_date - start_date).days < 3:
+        start_date += timedelta(days=1)
+        return f"{pollutant} Concentration around {city} from {start_date.strftime('%Y-%m-%d')}"
+    return (
+        f"{pollutant} Concentration around {city} from "
+        f"{start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}"
+    )
+
+
+def render_map(
+    values,
+    extent,
+    vmin,
+    vmax,
+    title,
+    label,
+    plot_file_path,
+    colors=palette,
+    dpi=300,
+):
+    # Create a custom colormap
+    custom_cmap = LinearSegmentedColormap.from_list("custom_cmap", colors)
+
+    # Plot the values using Matplotlib with the custom colormap
+    fig, ax = plt.subplots()
+    ax.imshow(
+        values, extent=extent, origin="upper", cmap=custom_cmap, vmin=vmin, vmax=vmax
+    )
+    ax.set_title(title)
+    ax.set_xlabel("Longitude (E°)")
+    ax.set_ylabel("Latitude (N°)")
+
+    # Define the number of ticks
+    num_ticks = 5
+
+    # Calculate the tick positions
+    interval = (vmax - vmin) / (num_ticks - 1)
+    tick_positions = [vmin + i * interval for i in range(num_ticks)]
+
+    # Create a dummy ScalarMappable to use with the colorbar
+    norm = plt.Normalize(vmin=vmin, vmax=vmax)
+    sm = plt.cm.ScalarMappable(cmap=custom_cmap, norm=norm)
+    sm.set_array([])
+
+    # Create the colorbar
+    cbar = plt.colorbar(sm, ax=ax, orientation="vertical")
+    cbar.set_label(label)
+
+    # Set ticker to manually specify tick positions
+    tick_locator = ticker.FixedLocator(tick_positions)
+    cbar.locator = tick_locator
+    cbar.update_ticks()
+
+    # Set custom tick labels
+    tick_labels = ["{:.3f}".format(value) for value in tick_positions]
+    cbar.ax.set_yticklabels(tick_labels, ha="left")
+
+    plt.savefig(plot_file_path, bbox_inches="tight", dpi=dpi)
+    plt.close()
+
+
+# Raster and colour range for a map; raises when the window has no data.
+# The "auto" scale is the window's own min/max, returned with the rest of the
+# zonal statistics; a named scale is read from the precomputed tables instead
+def prepare_map(pollutant, city, start_date, end_date, scale="auto"):
+    values = fetch_map_raster(pollutant, city, start_date, end_date)
+    if not np.isfinite(values).any():
+        raise ValueError(
+            f"No {pollutant} data around {city} from {start_date} to {end_date}"
+        )
+
+    if scale != "auto":
+        vmin, vmax = scale_range(pollutant, city, scale, start_date, end_date)
+        return values, {"scale": scale, "min": vmin, "max": vmax}
+
+    # Calculate the minimum and maximum values locally from the raster
+    stats = city_zonal_stats(values, city)
+    if stats["count"] == 0:
+        raise ValueError(
+            f"No {pollutant} data around {city} from {start_date} to {end_date}"
+        )
+    return values, stats
+
+
+def render_pollutant_map(
+    values, stats, pollutant, city, start_date, end_date, plot_file_path
+):
+    # Get min and max values and round them to three decimal places
+    vmin = round(stats["min"], 3)
+    vmax = round(stats["max"], 3)
+
+    # Print the minimum and maximum values
+    print(f"Minimum {pollutant} value:", vmin)
+    print(f"Maximum {pollutant} value:", vmax)
+
+    render_map(
+        values,
+        grid_extent(get_bounding_box(city)),
+        vmin,
+        vmax,
+        map_title(pollutant, city, start_date, end_date),
+        f"{pollutant} Concentration (ppb)",
+        plot_file_path,
+    )
+    print(f"Plot saved successfully to {plot_file_path}.")
+
+
+def pollutant_map(pollutant, city, start_date, end_date, plot_file_path, scale=None):
+    values, stats = prepare_map(
+        pollutant, city, start_date, end_date, scale or get_scale_name()
+    )
+    check_deadline("rendering")
+    render_pollutant_map(
+        values, stats, pollutant, city, start_date, end_date, plot_file_path
+    )
+    return stats
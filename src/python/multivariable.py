@@ -0,0 +1,269 @@
+import ee
+import itertools
+import json
+import sys
+
+import numpy as np
+
+from cities import get_city_geometry
+from deadline import check_deadline
+from series import optional
+from time_series_engine import (
+    BATCH_SIZE,
+    MIN_VALID_PIXELS,
+    POLLUTANTS,
+    dry_air_column,
+    evaluate,
+    filter_end,
+    generate_periods,
+    qa_collection,
+)
+
+ERA5_COLLECTION = "ECMWF/ERA5_LAND/DAILY_AGGR"
+VIIRS_COLLECTION = "NOAA/VIIRS/001/VNP46A2"
+
+
+def wind_speed(image):
+    u = image.select("u_component_of_wind_10m")
+    v = image.select("v_component_of_wind_10m")
+    return u.pow(2).add(v.pow(2)).sqrt()
+
+
+def surface_pressure_hpa(image):
+    return image.select("surface_pressure").divide(100)
+
+
+# Non-pollutant variables: the band, or a function deriving it from each image
+# before the period mean
+AUXILIARY_VARIABLES = {
+    "wind_speed": {"collection": ERA5_COLLECTION, "derive": wind_speed},
+    "u_wind": {"collection": ERA5_COLLECTION, "band": "u_component_of_wind_10m"},
+    "v_wind": {"collection": ERA5_COLLECTION, "band": "v_component_of_wind_10m"},
+    "surface_pressure": {
+        "collection": ERA5_COLLECTION,
+        "derive": surface_pressure_hpa,
+    },
+    "NTL": {
+        "collection": VIIRS_COLLECTION,
+        "band": "Gap_Filled_DNB_BRDF_Corrected_NTL",
+    },
+}
+
+UNITS = {
+    **{pollutant: "ppb" for pollutant in POLLUTANTS},
+    "wind_speed": "m/s",
+    "u_wind": "m/s",
+    "v_wind": "m/s",
+    "surface_pressure": "hPa",
+    "NTL": "nW/cm2/sr",
+}
+
+VARIABLES = list(UNITS)
+
+# All bands are reduced together, so at one scale: the S5P L3 grid. ERA5 is
+# coarser and repeats across pixels; VIIRS is sampled at the grid spacing.
+REDUCTION_SCALE = 1113.2
+
+# Correlations over fewer valid periods are reported as null
+MIN_CORRELATION_PERIODS = 3
+
+
+# A fully masked band, standing in for a variable without data in a period
+def missing_band(variable):
+    return ee.Image.constant(0).toFloat().updateMask(0).rename(variable)
+
+
+# Period mean of one variable as a single band named after it; empty
+# collections give a masked band inside the graph, as in build_period_value
+def variable_image(variable, geometry, start_date, end_date):
+    if variable in POLLUTANTS:
+        spec = POLLUTANTS[variable]
+        collection = qa_collection(
+            spec["collection"], spec["band"], geometry, start_date, end_date
+        )
+        sizes = [collection.size()]
+        image = collection.mean()
+        if spec["dry_air"]:
+            TC_dry_air, dry_air_sizes = dry_air_column(geometry, start_date, end_date)
+            image = image.divide(TC_dry_air)
+            sizes += dry_air_sizes
+        image = image.multiply(1e9)
+    else:
+        spec = AUXILIARY_VARIABLES[variable]
+        collection = (
+            ee.ImageCollection(spec["collection"])
+            .filterBounds(geometry)
+            .filterDate(start_date, end_date)
+        )
+        sizes = [collection.size()]
+        if "derive" in spec:
+            image = collection.map(spec["derive"]).mean()
+        else:
+            image = collection.select(spec["band"]).mean()
+
+    non_empty = ee.Number(ee.List(sizes).reduce(ee.Reducer.min())).gt(0)
+    return ee.Image(
+        ee.Algorithms.If(
+            non_empty, image.toFloat().rename(variable), missing_band(variable)
+        )
+    )
+
+
+# Every variable stacked into one image and reduced in a single reduceRegion;
+# each band keeps its own mask, so means and counts stay per variable
+def build_period_stats(variables, geometry, start_date, end_date):
+    image = ee.Image.cat(
+        [variable_image(v, geometry, start_date, end_date) for v in variables]
+    )
+    reducer = ee.Reducer.mean().combine(ee.Reducer.count(), sharedInputs=True)
+    return image.reduceRegion(reducer=reducer, geometry=geometry, scale=REDUCTION_SCALE)
+
+
+# Per-period values of several variables aligned on the same periods, as
+# (variables, periods) arrays. Missing values are NaN.
+class VariableTable:
+    def __init__(self, variables, periods, start, end, values, counts):
+        self.variables = variables
+        self.periods = periods
+        self.start = start
+        self.end = end
+        self.values = values
+        self.counts = counts
+
+    def __len__(self):
+        return len(self.periods)
+
+    # Values that are present and averaged over enough pixels
+    def valid(self):
+        return ~np.isnan(self.values) & (self.counts >= MIN_VALID_PIXELS)
+
+    # Pearson correlation of each pair of variables over the periods where
+    # both are valid, with the number of those periods
+    def correlation(self):
+        n = len(self.variables)
+        valid = self.valid()
+        values = self.values.astype(np.float64)
+        matrix = np.full((n, n), np.nan)
+        periods = np.zeros((n, n), dtype=np.int32)
+        for i, j in itertools.combinations_with_replacement(range(n), 2):
+            both = valid[i] & valid[j]
+            periods[i, j] = periods[j, i] = both.sum()
+            if both.sum() < MIN_CORRELATION_PERIODS:
+                continue
+            x, y = values[i, both], values[j, both]
+            if x.std() == 0 or y.std() == 0:
+                continue
+            matrix[i, j] = matrix[j, i] = np.corrcoef(x, y)[0, 1]
+        return matrix, periods
+
+    # One row per period with a column per variable, null where not valid
+    def to_records(self):
+        valid = self.valid()
+        return [
+            {
+                "period": self.periods[p],
+                "start": str(self.start[p]),
+                "end": str(self.end[p]),
+                **{
+                    v: optional(self.values[i, p], 3) if valid[i, p] else None
+                    for i, v in enumerate(self.variables)
+                },
+                "counts": {
+                    v: int(self.counts[i, p]) for i, v in enumerate(self.variables)
+                },
+            }
+            for p in range(len(self))
+        ]
+
+
+# All variables for every period, one evaluation per batch of periods
+# instead of one job per variable
+def variable_table(
+    variables,
+    city,
+    start_date,
+    end_date,
+    interval=None,
+    batch_size=BATCH_SIZE,
+    deadline=None,
+):
+    unknown = [v for v in variables if v not in UNITS]
+    if unknown:
+        raise ValueError(f"Unknown variables: {', '.join(unknown)}")
+
+    geometry = get_city_geometry(city)
+    periods = list(generate_periods(start_date, end_date, interval))
+    values = np.full((len(variables), len(periods)), np.nan, dtype=np.float32)
+    counts = np.zeros((len(variables), len(periods)), dtype=np.int32)
+
+    for offset in range(0, len(periods), batch_size):
+        batch = periods[offset : offset + batch_size]
+        check_deadline(f"period {batch[0][1]}", deadline)
+        results = evaluate(
+            ee.List(
+                [
+                    build_period_stats(
+                        variables, geometry, s.isoformat(), filter_end(e)
+                    )
+                    for _, s, e in batch
+                ]
+            )
+        )
+        for p, stats in enumerate(results, start=offset):
+            for i, v in enumerate(variables):
+                value = stats.get(f"{v}_mean")
+                if value is not None:
+                    values[i, p] = value
+                counts[i, p] = stats.get(f"{v}_count") or 0
+
+    return VariableTable(
+        variables,
+        [name for name, _, _ in periods],
+        np.array([s for _, s, _ in periods], dtype="datetime64[D]"),
+        np.array([e for _, _, e in periods], dtype="datetime64[D]"),
+        values,
+        counts,
+    )
+
+
+# Aligned table and correlation matrix for several variables over one city
+def correlation_report(variables, city, start_date, end_date, interval=None):
+    table = variable_table(variables, city, start_date, end_date, interval)
+    matrix, periods = table.correlation()
+    return {
+        "city": city,
+        "startDate": start_date,
+        "endDate": end_date,
+        "variables": variables,
+        "units": {v: UNITS[v] for v in variables},
+        "table": table.to_records(),
+        "correlation": {
+            "method": "pearson",
+            "matrix": [[optional(r, 3) for r in row] for row in matrix],
+            "periods": periods.tolist(),
+        },
+    }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (6, 7):
+        print(
+            "Usage: python multivariable.py <variables> <city> <start_date> <end_date> [interval] <output_path>"
+        )
+        print(f"Variables are comma-separated, from: {', '.join(VARIABLES)}")
+        sys.exit(1)
+
+    # Initialize the Earth Engine API
+    ee.Authenticate()
+    ee.Initialize(project="ee-narravarsha1")
+
+    variables, city, start_date, end_date = sys.argv[1:5]
+    interval = sys.argv[5] if len(sys.argv) == 7 else None
+    output_path = sys.argv[-1]
+
+    report = correlation_report(
+        variables.split(","), city, start_date, end_date, interval
+    )
+    with open(output_path, "w") as f:
+        json.dump(report, f)
+    print(f"Correlation report saved to {output_path}")
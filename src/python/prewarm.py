@@ -0,0 +1,293 @@
+import ee
+import calendar
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+from artifact_store import claim_artifact, finish_job, get_artifact_store, is_fresh
+from cities import city_coords
+from color_scales import build_scale_table, is_current, load_scale_table
+from map_engine import MAP_POLLUTANTS
+from result_cache import CACHE_ROOT, artifact_key, is_historical, ntl_date_range
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+STATE_FILE = os.path.join(CACHE_ROOT, "prewarm_state.json")
+
+POLLUTANTS = ["CO", "NO2", "SO2", "HCHO"]
+
+# Collections whose newest image decides whether a prewarm run is needed
+DATASETS = {
+    "CO": "COPERNICUS/S5P/OFFL/L3_CO",
+    "NO2": "COPERNICUS/S5P/OFFL/L3_NO2",
+    "SO2": "COPERNICUS/S5P/OFFL/L3_SO2",
+    "HCHO": "COPERNICUS/S5P/OFFL/L3_HCHO",
+    "NTL": "NOAA/VIIRS/001/VNP46A2",
+}
+
+# Local hours considered off-peak for the dashboard
+OFF_PEAK_HOURS = range(1, 6)
+
+# How often the daemon wakes up to look for new data
+CHECK_INTERVAL_SECONDS = 60 * 60
+
+# Rate limiting: minimum spacing between job launches, and per-job time budget
+MIN_SECONDS_BETWEEN_JOBS = 10
+JOB_TIMEOUT_SECONDS = 600
+
+logger = logging.getLogger("prewarm")
+
+
+# Month window in the same form the Month option in App.js sends (February is always 28 days)
+def app_month_window(year, month):
+    last_day = 28 if month == 2 else calendar.monthrange(year, month)[1]
+    return f"{year}-{month:02d}-01", f"{year}-{month:02d}-{last_day}"
+
+
+def recent_months(today, count):
+    year, month = today.year, today.month
+    for _ in range(count):
+        yield year, month
+        year, month = (year - 1, 12) if month == 1 else (year, month - 1)
+
+
+def build_targets(today):
+    years = [today.year, today.year - 1]
+    targets = []
+
+    for city in city_coords:
+        for pollutant in POLLUTANTS:
+            # Current month plus the previous 12 months of maps
+            for year, month in recent_months(today, 13):
+                start_date, end_date = app_month_window(year, month)
+                targets.append(
+                    {
+                        "kind": "map",
+                        "script": f"{pollutant}_Map.py",
+                        "args": [city, start_date, end_date],
+                        "key": artifact_key(
+                            "map", pollutant, city, start_date, end_date, "png"
+                        ),
+                        "end_date": end_date,
+                    }
+                )
+
+            # Yearly time series, as requested by the time-series form
+            for year in years:
+                start_date, end_date = f"{year}-01-01", f"{year}-12-31"
+                targets.append(
+                    {
+                        "kind": "timeseries",
+                        "script": f"{pollutant}_Time_Series.py",
+                        "args": [city, start_date, end_date],
+                        "key": artifact_key(
+                            "timeseries", pollutant, city, start_date, end_date, "html"
+                        ),
+                        "end_date": end_date,
+                    }
+                )
+
+        for year in years:
+            for half_year in ["jan-jun", "jan-dec"]:
+                start_date, end_date = ntl_date_range(year, half_year)
+                targets.append(
+                    {
+                        "kind": "ntl",
+                        "script": "NTL.py",
+                        "args": [city, str(year), half_year],
+                        "key": artifact_key(
+                            "ntl", "NTL", city, start_date, end_date, "png"
+                        ),
+                        "end_date": end_date,
+                    }
+                )
+
+    return targets
+
+
+# Newest image date per dataset, resolved with a single getInfo() call
+def latest_data_dates(now=None):
+    now = now or datetime.utcnow()
+    since = ee.Date((now - timedelta(days=60)).strftime("%Y-%m-%d"))
+    until = ee.Date((now + timedelta(days=1)).strftime("%Y-%m-%d"))
+
+    latest = ee.Dictionary(
+        {
+            name: ee.ImageCollection(collection_id)
+            .filterDate(since, until)
+            .aggregate_max("system:time_start")
+            for name, collection_id in DATASETS.items()
+        }
+    ).getInfo()
+
+    return {
+        name: (
+            datetime.utcfromtimestamp(millis / 1000).strftime("%Y-%m-%d")
+            if millis
+            else None
+        )
+        for name, millis in latest.items()
+    }
+
+
+def is_off_peak():
+    return datetime.now().hour in OFF_PEAK_HOURS
+
+
+def load_state():
+    if not os.path.exists(STATE_FILE):
+        return {}
+    with open(STATE_FILE) as f:
+        return json.load(f)
+
+
+def save_state(state):
+    os.makedirs(os.path.dirname(STATE_FILE), exist_ok=True)
+    with open(STATE_FILE, "w") as f:
+        json.dump(state, f, indent=2)
+
+
+def run_job(store, target):
+    # Skip artifacts another node or worker is already producing or has
+    # just finished
+    claim = claim_artifact(
+        store, target["key"], target["end_date"], JOB_TIMEOUT_SECONDS
+    )
+    if claim != "claimed":
+        return False
+
+    output_path = store.scratch_path(target["key"])
+    env = dict(os.environ, JOB_DEADLINE=str(time.time() + JOB_TIMEOUT_SECONDS))
+
+    try:
+        subprocess.run(
+            [sys.executable, target["script"], *target["args"], output_path],
+            cwd=SCRIPT_DIR,
+            env=env,
+            timeout=JOB_TIMEOUT_SECONDS,
+            check=True,
+            capture_output=True,
+        )
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as error:
+        stderr = getattr(error, "stderr", None) or b""
+        logger.warning(
+            "Failed %s %s: %s",
+            target["script"],
+            " ".join(target["args"]),
+            stderr.decode(errors="replace").strip().splitlines()[-1:],
+        )
+        finish_job(store, target["key"], "failed")
+        return False
+
+    store.put_file(target["key"], output_path)
+    finish_job(store, target["key"], "done")
+    return True
+
+
+def log_coverage(store, targets, latest_data):
+    for kind in ["map", "timeseries", "ntl"]:
+        kind_targets = [t for t in targets if t["kind"] == kind]
+        fresh = sum(1 for t in kind_targets if is_fresh(store, t["key"], t["end_date"]))
+        logger.info(
+            "Coverage %s: %d/%d (%.1f%%)",
+            kind,
+            fresh,
+            len(kind_targets),
+            100.0 * fresh / len(kind_targets) if kind_targets else 100.0,
+        )
+
+    # Only windows that can still change have a meaningful age
+    now = time.time()
+    ages = [
+        now - stats["mtime"]
+        for stats in (
+            store.stat(t["key"]) for t in targets if not is_historical(t["end_date"])
+        )
+        if stats is not None
+    ]
+    if ages:
+        logger.info("Oldest recent artifact: %.1f hours old", max(ages) / 3600)
+    logger.info("Latest data: %s", latest_data)
+
+
+# Colour scale tables only change when the reference years move on, once a year
+def refresh_color_scales(force=False, off_peak_only=False):
+    for pollutant in POLLUTANTS:
+        if off_peak_only and not is_off_peak():
+            return False
+        if force or not is_current(load_scale_table(pollutant)):
+            logger.info("Building %s colour scales", pollutant)
+            spec = MAP_POLLUTANTS[pollutant]
+            build_scale_table(pollutant, spec["collection"], spec["band"])
+    return True
+
+
+# With off_peak_only the run stops once the off-peak hours end; whatever is
+# left is still not fresh, and the run is not recorded, so the next night
+# picks it up
+def run_prewarm(force=False, off_peak_only=False):
+    store = get_artifact_store()
+    latest_data = latest_data_dates()
+    state = load_state()
+    targets = build_targets(date.today())
+
+    if not force and latest_data == state.get("latest_data"):
+        logger.info("No new Sentinel-5P/VIIRS data since the last run")
+        log_coverage(store, targets, latest_data)
+        return
+
+    if not refresh_color_scales(off_peak_only=off_peak_only):
+        logger.info("Off-peak hours ended while building colour scales")
+        return
+
+    pending = [t for t in targets if not is_fresh(store, t["key"], t["end_date"])]
+    logger.info("Prewarming %d of %d artifacts", len(pending), len(targets))
+
+    completed = 0
+    last_launch = 0.0
+    for i, target in enumerate(pending):
+        wait = MIN_SECONDS_BETWEEN_JOBS - (time.monotonic() - last_launch)
+        if wait > 0:
+            time.sleep(wait)
+        if off_peak_only and not is_off_peak():
+            logger.info(
+                "Off-peak hours ended; %d artifacts left for the next run",
+                len(pending) - i,
+            )
+            return
+        last_launch = time.monotonic()
+
+        if run_job(store, target):
+            completed += 1
+
+    logger.info("Prewarmed %d/%d artifacts", completed, len(pending))
+    state.update({"latest_data": latest_data, "last_run": datetime.now().isoformat()})
+    save_state(state)
+    log_coverage(store, targets, latest_data)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    # Initialize the Earth Engine API
+    ee.Authenticate()
+    ee.Initialize(project="ee-narravarsha1")
+
+    force = "--force" in sys.argv
+
+    if "--scales" in sys.argv:
+        refresh_color_scales(force)
+        sys.exit(0)
+
+    if "--daemon" not in sys.argv:
+        run_prewarm(force)
+        sys.exit(0)
+
+    while True:
+        if is_off_peak():
+            run_prewarm(force, off_peak_only=True)
+            force = False
+        time.sleep(CHECK_INTERVAL_SECONDS)
@@ -0,0 +1,342 @@
+import contextlib
+import ee
+import fcntl
+import os
+import time
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from cities import buffer_radius, get_bounding_box, get_city_coords, get_city_geometry
+from deadline import check_deadline
+from ee_raster import fetch_raster
+from result_cache import CACHE_ROOT, is_historical
+from time_series_engine import (
+    CLOUD_MASKED_COLLECTIONS,
+    MAX_CLOUD_FRACTION,
+    dry_air_column,
+    qa_collection,
+)
+from zonal_stats import buffer_mask
+
+# Daily dry-air mole fractions per city, one file set per year holding the
+# per-day sums and observation counts of the days that had data
+CUBE_ROOT = os.path.join(CACHE_ROOT, "cubes")
+
+# Cube pixels over the 100 km bounding box, close to the ~1.1 km S5P L3 grid
+CUBE_DIMENSIONS = 128
+
+# Days stacked into one computePixels request (three bands per day)
+DAYS_PER_REQUEST = 31
+
+# Total disk space the cubes may use before the least recently read years go
+CUBE_BUDGET_BYTES = 4 * 1024**3
+
+# Written in this order and removed in reverse, so "days" (the filled mask)
+# only exists while the other arrays do
+CUBE_ARRAYS = ["index", "sum", "count", "days"]
+
+
+# The cloud threshold is part of the name so unmasked days are not reused,
+# as for the map rasters
+def cube_name(collection_id, band):
+    if collection_id in CLOUD_MASKED_COLLECTIONS:
+        return f"{band}_cf{MAX_CLOUD_FRACTION:g}"
+    return band
+
+
+def cube_dir(name, city):
+    return os.path.join(CUBE_ROOT, name, city)
+
+
+def cube_path(name, city, year, array):
+    return os.path.join(cube_dir(name, city), f"{year}.{array}.npy")
+
+
+def days_in_year(year):
+    return (date(year + 1, 1, 1) - date(year, 1, 1)).days
+
+
+def day_of_year(day):
+    return day.timetuple().tm_yday - 1
+
+
+# One year of the cube: "days" flags the days already fetched, and only days
+# with observations get a row, ordered by their day of year in "index"
+def empty_year(year, dimensions=CUBE_DIMENSIONS):
+    return {
+        "index": np.zeros(0, dtype=np.int16),
+        "sum": np.zeros((0, dimensions, dimensions), dtype=np.float32),
+        "count": np.zeros((0, dimensions, dimensions), dtype=np.uint8),
+        "days": np.zeros(days_in_year(year), dtype=bool),
+    }
+
+
+@contextlib.contextmanager
+def year_lock(name, city, year, mode=fcntl.LOCK_EX):
+    lock_path = os.path.join(cube_dir(name, city), f"{year}.lock")
+    os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+    with open(lock_path, "a") as lock:
+        fcntl.flock(lock, mode)
+        yield
+
+
+def load_year(name, city, year, mmap_mode="r"):
+    if not os.path.exists(cube_path(name, city, year, "days")):
+        return None
+    try:
+        return {
+            array: np.load(cube_path(name, city, year, array), mmap_mode=mmap_mode)
+            for array in CUBE_ARRAYS
+        }
+    except FileNotFoundError:
+        return None  # Evicted meanwhile
+
+
+def save_year(name, city, year, cube):
+    for array in CUBE_ARRAYS:
+        path = cube_path(name, city, year, array)
+        partial = path.replace(".npy", ".partial.npy")
+        np.save(partial, cube[array])
+        os.replace(partial, path)
+
+
+# Merge newly fetched days into a year, keeping rows ordered by day
+def add_days(cube, index, sums, counts):
+    cube["days"][index] = True
+    observed = counts.reshape(len(index), -1).any(axis=1)
+    merged = np.concatenate(
+        [cube["index"], np.asarray(index, dtype=np.int16)[observed]]
+    )
+    order = np.argsort(merged, kind="stable")
+    return {
+        "index": merged[order],
+        "sum": np.concatenate([cube["sum"], sums[observed]])[order],
+        "count": np.concatenate([cube["count"], counts[observed]])[order],
+        "days": cube["days"],
+    }
+
+
+# Sums and counts of the stored days a..b-1 of a year
+def year_totals(cube, a, b):
+    lo, hi = np.searchsorted(cube["index"], [a, b])
+    total = cube["sum"][lo:hi].sum(axis=0, dtype=np.float64)
+    count = cube["count"][lo:hi].sum(axis=0, dtype=np.int64)
+    return total, count
+
+
+# Reads mark a year as used by setting its access time, for the LRU below
+def touch_year(name, city, year):
+    path = cube_path(name, city, year, "days")
+    try:
+        os.utime(path, ns=(time.time_ns(), os.stat(path).st_mtime_ns))
+    except FileNotFoundError:
+        pass
+
+
+# Drop the least recently read years until the cubes fit their disk budget;
+# years being written (locked) are skipped
+def evict_cubes(budget_bytes=CUBE_BUDGET_BYTES):
+    years = []
+    for directory, _, files in os.walk(CUBE_ROOT):
+        for file in files:
+            if not file.endswith(".days.npy"):
+                continue
+            year = file.split(".")[0]
+            paths = [os.path.join(directory, f"{year}.{a}.npy") for a in CUBE_ARRAYS]
+            size = sum(os.path.getsize(p) for p in paths if os.path.exists(p))
+            years.append((os.stat(paths[-1]).st_atime, size, directory, year))
+
+    total = sum(size for _, size, _, _ in years)
+    for _, size, directory, year in sorted(years):
+        if total <= budget_bytes:
+            break
+        with open(os.path.join(directory, f"{year}.lock"), "a") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                continue
+            for array in reversed(CUBE_ARRAYS):
+                try:
+                    os.remove(os.path.join(directory, f"{year}.{array}.npy"))
+                except FileNotFoundError:
+                    pass
+        total -= size
+
+
+# Sum of the observed values, number of valid observations and whether the
+# day's collections had any images at all, for one day
+def build_day_image(collection_id, band, geometry, day, next_day, index):
+    collection = qa_collection(collection_id, band, geometry, day, next_day)
+    TC_dry_air, dry_air_sizes = dry_air_column(geometry, day, next_day)
+
+    ppb = collection.mean().divide(TC_dry_air).multiply(1e9)
+    count = collection.count().updateMask(ppb.mask()).unmask(0)
+    sizes = ee.List([collection.size()] + dry_air_sizes)
+    non_empty = ee.Number(sizes.reduce(ee.Reducer.min())).gt(0)
+    day_image = ee.Image.cat(
+        [ppb.multiply(count).unmask(0), count, ee.Image.constant(1)]
+    ).toFloat()
+
+    # Days without overpasses (or without ERA5 pressure yet) resolve in-graph
+    return ee.Image(
+        ee.Algorithms.If(non_empty, day_image, ee.Image.constant([0, 0, 0]).toFloat())
+    ).rename([f"sum_{index}", f"count_{index}", f"available_{index}"])
+
+
+# Per-day (sum, count) rasters for the given days, DAYS_PER_REQUEST at a
+# time, and whether each day's data was available yet
+def fetch_days(collection_id, band, city, days):
+    geometry = get_city_geometry(city)
+    bbox = get_bounding_box(city)
+    sums, counts, available = [], [], []
+
+    for i in range(0, len(days), DAYS_PER_REQUEST):
+        chunk = days[i : i + DAYS_PER_REQUEST]
+        check_deadline(f"cube days from {chunk[0]}")
+        stack = ee.Image.cat(
+            [
+                build_day_image(
+                    collection_id,
+                    band,
+                    geometry,
+                    day.isoformat(),
+                    (day + timedelta(days=1)).isoformat(),
+                    j,
+                )
+                for j, day in enumerate(chunk)
+            ]
+        )
+        bands, _ = fetch_raster(stack, bbox, CUBE_DIMENSIONS)
+        bands = np.nan_to_num(bands, nan=0.0)
+        sums.append(bands[0::3])
+        counts.append(bands[1::3])
+        available.append(bands[2::3].reshape(len(chunk), -1).max(axis=1) > 0)
+
+    return (
+        np.concatenate(sums).astype(np.float32),
+        np.rint(np.concatenate(counts)).astype(np.uint8),
+        np.concatenate(available),
+    )
+
+
+def window_days(start_date, end_date):
+    start = datetime.strptime(start_date, "%Y-%m-%d").date()
+    end = datetime.strptime(end_date, "%Y-%m-%d").date()
+
+    # Same convention as filterDate: the end date itself is excluded
+    return [start + timedelta(days=i) for i in range((end - start).days)]
+
+
+# Fetch the historical days of the window missing from the cube and store
+# them; recent days are fetched on every call and not stored. Days whose
+# collections were still empty (ERA5 lags S5P) are not marked as fetched, so
+# a later call picks them up once the data has arrived.
+def update_cube(collection_id, band, city, start_date, end_date):
+    name = cube_name(collection_id, band)
+    recent = {}
+    days = window_days(start_date, end_date)
+    stored_any = False
+
+    for year in sorted({day.year for day in days}):
+        year_days = [day for day in days if day.year == year]
+
+        with year_lock(name, city, year):
+            stored = load_year(name, city, year)
+            filled = stored["days"] if stored is not None else None
+            missing = [
+                day
+                for day in year_days
+                if filled is None or not filled[day_of_year(day)]
+            ]
+            historical = [d for d in missing if is_historical(d.isoformat())]
+            recent_days = [d for d in missing if not is_historical(d.isoformat())]
+
+            if historical:
+                sums, counts, available = fetch_days(
+                    collection_id, band, city, historical
+                )
+                cube = (
+                    {array: np.array(stored[array]) for array in stored}
+                    if stored is not None
+                    else empty_year(year)
+                )
+                index = [day_of_year(day) for day in historical]
+                keep = np.flatnonzero(available)
+                cube = add_days(
+                    cube, [index[i] for i in keep], sums[keep], counts[keep]
+                )
+                save_year(name, city, year, cube)
+                stored_any = True
+
+                # Not stored, but still part of this window
+                for i in np.flatnonzero(~available):
+                    recent[historical[i]] = (sums[i], counts[i])
+
+        if recent_days:
+            sums, counts, _ = fetch_days(collection_id, band, city, recent_days)
+            for day, day_sum, day_count in zip(recent_days, sums, counts):
+                recent[day] = (day_sum, day_count)
+
+    if stored_any:
+        evict_cubes()
+    return recent
+
+
+# Mean and observation count of every pixel over the days, composed locally
+# from the stored days and the recent days fetched by update_cube
+def compose_window(name, city, days, recent):
+    total = np.zeros((CUBE_DIMENSIONS, CUBE_DIMENSIONS), dtype=np.float64)
+    count = np.zeros((CUBE_DIMENSIONS, CUBE_DIMENSIONS), dtype=np.int64)
+    for year in sorted({day.year for day in days}):
+        year_days = [day for day in days if day.year == year]
+        # Shared lock, so the arrays opened belong to the same write
+        with year_lock(name, city, year, fcntl.LOCK_SH):
+            cube = load_year(name, city, year)
+        if cube is not None:
+            touch_year(name, city, year)
+            year_total, year_count = year_totals(
+                cube, day_of_year(year_days[0]), day_of_year(year_days[-1]) + 1
+            )
+            total += year_total
+            count += year_count
+
+    for day in days:
+        if day in recent:
+            day_sum, day_count = recent[day]
+            total += day_sum
+            count += day_count
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.where(count > 0, total / count, np.nan).astype(np.float32)
+
+    # Outside the 50 km buffer, as the clipped EE maps were
+    lat, long = get_city_coords(city)
+    bbox = get_bounding_box(city)
+    mean[~buffer_mask(bbox, mean.shape, lat, long, buffer_radius)] = np.nan
+    return mean, count
+
+
+def window_mean(collection_id, band, city, start_date, end_date):
+    recent = update_cube(collection_id, band, city, start_date, end_date)
+    return compose_window(
+        cube_name(collection_id, band),
+        city,
+        window_days(start_date, end_date),
+        recent,
+    )
+
+
+# Means for several windows ([start, end) date pairs) after a single update
+# covering all of them, as a (windows, height, width) stack
+def window_means(collection_id, band, city, windows):
+    start_date = min(start for start, _ in windows)
+    end_date = max(end for _, end in windows)
+    recent = update_cube(collection_id, band, city, start_date, end_date)
+
+    name = cube_name(collection_id, band)
+    means = [
+        compose_window(name, city, window_days(start, end), recent)[0]
+        for start, end in windows
+    ]
+    return np.stack(means)
@@ -0,0 +1,135 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+import numpy as np
+
+from result_cache import CACHE_ROOT
+
+# Fetched rasters are kept as .npy files and opened memory-mapped, so renders
+# and statistics read straight from the page cache without copying
+STORE_ROOT = os.path.join(CACHE_ROOT, "rasters")
+
+# Total disk space the store may use before the least recently used rasters go
+DISK_BUDGET_BYTES = 2 * 1024**3
+
+
+class RasterStore:
+    def __init__(self, root=STORE_ROOT, budget_bytes=DISK_BUDGET_BYTES):
+        self.root = root
+        self.budget_bytes = budget_bytes
+        os.makedirs(root, exist_ok=True)
+
+        # The index is shared by every script process, so it lives in SQLite
+        self.db = sqlite3.connect(os.path.join(root, "index.sqlite"), timeout=30)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS rasters (
+                key TEXT PRIMARY KEY,
+                dataset TEXT,
+                band TEXT,
+                window TEXT,
+                bbox TEXT,
+                scale REAL,
+                file TEXT,
+                bytes INTEGER,
+                created REAL,
+                last_access REAL
+            )
+            """)
+        self.db.commit()
+
+    # Rasters are identified by (dataset, band, window, bbox, scale); scale is
+    # the grid width in pixels for computePixels rasters
+    @staticmethod
+    def make_key(dataset, band, window, bbox, scale):
+        parts = [dataset, band, list(window), [round(v, 6) for v in bbox], scale]
+        return hashlib.sha1(json.dumps(parts).encode()).hexdigest()
+
+    def get(self, dataset, band, window, bbox, scale, max_age=None):
+        key = self.make_key(dataset, band, window, bbox, scale)
+        row = self.db.execute(
+            "SELECT file, created FROM rasters WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        file, created = row
+        path = os.path.join(self.root, file)
+        if not os.path.exists(path) or (
+            max_age is not None and time.time() - created > max_age
+        ):
+            return None
+
+        self.db.execute(
+            "UPDATE rasters SET last_access = ? WHERE key = ?", (time.time(), key)
+        )
+        self.db.commit()
+        return np.load(path, mmap_mode="r")
+
+    def put(self, dataset, band, window, bbox, scale, array):
+        key = self.make_key(dataset, band, window, bbox, scale)
+        file = f"{key}.npy"
+        path = os.path.join(self.root, file)
+
+        # Write then rename, so concurrent readers never map half a file
+        partial = os.path.join(self.root, f"{key}.partial.npy")
+        np.save(partial, np.ascontiguousarray(array))
+        os.replace(partial, path)
+
+        now = time.time()
+        self.db.execute(
+            "INSERT OR REPLACE INTO rasters VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                key,
+                dataset,
+                band,
+                json.dumps(list(window)),
+                json.dumps(list(bbox)),
+                scale,
+                file,
+                os.path.getsize(path),
+                now,
+                now,
+            ),
+        )
+        self.db.commit()
+        self.evict()
+        return np.load(path, mmap_mode="r")
+
+    def total_bytes(self):
+        return self.db.execute(
+            "SELECT COALESCE(SUM(bytes), 0) FROM rasters"
+        ).fetchone()[0]
+
+    # Drop least recently used rasters until the store fits its disk budget
+    def evict(self):
+        total = self.total_bytes()
+        if total <= self.budget_bytes:
+            return
+
+        rows = self.db.execute(
+            "SELECT key, file, bytes FROM rasters ORDER BY last_access"
+        ).fetchall()
+        for key, file, size in rows:
+            if total <= self.budget_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.root, file))
+            except FileNotFoundError:
+                pass
+            self.db.execute("DELETE FROM rasters WHERE key = ?", (key,))
+            total -= size
+        self.db.commit()
+
+
+_store = None
+
+
+# Shared store for the current process
+def get_store():
+    global _store
+    if _store is None:
+        _store = RasterStore()
+    return _store
@@ -0,0 +1,40 @@
+import os
+from datetime import datetime, timedelta
+
+# Rendered artifacts live under src/plots/cache, next to the static plots.
+# The layout and freshness rules are mirrored in server.js.
+CACHE_ROOT = os.path.normpath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "plots", "cache")
+)
+
+# Windows ending more than this long ago will not receive new data
+DATA_LATENCY_DAYS = 7
+
+# Recent windows are recomputed once their artifact is older than this
+REFRESH_SECONDS = 6 * 60 * 60
+
+
+# Artifacts are addressed by the same relative key in every artifact store
+def artifact_key(kind, pollutant, city, start_date, end_date, ext):
+    return f"{kind}/{pollutant}/{city}/{start_date}_{end_date}.{ext}"
+
+
+# Scripts write here first and the caller renames, so readers never see half a file
+def partial_path(path):
+    base, ext = os.path.splitext(path)
+    return f"{base}.partial{ext}"
+
+
+def is_historical(end_date, now=None):
+    now = now or datetime.now()
+    end_date_dt = datetime.strptime(end_date, "%Y-%m-%d")
+    return now - end_date_dt > timedelta(days=DATA_LATENCY_DAYS)
+
+
+# Date range the NTL script derives from its year/half-year arguments
+def ntl_date_range(year, half_year):
+    if half_year == "jan-jun":
+        return f"{year}-01-01", f"{year}-06-30"
+    if half_year == "jan-dec":
+        return f"{year}-01-01", f"{year}-12-31"
+    return f"{year}-07-01", f"{year}-12-30"
@@ -0,0 +1,98 @@
+import numpy as np
+
+# Fields of a period result, in the order they are serialised
+FIELDS = ("period", "start", "end", "value", "count", "observations", "sparse")
+
+
+# One period of a time series; start and end are datetime.date objects
+class PeriodPoint:
+    __slots__ = FIELDS
+
+    def __init__(self, period, start, end, value, count, observations, sparse):
+        self.period = period
+        self.start = start
+        self.end = end
+        self.value = value
+        self.count = count
+        self.observations = observations
+        self.sparse = sparse
+
+    def __repr__(self):
+        return f"PeriodPoint({self.period!r}, value={self.value}, count={self.count})"
+
+    # JSON form streamed as NDJSON and embedded in reports
+    def to_dict(self):
+        return {
+            "period": self.period,
+            "start": self.start.isoformat(),
+            "end": self.end.isoformat(),
+            "value": self.value,
+            "count": self.count,
+            "observations": self.observations,
+            "sparse": self.sparse,
+        }
+
+
+def optional(value, digits):
+    return None if np.isnan(value) else round(float(value), digits)
+
+
+# Column-oriented series: one array per field instead of one object per period.
+# Missing values and observation counts are NaN.
+class Series:
+    def __init__(self, periods, start, end, value, count, observations, sparse):
+        self.periods = periods
+        self.start = start
+        self.end = end
+        self.value = value
+        self.count = count
+        self.observations = observations
+        self.sparse = sparse
+
+    @classmethod
+    def from_points(cls, points):
+        points = list(points)
+        return cls(
+            [p.period for p in points],
+            np.array([p.start for p in points], dtype="datetime64[D]"),
+            np.array([p.end for p in points], dtype="datetime64[D]"),
+            np.array(
+                [np.nan if p.value is None else p.value for p in points],
+                dtype=np.float32,
+            ),
+            np.array([p.count for p in points], dtype=np.int32),
+            np.array(
+                [np.nan if p.observations is None else p.observations for p in points],
+                dtype=np.float32,
+            ),
+            np.array([p.sparse for p in points], dtype=bool),
+        )
+
+    def __len__(self):
+        return len(self.periods)
+
+    def __getitem__(self, i):
+        return PeriodPoint(
+            self.periods[i],
+            self.start[i].item(),
+            self.end[i].item(),
+            optional(self.value[i], 3),
+            int(self.count[i]),
+            optional(self.observations[i], 2),
+            bool(self.sparse[i]),
+        )
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    # Periods with a value that is not sparsely observed
+    def valid(self):
+        return ~np.isnan(self.value) & ~self.sparse
+
+    # Values for plotting, with None where a period is missing or sparse
+    def plot_values(self):
+        valid = self.valid()
+        return [round(float(v), 3) if ok else None for v, ok in zip(self.value, valid)]
+
+    def to_records(self):
+        return [point.to_dict() for point in self]
@@ -0,0 +1,103 @@
+import os
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Rendering is CPU-bound matplotlib work, so the process pools consuming
+# shared rasters run one process per core
+RENDER_WORKERS = os.cpu_count() or 1
+
+
+# What a consumer process needs to map a shared raster; small enough that
+# pickling it costs nothing, unlike the array itself
+class RasterHandle:
+    __slots__ = ("name", "shape", "dtype")
+
+    def __init__(self, name, shape, dtype):
+        self.name = name
+        self.shape = shape
+        self.dtype = dtype
+
+    def __getstate__(self):
+        return self.name, self.shape, self.dtype
+
+    def __setstate__(self, state):
+        self.name, self.shape, self.dtype = state
+
+    def __repr__(self):
+        return f"RasterHandle({self.name!r}, {self.shape}, {self.dtype!r})"
+
+
+# Runs in the consumer process: func(values, *args) on a read-only view of the
+# shared raster. The view is only valid during the call, so func must not
+# return or keep it; a result computed from it is fine.
+def call_attached(func, handle, *args):
+    block = shared_memory.SharedMemory(name=handle.name)
+    try:
+        values = np.ndarray(handle.shape, dtype=handle.dtype, buffer=block.buf)
+        values.flags.writeable = False
+        return func(values, *args)
+    finally:
+        values = None
+        block.close()
+
+
+# Shared memory blocks owned by this process, each unlinked once the last
+# reference to it is released. Consumers in other processes only attach.
+class SharedRasters:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.blocks = {}
+        self.refs = {}
+
+    def __len__(self):
+        return len(self.blocks)
+
+    # Copy an array into a new block held by `refs` references
+    def share(self, values, refs=1):
+        values = np.ascontiguousarray(values)
+        block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        np.ndarray(values.shape, dtype=values.dtype, buffer=block.buf)[:] = values
+        handle = RasterHandle(block.name, values.shape, values.dtype.str)
+
+        with self.lock:
+            self.blocks[handle.name] = block
+            self.refs[handle.name] = refs
+        return handle
+
+    def retain(self, handle, count=1):
+        with self.lock:
+            self.refs[handle.name] += count
+
+    def release(self, handle):
+        with self.lock:
+            self.refs[handle.name] -= 1
+            if self.refs[handle.name] > 0:
+                return
+            del self.refs[handle.name]
+            block = self.blocks.pop(handle.name)
+        block.close()
+        block.unlink()
+
+    # Run func(values, *args) on an executor (see call_attached); the job holds
+    # its own reference until it finishes, even if the caller stops waiting
+    def submit(self, executor, func, handle, *args):
+        self.retain(handle)
+        try:
+            future = executor.submit(call_attached, func, handle, *args)
+        except BaseException:
+            self.release(handle)
+            raise
+        future.add_done_callback(lambda _: self.release(handle))
+        return future
+
+    # Unlink whatever is still shared, e.g. on shutdown
+    def close(self):
+        with self.lock:
+            blocks = list(self.blocks.values())
+            self.blocks.clear()
+            self.refs.clear()
+        for block in blocks:
+            block.close()
+            block.unlink()
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The modules are flat scripts in src/python, imported the way they import
+# each other
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
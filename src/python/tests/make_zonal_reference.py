@@ -0,0 +1,109 @@
+import json
+import math
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from cities import buffer_radius, get_bounding_box, get_city_coords
+
+# Same grid size as record_zonal_fixture.py
+FIXTURE_DIMENSIONS = 48
+
+QUANTILES = [2, 98]
+
+EARTH_RADIUS = 6371008.8  # m
+
+
+# A CO-like plume over noise, with scattered and clustered masked pixels
+def synthetic_raster(n, seed=7):
+    rng = random.Random(seed)
+    raster = []
+    for r in range(n):
+        row = []
+        for c in range(n):
+            value = (
+                90
+                + 25 * math.exp(-((r - 20) ** 2 + (c - 28) ** 2) / 200)
+                + rng.gauss(0, 3)
+            )
+            if rng.random() < 0.08 or (r > 38 and c < 6):
+                value = None
+            row.append(None if value is None else round(value, 4))
+        raster.append(row)
+    return raster
+
+
+def haversine(lat1, long1, lat2, long2):
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    a = (
+        math.sin((p2 - p1) / 2) ** 2
+        + math.cos(p1) * math.cos(p2) * math.sin(math.radians(long2 - long1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS * math.asin(math.sqrt(a))
+
+
+def linear_percentile(ordered, q):
+    k = q / 100 * (len(ordered) - 1)
+    lo, hi = math.floor(k), math.ceil(k)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+# Statistics of the pixels whose centres fall inside the city buffer,
+# computed pixel by pixel without numpy or zonal_stats.py: great-circle
+# distances, a mean weighted by pixel area (cos latitude) and linearly
+# interpolated percentiles
+def reference_stats(raster, city, quantiles):
+    n = len(raster)
+    min_long, min_lat, max_long, max_lat = get_bounding_box(city)
+    city_lat, city_long = get_city_coords(city)
+
+    values, weights = [], []
+    for r in range(n):
+        lat = max_lat - (r + 0.5) * (max_lat - min_lat) / n
+        for c in range(n):
+            long = min_long + (c + 0.5) * (max_long - min_long) / n
+            value = raster[r][c]
+            if value is None:
+                continue
+            if haversine(city_lat, city_long, lat, long) <= buffer_radius:
+                values.append(value)
+                weights.append(math.cos(math.radians(lat)))
+
+    ordered = sorted(values)
+    stats = {
+        "count": len(values),
+        "mean": sum(v * w for v, w in zip(values, weights)) / sum(weights),
+        "min": ordered[0],
+        "max": ordered[-1],
+    }
+    for q in quantiles:
+        stats[f"p{q}"] = linear_percentile(ordered, q)
+    return stats
+
+
+def make_fixture(city):
+    raster = synthetic_raster(FIXTURE_DIMENSIONS)
+    return {
+        "source": "reference",
+        "pollutant": "CO",
+        "city": city,
+        "startDate": "2023-11-01",
+        "endDate": "2023-11-30",
+        "radius": buffer_radius,
+        "quantiles": QUANTILES,
+        "raster": raster,
+        "reference": reference_stats(raster, city, QUANTILES),
+    }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python tests/make_zonal_reference.py <city> <output_path>")
+        sys.exit(1)
+
+    city, output_path = sys.argv[1:3]
+    fixture = make_fixture(city)
+    with open(output_path, "w") as f:
+        json.dump(fixture, f)
+    print(f"Reference fixture saved to {output_path}")
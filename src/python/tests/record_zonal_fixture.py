@@ -0,0 +1,79 @@
+import ee
+import json
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from cities import buffer_radius, get_bounding_box, get_city_geometry
+from ee_raster import fetch_raster, make_grid
+from map_engine import build_map_image
+
+# Kept small so the fixture stays a few tens of kilobytes
+FIXTURE_DIMENSIONS = 48
+
+QUANTILES = [2, 98]
+
+
+# Fetch a map raster on a small grid and reduce the same pixels over the city
+# buffer with reduceRegion, so test_zonal_stats can check the local statistics
+# against Earth Engine without network access. Save it as
+# tests/fixtures/zonal_stats_delhi_ee.json for the Delhi parity test.
+def record_fixture(pollutant, city, start_date, end_date):
+    bbox = get_bounding_box(city)
+    geometry = get_city_geometry(city)
+    image = build_map_image(pollutant, geometry, start_date, end_date).rename("ppb")
+
+    bands, _ = fetch_raster(image, bbox, FIXTURE_DIMENSIONS)
+    transform = make_grid(bbox, FIXTURE_DIMENSIONS)["affineTransform"]
+    reducer = (
+        ee.Reducer.minMax()
+        .combine(ee.Reducer.mean(), sharedInputs=True)
+        .combine(ee.Reducer.count(), sharedInputs=True)
+        .combine(ee.Reducer.percentile(QUANTILES), sharedInputs=True)
+    )
+    reduced = image.reduceRegion(
+        reducer=reducer,
+        geometry=geometry,
+        crs="EPSG:4326",
+        crsTransform=[
+            transform["scaleX"],
+            0,
+            transform["translateX"],
+            0,
+            transform["scaleY"],
+            transform["translateY"],
+        ],
+    ).getInfo()
+
+    raster = np.where(np.isfinite(bands[0]), bands[0], np.nan)
+    return {
+        "source": "reduceRegion",
+        "pollutant": pollutant,
+        "city": city,
+        "startDate": start_date,
+        "endDate": end_date,
+        "radius": buffer_radius,
+        "quantiles": QUANTILES,
+        "raster": [[None if np.isnan(v) else float(v) for v in row] for row in raster],
+        "reduceRegion": reduced,
+    }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 6:
+        print(
+            "Usage: python tests/record_zonal_fixture.py <pollutant> <city> <start_date> <end_date> <output_path>"
+        )
+        sys.exit(1)
+
+    # Initialize the Earth Engine API
+    ee.Authenticate()
+    ee.Initialize(project="ee-narravarsha1")
+
+    pollutant, city, start_date, end_date, output_path = sys.argv[1:6]
+    fixture = record_fixture(pollutant, city, start_date, end_date)
+    with open(output_path, "w") as f:
+        json.dump(fixture, f)
+    print(f"Fixture saved to {output_path}")
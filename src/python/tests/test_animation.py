@@ -0,0 +1,18 @@
+from animation import frame_periods, frame_windows
+
+
+def test_frames_stay_within_the_window():
+    assert frame_windows("2024-01-15", "2024-03-10") == [
+        ("2024-01-15", "2024-02-01"),
+        ("2024-02-01", "2024-03-01"),
+        ("2024-03-01", "2024-03-11"),
+    ]
+
+
+def test_whole_months_are_unchanged():
+    periods = frame_periods("2023-12-01", "2024-01-31")
+
+    assert [(str(start), str(end)) for start, end in periods] == [
+        ("2023-12-01", "2023-12-31"),
+        ("2024-01-01", "2024-01-31"),
+    ]
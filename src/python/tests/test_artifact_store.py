@@ -0,0 +1,70 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import artifact_store
+from artifact_store import LocalArtifactStore, claim_artifact, claim_job, finish_job
+
+
+def test_running_job_cannot_be_claimed(tmp_path):
+    store = LocalArtifactStore(str(tmp_path))
+
+    assert claim_job(store, "map/CO/Delhi/a.png", 60)
+    assert not claim_job(store, "map/CO/Delhi/a.png", 60)
+
+
+def test_expired_lease_is_taken_over(tmp_path):
+    store = LocalArtifactStore(str(tmp_path))
+
+    assert claim_job(store, "map/CO/Delhi/a.png", -1)
+    assert claim_job(store, "map/CO/Delhi/a.png", 60)
+
+
+def test_only_one_node_takes_over_a_finished_job(tmp_path):
+    store = LocalArtifactStore(str(tmp_path))
+    claim_job(store, "map/CO/Delhi/a.png", 60)
+    finish_job(store, "map/CO/Delhi/a.png", "done")
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        claims = list(
+            pool.map(lambda _: claim_job(store, "map/CO/Delhi/a.png", 60), range(32))
+        )
+
+    assert claims.count(True) == 1
+    # No lock or scratch files are left behind
+    assert [p.name for p in (tmp_path / "jobs" / "map" / "CO" / "Delhi").iterdir()] == [
+        "a.png.json"
+    ]
+
+
+def test_replace_if_rejects_a_stale_version(tmp_path):
+    store = LocalArtifactStore(str(tmp_path))
+    store.write_text("jobs/x.json", "1")
+    _, version = store.read_versioned("jobs/x.json")
+    store.write_text("jobs/x.json", "2")
+
+    assert not store.replace_if("jobs/x.json", "3", version)
+    assert store.read_text("jobs/x.json") == "2"
+
+
+def test_claim_artifact_skips_fresh_and_busy_artifacts(tmp_path):
+    store = LocalArtifactStore(str(tmp_path))
+    key = "map/CO/Delhi/2020-01-01_2020-01-31.png"
+
+    assert claim_artifact(store, key, "2020-01-31", 60) == "claimed"
+    assert claim_artifact(store, key, "2020-01-31", 60) == "busy"
+
+    finish_job(store, key, "failed")
+    store.write_text(key, "png")
+    assert claim_artifact(store, key, "2020-01-31", 60) == "fresh"
+    assert claim_artifact(store, key, "2020-01-31", 60, force=True) == "claimed"
+
+
+def test_claim_artifact_checks_freshness_after_the_claim(tmp_path, monkeypatch):
+    store = LocalArtifactStore(str(tmp_path))
+    key = "map/CO/Delhi/2020-01-01_2020-01-31.png"
+    # Another node stores the artifact between the first check and the claim
+    answers = iter([False, True])
+    monkeypatch.setattr(artifact_store, "is_fresh", lambda *args: next(answers))
+
+    assert claim_artifact(store, key, "2020-01-31", 60) == "fresh"
+    assert json.loads(store.read_text(f"jobs/{key}.json"))["state"] == "done"
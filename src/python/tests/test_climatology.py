@@ -0,0 +1,74 @@
+from datetime import date
+
+import pytest
+
+import climatology
+from climatology import anomalies, baseline_stats, update_climatology
+from series import PeriodPoint
+from time_series_engine import generate_periods
+
+# March values by year; 2021 is sparse and shares its value with 2020
+MARCH = {2019: 100.0, 2020: 110.0, 2021: 110.0, 2022: 130.0}
+
+
+class FakeSeries:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, pollutant, city, start_date, end_date, interval=None):
+        self.calls.append((start_date, end_date))
+        for name, start, end in generate_periods(start_date, end_date, interval):
+            value = MARCH.get(start.year) if start.month == 3 else 50.0
+            sparse = (start.year, start.month) == (2021, 3)
+            yield PeriodPoint(name, start, end, value, 6000, 3.0, sparse)
+
+
+@pytest.fixture
+def fake_series(tmp_path, monkeypatch):
+    fake = FakeSeries()
+    monkeypatch.setattr(climatology, "CLIMATOLOGY_ROOT", str(tmp_path))
+    monkeypatch.setattr(climatology, "iter_time_series", fake)
+    return fake
+
+
+def test_months_within_the_data_latency_are_not_stored(fake_series):
+    # On 2022-04-05 March is complete but its last days may still arrive
+    stored = update_climatology("CO", "Delhi", today=date(2022, 4, 5))
+
+    assert stored["last_month"] == "2022-02"
+    assert "2022-03" not in stored["months"]
+    assert fake_series.calls == [("2018-07-01", "2022-02-28")]
+
+    stored = update_climatology("CO", "Delhi", today=date(2022, 4, 9))
+
+    assert stored["last_month"] == "2022-03"
+    assert fake_series.calls[-1] == ("2022-03-01", "2022-03-31")
+    assert stored["baseline"]["3"]["n"] == 3
+
+
+def test_sparse_month_with_a_repeated_value_is_not_excluded(fake_series):
+    update_climatology("CO", "Delhi", today=date(2022, 5, 1))
+    entry = climatology.load_climatology("CO", "Delhi")["baseline"]["3"]
+
+    # 2021 never entered the baseline, so the 2020 value stays in it
+    assert baseline_stats(entry, "2021-03")["n"] == 3
+    assert baseline_stats(entry, "2020-03") == {
+        "n": 2,
+        "mean": 115.0,
+        "std": 15.0,
+        "p10": 103.0,
+        "p50": 115.0,
+        "p90": 127.0,
+    }
+
+
+def test_anomalies_fetch_unsettled_months(fake_series):
+    results = anomalies("CO", "Delhi", "2022-03-01", "2022-03-31", date(2022, 4, 5))
+
+    assert fake_series.calls[-1] == ("2022-03-01", "2022-03-31")
+    (march,) = results
+    # Not stored yet, so compared against every stored, well-observed March
+    assert march["baseline"]["n"] == 2
+    assert march["value"] == 130.0
+    assert march["anomaly"] == 25.0
+    assert march["z_score"] == 5.0
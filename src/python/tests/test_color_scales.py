@@ -0,0 +1,73 @@
+from datetime import date
+
+import numpy as np
+import pytest
+
+import color_scales
+from artifact_store import LocalArtifactStore
+from color_scales import (
+    build_scale_table,
+    is_current,
+    load_scale_table,
+    scale_range,
+    season_of,
+)
+
+TODAY = date(2024, 6, 1)
+
+
+# Monthly frames whose values are the month number plus a city offset
+def fake_window_means(collection_id, band, city, windows):
+    offset = {"Delhi": 100, "Chennai": 0}[city]
+    months = [int(start[5:7]) for start, _ in windows]
+    return np.stack(
+        [np.full((4, 4), month + offset, dtype=np.float32) for month in months]
+    )
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = LocalArtifactStore(str(tmp_path))
+    monkeypatch.setattr(color_scales, "get_artifact_store", lambda: store)
+    monkeypatch.setattr(color_scales, "window_means", fake_window_means)
+    return store
+
+
+def test_tables_are_shared_through_the_artifact_store(store):
+    build_scale_table("NO2", "collection", "band", ["Delhi", "Chennai"], TODAY)
+
+    assert store.stat("scales/NO2.json") is not None
+    table = load_scale_table("NO2")
+    assert table["years"] == [2021, 2022, 2023]
+    assert is_current(table, TODAY)
+    assert not is_current(table, date(2025, 1, 1))
+
+
+def test_scale_ranges_by_area_and_season(store):
+    build_scale_table("NO2", "collection", "band", ["Delhi", "Chennai"], TODAY)
+
+    assert scale_range("NO2", "Chennai", "city", "2023-01-01", "2023-12-31") == [
+        1.0,
+        12.0,
+    ]
+    # Mid-June is in the monsoon months
+    assert scale_range("NO2", "Delhi", "city-season", "2023-06-01", "2023-06-30") == [
+        106.0,
+        109.0,
+    ]
+    low, high = scale_range("NO2", "Delhi", "global", "2023-01-01", "2023-02-01")
+    assert low < 12 and high > 100
+
+
+def test_missing_table_is_an_error(store):
+    with pytest.raises(ValueError):
+        scale_range("SO2", "Delhi", "global", "2023-01-01", "2023-02-01")
+
+
+def test_every_month_has_a_season():
+    assert [season_of(m) for m in (1, 4, 7, 10)] == [
+        "winter",
+        "summer",
+        "monsoon",
+        "post-monsoon",
+    ]
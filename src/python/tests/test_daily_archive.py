@@ -0,0 +1,118 @@
+import fcntl
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import daily_archive
+from daily_archive import FIRST_DAY, DailyArchive, day_index, window_stats
+
+CITIES = ["Delhi", "Chennai"]
+
+
+def make_archive(tmp_path, days, values, city="Delhi"):
+    archive = DailyArchive("CO", root=str(tmp_path), cities=CITIES)
+    archive.add_days(city, np.array(days, dtype="datetime64[D]"), values)
+    return archive
+
+
+def test_window_matches_the_daily_values(tmp_path):
+    rng = np.random.default_rng(1)
+    days = [date(2020, 1, 1) + timedelta(days=i) for i in range(60)]
+    values = rng.normal(100, 10, size=60)
+    values[[3, 17]] = np.nan
+    archive = make_archive(tmp_path, days, values)
+
+    stats = archive.window("Delhi", "2020-01-05", "2020-02-10")
+    window = values[4:40]
+    window = window[np.isfinite(window)]
+    assert stats["days"] == window.size
+    assert stats["mean"] == pytest.approx(window.mean(), abs=1e-3)
+    assert stats["std"] == pytest.approx(window.std(), abs=1e-3)
+
+
+def test_days_added_twice_are_counted_once(tmp_path):
+    days = [date(2020, 1, 1), date(2020, 1, 2)]
+    archive = make_archive(tmp_path, days, [1.0, 3.0])
+    archive.add_days("Delhi", np.array(days, dtype="datetime64[D]"), [50.0, 50.0])
+
+    assert archive.window("Delhi", "2020-01-01", "2020-01-03") == {
+        "mean": 2.0,
+        "std": 1.0,
+        "days": 2,
+    }
+
+
+def test_missing_days_and_other_cities(tmp_path):
+    archive = make_archive(tmp_path, [date(2020, 1, 2)], [5.0])
+
+    assert archive.missing_days("Delhi", "2020-01-01", "2020-01-04") == [
+        date(2020, 1, 1),
+        date(2020, 1, 3),
+    ]
+    # Before the first archived day nothing is reported missing
+    assert archive.missing_days("Delhi", "2018-06-01", "2018-07-02") == [FIRST_DAY]
+    assert archive.window("Chennai", "2020-01-01", "2020-01-04")["days"] == 0
+
+
+def test_archive_survives_a_save(tmp_path):
+    archive = make_archive(tmp_path, [date(2021, 3, 1)], [7.5])
+    archive.save()
+    loaded = DailyArchive("CO", root=str(tmp_path), cities=CITIES)
+
+    assert loaded.window("Delhi", "2021-03-01", "2021-03-02")["mean"] == 7.5
+
+
+def test_vectorized_windows(tmp_path):
+    days = [date(2020, 1, 1) + timedelta(days=i) for i in range(10)]
+    archive = make_archive(tmp_path, days, np.arange(10.0))
+    start = day_index(["2020-01-01", "2020-01-06"])
+    mean, _, count = archive.window_stats(0, start, start + 5)
+
+    np.testing.assert_allclose(mean, [2.0, 7.0])
+    assert count.tolist() == [5, 5]
+
+
+class FakeSeries:
+    def __init__(self, value):
+        self.value = value
+        self.calls = 0
+
+    def __call__(self, pollutant, city, start_date, end_date, **kwargs):
+        self.calls += 1
+        days = np.arange(start_date, np.datetime64(end_date) + 1, dtype="datetime64[D]")
+        return SimpleNamespace(
+            start=days,
+            value=np.full(days.size, self.value),
+            count=np.full(days.size, 6000),
+        )
+
+
+@pytest.fixture
+def archive_root(tmp_path, monkeypatch):
+    monkeypatch.setattr(daily_archive, "ARCHIVE_ROOT", str(tmp_path))
+    return tmp_path
+
+
+def test_missing_days_are_fetched_once(archive_root, monkeypatch):
+    fake = FakeSeries(4.0)
+    monkeypatch.setattr(daily_archive, "time_series", fake)
+
+    stats = window_stats("CO", "Delhi", "2020-01-01", "2020-01-11")
+    assert stats == {"mean": 4.0, "std": 0.0, "days": 10}
+    window_stats("CO", "Delhi", "2020-01-03", "2020-01-08")
+    assert fake.calls == 1
+
+
+def test_cached_reads_do_not_wait_for_a_backfill(archive_root, monkeypatch):
+    monkeypatch.setattr(daily_archive, "time_series", FakeSeries(4.0))
+    window_stats("CO", "Delhi", "2020-01-01", "2020-01-11")
+
+    # Another process is fetching days for some other window
+    with open(archive_root / "CO.fetch.lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            read = pool.submit(window_stats, "CO", "Delhi", "2020-01-02", "2020-01-05")
+            assert read.result(timeout=5)["days"] == 3
@@ -0,0 +1,68 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from deadline import JobCancelled, check_deadline
+from ee_async import AsyncEEClient
+
+
+# Stands in for a multi-request call such as a cube update: one "request"
+# per stage, checking between them
+def staged_call(stages, done, stopped):
+    try:
+        for i in range(20):
+            check_deadline(f"stage {i}")
+            time.sleep(0.02)
+            stages.append(i)
+        done.set()
+    except JobCancelled:
+        stopped.set()
+        raise
+
+
+def test_cancelled_call_stops_between_requests():
+    stages, done, stopped = [], threading.Event(), threading.Event()
+
+    async def main():
+        client = AsyncEEClient(max_concurrent=2)
+        task = asyncio.create_task(client.run(staged_call, stages, done, stopped))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await asyncio.to_thread(stopped.wait, 2)
+        await client.close()
+
+    asyncio.run(main())
+
+    assert stopped.is_set() and not done.is_set()
+    assert len(stages) < 20
+
+
+def test_call_waiting_for_a_slot_is_never_started():
+    started = []
+    release = threading.Event()
+
+    def blocking():
+        release.wait(2)
+
+    async def main():
+        client = AsyncEEClient(max_concurrent=1)
+        first = asyncio.create_task(client.run(blocking))
+        await asyncio.sleep(0.05)
+        waiting = asyncio.create_task(client.run(started.append, 1))
+        await asyncio.sleep(0.05)
+        waiting.cancel()
+        release.set()
+        await first
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        # The slot is free again afterwards
+        await client.run(started.append, 2)
+        await client.close()
+
+    asyncio.run(main())
+
+    assert started == [2]
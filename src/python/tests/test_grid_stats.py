@@ -0,0 +1,31 @@
+import numpy as np
+
+from grid_stats import grid_arrays, grid_hotspots
+
+
+def test_cells_without_data_keep_their_place():
+    # Corner cells outside the buffer come back with a null or missing mean
+    zones = [
+        {"row": 0, "col": 0, "mean": None, "count": 0},
+        {"row": 0, "col": 1, "count": 0},
+        {"row": 1, "col": 0, "mean": 5.0, "count": 12},
+        {"row": 1, "col": 1, "mean": 7.0, "count": 30},
+    ]
+    means, counts = grid_arrays(zones, 2)
+
+    assert np.isnan(means[0]).all()
+    assert means[1].tolist() == [5.0, 7.0]
+    assert counts.tolist() == [[0, 0], [12, 30]]
+
+
+def test_hotspots_skip_empty_cells():
+    means = np.array([[np.nan, 1.0], [3.0, 2.0]], dtype=np.float32)
+    result = {
+        "bbox": [0.0, 0.0, 2.0, 2.0],
+        "mean": means,
+        "count": np.ones((2, 2), dtype=np.int32),
+    }
+    hotspots = grid_hotspots(result, top=4)
+
+    assert [(h["row"], h["col"]) for h in hotspots] == [(1, 0), (1, 1), (0, 1)]
+    assert (hotspots[0]["lat"], hotspots[0]["lon"]) == (0.5, 0.5)
@@ -0,0 +1,65 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import legend
+from legend import gradient, legend_png, palette, save_legend
+
+
+@pytest.fixture(autouse=True)
+def legend_root(tmp_path, monkeypatch):
+    monkeypatch.setattr(legend, "LEGEND_ROOT", str(tmp_path))
+    legend_png.cache_clear()
+    yield tmp_path
+    legend_png.cache_clear()
+
+
+def test_gradient_runs_through_the_palette_stops():
+    colors = gradient(palette, len(palette))
+
+    assert colors.shape == (len(palette), 3)
+    assert colors[0].tolist() == [0x5E, 0x4F, 0xA2]
+    assert colors[-1].tolist() == [0x9E, 0x01, 0x42]
+
+
+@pytest.mark.parametrize("orientation", ["horizontal", "vertical"])
+def test_legend_bar_spans_the_palette(orientation):
+    image = Image.open(
+        io.BytesIO(legend_png(tuple(palette), 0.0, 1.0, orientation, "ppb"))
+    )
+    pixels = np.asarray(image.convert("RGB"))
+
+    # Lowest value on the left, or at the bottom for vertical bars
+    low = [0x5E, 0x4F, 0xA2]
+    high = [0x9E, 0x01, 0x42]
+    if orientation == "horizontal":
+        assert image.width > image.height
+        row = pixels[pixels.shape[0] // 2]
+        assert low in row.tolist() and high in row.tolist()
+    else:
+        assert image.height > image.width
+        column = pixels[:, 10].tolist()
+        assert column.index(high) < column.index(low)
+
+
+def test_unknown_orientation_is_rejected():
+    with pytest.raises(ValueError):
+        legend_png(tuple(palette), 0.0, 1.0, "diagonal", "")
+
+
+def test_legends_are_drawn_once(legend_root, tmp_path_factory, monkeypatch):
+    out = tmp_path_factory.mktemp("out")
+    save_legend(str(out / "a.png"), 1.0, 2.0, "ppb")
+    legend_png.cache_clear()
+
+    # A second process would find the disk cache, so nothing is drawn again
+    def fail(*args):
+        raise AssertionError("legend drawn twice")
+
+    monkeypatch.setattr(legend, "render_legend", fail)
+    save_legend(str(out / "b.png"), 1.0, 2.0, "ppb")
+
+    assert (out / "a.png").read_bytes() == (out / "b.png").read_bytes()
+    assert len(list(legend_root.glob("*.png"))) == 1
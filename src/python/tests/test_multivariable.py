@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from multivariable import MIN_CORRELATION_PERIODS, VariableTable
+
+nan = np.nan
+
+VARIABLES = ["CO", "NO2", "wind_speed", "NTL", "surface_pressure"]
+
+
+def make_table():
+    values = np.array(
+        [
+            [1.0, 2.0, 3.0, 4.0, 5.0],
+            [2.0, 4.0, 6.0, 8.0, nan],
+            [5.0, 4.0, 3.0, 2.0, 1.0],
+            # Constant, so no correlation can be computed
+            [7.0, 7.0, 7.0, 7.0, 7.0],
+            [nan, nan, nan, 1000.0, 1010.0],
+        ],
+        dtype=np.float32,
+    )
+    counts = np.full(values.shape, 100)
+    counts[np.isnan(values)] = 0
+    # Averaged over too few pixels to be used
+    counts[2, 0] = 10
+    start = np.arange("2024-01", "2024-06", dtype="datetime64[M]")
+    return VariableTable(
+        VARIABLES,
+        ["Jan", "Feb", "Mar", "Apr", "May"],
+        start.astype("datetime64[D]"),
+        (start + 1).astype("datetime64[D]") - 1,
+        values,
+        counts,
+    )
+
+
+def test_correlation_uses_periods_valid_for_both():
+    matrix, periods = make_table().correlation()
+
+    assert periods.tolist() == [
+        [5, 4, 4, 5, 2],
+        [4, 4, 3, 4, 1],
+        [4, 3, 4, 4, 2],
+        [5, 4, 4, 5, 2],
+        [2, 1, 2, 2, 2],
+    ]
+    assert matrix[0, 0] == pytest.approx(1.0)
+    assert matrix[0, 1] == matrix[1, 0] == pytest.approx(1.0)
+    assert matrix[0, 2] == pytest.approx(-1.0)
+    assert matrix[1, 2] == pytest.approx(-1.0)
+
+
+def test_undefined_correlations_are_nan():
+    matrix, periods = make_table().correlation()
+
+    # Zero variance
+    assert np.isnan(matrix[3]).all() and np.isnan(matrix[:, 3]).all()
+    # Fewer than MIN_CORRELATION_PERIODS shared periods
+    assert (periods[4] < MIN_CORRELATION_PERIODS).all()
+    assert np.isnan(matrix[4]).all() and np.isnan(matrix[:, 4]).all()
+
+
+def test_records_leave_invalid_values_null():
+    records = make_table().to_records()
+
+    assert records[0] == {
+        "period": "Jan",
+        "start": "2024-01-01",
+        "end": "2024-01-31",
+        "CO": 1.0,
+        "NO2": 2.0,
+        "wind_speed": None,
+        "NTL": 7.0,
+        "surface_pressure": None,
+        "counts": {
+            "CO": 100,
+            "NO2": 100,
+            "wind_speed": 10,
+            "NTL": 100,
+            "surface_pressure": 0,
+        },
+    }
+    assert records[4]["NO2"] is None and records[4]["surface_pressure"] == 1010.0
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+import NTL
+from NTL import NTL_change, NTL_stats
+
+PERIODS = [
+    ("2022", "2022-01-01", "2022-06-30"),
+    ("2023", "2023-01-01", "2023-06-30"),
+    ("2024", "2024-01-01", "2024-06-30"),
+]
+
+BASELINE = np.array([[1.0, 2.0], [0.0, np.nan]])
+
+
+@pytest.fixture
+def rasters(monkeypatch):
+    rasters = [BASELINE, BASELINE * 2, BASELINE + 1]
+    monkeypatch.setattr(NTL, "load_NTL_rasters", lambda city, periods: rasters)
+    return rasters
+
+
+def test_stats_skip_missing_pixels():
+    assert NTL_stats(BASELINE) == {
+        "mean": 1.0,
+        "min": 0.0,
+        "max": 2.0,
+        "std": 0.816,
+        "count": 3,
+    }
+    assert NTL_stats(np.full((2, 2), np.nan))["count"] == 0
+
+
+def test_changes_against_the_first_period(rasters):
+    result, differences, ratios = NTL_change("Delhi", PERIODS)
+
+    assert [p["period"] for p in result["periods"]] == ["2022", "2023", "2024"]
+    assert [c["period"] for c in result["changes"]] == ["2023", "2024"]
+    assert all(c["baseline"] == "2022" for c in result["changes"])
+
+    np.testing.assert_array_equal(differences[0], [[1.0, 2.0], [0.0, np.nan]])
+    np.testing.assert_array_equal(differences[1], [[1.0, 1.0], [1.0, np.nan]])
+    # Dark baseline pixels have no ratio
+    np.testing.assert_array_equal(ratios[0], [[2.0, 2.0], [np.nan, np.nan]])
+    np.testing.assert_array_equal(ratios[1], [[2.0, 1.5], [np.nan, np.nan]])
+    assert result["changes"][1]["ratio"] == NTL_stats(ratios[1])
+    assert result["changes"][1]["ratio"]["mean"] == 1.75
+
+
+def test_change_plot_is_written(rasters, tmp_path):
+    path = tmp_path / "change.png"
+    NTL_change("Delhi", PERIODS, str(path))
+
+    assert path.stat().st_size > 0
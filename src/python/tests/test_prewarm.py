@@ -0,0 +1,48 @@
+import pytest
+
+import prewarm
+from prewarm import run_prewarm
+
+TARGETS = [{"key": f"map/CO/Delhi/{i}.png", "end_date": "2024-01-31"} for i in range(5)]
+
+
+@pytest.fixture
+def fake_run(tmp_path, monkeypatch):
+    ran = []
+    monkeypatch.setattr(prewarm, "STATE_FILE", str(tmp_path / "state.json"))
+    monkeypatch.setattr(prewarm, "get_artifact_store", lambda: None)
+    monkeypatch.setattr(prewarm, "latest_data_dates", lambda: {"CO": "2024-02-01"})
+    monkeypatch.setattr(prewarm, "build_targets", lambda today: TARGETS)
+    monkeypatch.setattr(prewarm, "refresh_color_scales", lambda **kwargs: True)
+    monkeypatch.setattr(prewarm, "log_coverage", lambda *args: None)
+    monkeypatch.setattr(prewarm, "is_fresh", lambda store, key, end: key in ran)
+    monkeypatch.setattr(prewarm, "run_job", lambda store, t: ran.append(t["key"]))
+    monkeypatch.setattr(prewarm.time, "sleep", lambda seconds: None)
+    return ran
+
+
+def off_peak_for(monkeypatch, checks):
+    answers = iter([True] * checks + [False] * 100)
+    monkeypatch.setattr(prewarm, "is_off_peak", lambda: next(answers))
+
+
+def test_run_stops_when_off_peak_hours_end(fake_run, monkeypatch):
+    off_peak_for(monkeypatch, 2)
+    run_prewarm(off_peak_only=True)
+
+    assert fake_run == [TARGETS[0]["key"], TARGETS[1]["key"]]
+    # Not recorded, so the next night resumes with the rest
+    assert prewarm.load_state() == {}
+
+    off_peak_for(monkeypatch, 100)
+    run_prewarm(off_peak_only=True)
+
+    assert fake_run == [t["key"] for t in TARGETS]
+    assert prewarm.load_state()["latest_data"] == {"CO": "2024-02-01"}
+
+
+def test_manual_runs_ignore_the_hour(fake_run, monkeypatch):
+    off_peak_for(monkeypatch, 0)
+    run_prewarm()
+
+    assert len(fake_run) == len(TARGETS)
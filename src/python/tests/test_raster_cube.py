@@ -0,0 +1,109 @@
+import os
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+import raster_cube
+from raster_cube import (
+    CUBE_DIMENSIONS,
+    cube_name,
+    evict_cubes,
+    load_year,
+    update_cube,
+    window_mean,
+)
+
+CO = ("COPERNICUS/S5P/OFFL/L3_CO", "CO_column_number_density")
+NO2 = ("COPERNICUS/S5P/OFFL/L3_NO2", "tropospheric_NO2_column_number_density")
+
+
+# Deterministic day rasters instead of Earth Engine: day d has value d + 1
+# at every pixel with one observation; unavailable days return nothing
+class FakeDays:
+    def __init__(self, unavailable=()):
+        self.unavailable = set(unavailable)
+        self.fetched = []
+
+    def __call__(self, collection_id, band, city, days):
+        self.fetched.extend(days)
+        shape = (len(days), CUBE_DIMENSIONS, CUBE_DIMENSIONS)
+        available = np.array([day not in self.unavailable for day in days])
+        values = np.array([day.toordinal() % 100 + 1 for day in days], np.float32)
+        counts = np.ones(shape, dtype=np.uint8) * available[:, None, None]
+        sums = values[:, None, None] * counts
+        return sums.astype(np.float32), counts, available
+
+
+@pytest.fixture
+def fake_days(tmp_path, monkeypatch):
+    monkeypatch.setattr(raster_cube, "CUBE_ROOT", str(tmp_path))
+    fake = FakeDays()
+    monkeypatch.setattr(raster_cube, "fetch_days", fake)
+    return fake
+
+
+def expected_mean(start, days):
+    values = [(start + timedelta(days=i)).toordinal() % 100 + 1 for i in range(days)]
+    return np.mean(values)
+
+
+def test_window_mean_matches_the_daily_values(fake_days):
+    mean, count = window_mean(*CO, "Delhi", "2020-12-20", "2021-01-10")
+    center = CUBE_DIMENSIONS // 2
+
+    assert count[center, center] == 21
+    assert mean[center, center] == pytest.approx(expected_mean(date(2020, 12, 20), 21))
+    # Corners are outside the 50 km buffer
+    assert np.isnan(mean[0, 0])
+
+
+def test_stored_days_are_not_fetched_again(fake_days):
+    window_mean(*CO, "Delhi", "2020-03-01", "2020-03-31")
+    fake_days.fetched.clear()
+    mean, _ = window_mean(*CO, "Delhi", "2020-03-10", "2020-04-05")
+
+    assert fake_days.fetched == [
+        date(2020, 3, 31) + timedelta(days=i) for i in range(5)
+    ]
+    center = CUBE_DIMENSIONS // 2
+    assert mean[center, center] == pytest.approx(expected_mean(date(2020, 3, 10), 26))
+
+
+def test_days_without_data_yet_are_fetched_again(fake_days):
+    late = date(2020, 5, 3)
+    fake_days.unavailable = {late}
+    update_cube(*CO, "Delhi", "2020-05-01", "2020-05-06")
+    cube = load_year(cube_name(*CO), "Delhi", 2020)
+
+    assert not cube["days"][late.timetuple().tm_yday - 1]
+    assert len(cube["index"]) == 4
+
+    fake_days.unavailable = set()
+    fake_days.fetched.clear()
+    update_cube(*CO, "Delhi", "2020-05-01", "2020-05-06")
+
+    assert fake_days.fetched == [late]
+    assert len(load_year(cube_name(*CO), "Delhi", 2020)["index"]) == 5
+
+
+def test_cloud_masked_cubes_are_keyed_by_threshold():
+    assert cube_name(*CO) == CO[1]
+    assert cube_name(*NO2) == f"{NO2[1]}_cf{raster_cube.MAX_CLOUD_FRACTION:g}"
+
+
+def test_least_recently_read_years_are_evicted(fake_days):
+    window_mean(*CO, "Delhi", "2019-03-01", "2019-03-11")
+    window_mean(*CO, "Delhi", "2020-03-01", "2020-03-11")
+    # Reading 2019 again makes 2020 the least recently used
+    window_mean(*CO, "Delhi", "2019-03-01", "2019-03-11")
+
+    directory = raster_cube.cube_dir(cube_name(*CO), "Delhi")
+    year_bytes = sum(
+        os.path.getsize(os.path.join(directory, f"2019.{a}.npy"))
+        for a in raster_cube.CUBE_ARRAYS
+    )
+    evict_cubes(budget_bytes=year_bytes)
+
+    assert load_year(cube_name(*CO), "Delhi", 2019) is not None
+    assert load_year(cube_name(*CO), "Delhi", 2020) is None
@@ -0,0 +1,196 @@
+import json
+import os
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from artifact_store import S3ArtifactStore, claim_job, finish_job
+
+# An in-process S3 stand-in, so both clients are tested without a bucket
+boto3 = pytest.importorskip("boto3")
+moto_server = pytest.importorskip("moto.server")
+moto_settings = pytest.importorskip("moto.settings")
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+BUCKET = "artifacts"
+KEY = "map/CO/Delhi/2024-01-01_2024-01-31.png"
+
+S3_POLICY = {
+    "Version": "2012-10-17",
+    "Statement": [{"Effect": "Allow", "Action": "s3:*", "Resource": "*"}],
+}
+
+
+@pytest.fixture(scope="module")
+def endpoint():
+    server = moto_server.ThreadedMotoServer(ip_address="127.0.0.1", port=0)
+    server.start()
+    host, port = server.get_host_and_port()
+    yield f"http://{host}:{port}"
+    server.stop()
+
+
+# Credentials of a user created on the server. Only the three IAM calls
+# below go unauthenticated; every S3 request after them has its signature
+# checked, including those signed by artifactStore.js.
+@pytest.fixture(scope="module")
+def credentials(endpoint):
+    previous = moto_settings.INITIAL_NO_AUTH_ACTION_COUNT
+    moto_settings.INITIAL_NO_AUTH_ACTION_COUNT = 3
+    iam = boto3.client(
+        "iam",
+        endpoint_url=endpoint,
+        region_name="us-east-1",
+        aws_access_key_id="setup",
+        aws_secret_access_key="setup",
+    )
+    iam.create_user(UserName="prewarm")
+    iam.put_user_policy(
+        UserName="prewarm", PolicyName="s3", PolicyDocument=json.dumps(S3_POLICY)
+    )
+    key = iam.create_access_key(UserName="prewarm")["AccessKey"]
+    yield key["AccessKeyId"], key["SecretAccessKey"]
+    moto_settings.INITIAL_NO_AUTH_ACTION_COUNT = previous
+
+
+@pytest.fixture
+def store(endpoint, credentials, monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", credentials[0])
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", credentials[1])
+    store = S3ArtifactStore(BUCKET, endpoint_url=endpoint)
+    store.client.create_bucket(Bucket=BUCKET)
+    yield store
+    for item in store.client.list_objects_v2(Bucket=BUCKET).get("Contents", []):
+        store.client.delete_object(Bucket=BUCKET, Key=item["Key"])
+    store.client.delete_bucket(Bucket=BUCKET)
+
+
+def test_put_if_absent_writes_once(store):
+    assert store.put_if_absent("jobs/a.json", "first")
+    assert not store.put_if_absent("jobs/a.json", "second")
+    assert store.read_text("jobs/a.json") == "first"
+    assert store.read_text("jobs/missing.json") is None
+
+
+def test_replace_if_matches_the_etag_read(store):
+    store.write_text("jobs/a.json", "1")
+    text, version = store.read_versioned("jobs/a.json")
+    store.write_text("jobs/a.json", "2")
+
+    assert text == "1"
+    assert not store.replace_if("jobs/a.json", "3", version)
+    _, version = store.read_versioned("jobs/a.json")
+    assert store.replace_if("jobs/a.json", "3", version)
+    assert store.read_text("jobs/a.json") == "3"
+
+
+def test_claims_and_takeover(store):
+    assert claim_job(store, KEY, 60)
+    assert not claim_job(store, KEY, 60)
+
+    finish_job(store, KEY, "done")
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        claims = list(pool.map(lambda _: claim_job(store, KEY, 60), range(16)))
+
+    assert claims.count(True) == 1
+    assert json.loads(store.read_text(f"jobs/{KEY}.json"))["state"] == "running"
+
+
+def test_artifacts_round_trip(store, tmp_path):
+    path = tmp_path / "map.png"
+    path.write_bytes(b"\x89PNG")
+    store.put_file(KEY, str(path))
+
+    assert not path.exists()
+    assert store.stat(KEY)["size"] == 4
+    assert store.stat("map/missing.png") is None
+
+
+# The server's own client signs its requests by hand (SigV4 without an SDK)
+NODE_SCRIPT = """
+const { S3ArtifactStore, claimJob, finishJob } = require("./artifactStore");
+
+const main = async () => {
+  const store = new S3ArtifactStore({
+    bucket: process.env.S3_BUCKET,
+    endpoint: process.env.S3_ENDPOINT,
+    region: "us-east-1",
+    accessKeyId: process.env.AWS_ACCESS_KEY_ID,
+    secretAccessKey: process.env.AWS_SECRET_ACCESS_KEY,
+  });
+  const key = "map/CO/Delhi/a b+c.png";
+  const results = {};
+  results.absent = await store.stat(key);
+  results.firstPut = await store.putIfAbsent("jobs/x.json", "1");
+  results.secondPut = await store.putIfAbsent("jobs/x.json", "2");
+  const { text, version } = await store.readVersioned("jobs/x.json");
+  await store.writeText("jobs/x.json", "3");
+  results.read = text;
+  results.staleReplace = await store.replaceIf("jobs/x.json", "4", version);
+  const current = await store.readVersioned("jobs/x.json");
+  results.replace = await store.replaceIf("jobs/x.json", "4", current.version);
+  results.final = await store.readText("jobs/x.json");
+
+  results.claim = await claimJob(store, key, 60000);
+  results.secondClaim = await claimJob(store, key, 60000);
+  await finishJob(store, key, "done");
+  const claims = await Promise.all(
+    Array.from({ length: 8 }, () => claimJob(store, key, 60000))
+  );
+  results.takeovers = claims.filter(Boolean).length;
+  console.log(JSON.stringify(results));
+};
+
+main().catch((error) => {
+  console.error(error);
+  process.exit(1);
+});
+"""
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="needs node")
+def test_node_client_against_the_same_server(store, endpoint):
+    result = subprocess.run(
+        ["node", "-e", NODE_SCRIPT],
+        cwd=SRC_DIR,
+        env=dict(os.environ, S3_BUCKET=BUCKET, S3_ENDPOINT=endpoint),
+        capture_output=True,
+        text=True,
+        timeout=60,
+        check=True,
+    )
+
+    assert json.loads(result.stdout.splitlines()[-1]) == {
+        "absent": None,
+        "firstPut": True,
+        "secondPut": False,
+        "read": "1",
+        "staleReplace": False,
+        "replace": True,
+        "final": "4",
+        "claim": True,
+        "secondClaim": False,
+        "takeovers": 1,
+    }
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="needs node")
+def test_node_client_signature_is_checked(store, endpoint):
+    result = subprocess.run(
+        ["node", "-e", NODE_SCRIPT],
+        cwd=SRC_DIR,
+        env=dict(
+            os.environ,
+            S3_BUCKET=BUCKET,
+            S3_ENDPOINT=endpoint,
+            AWS_SECRET_ACCESS_KEY="wrong",
+        ),
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+
+    assert result.returncode == 1
+    assert "failed with 403" in result.stderr
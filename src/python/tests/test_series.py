@@ -0,0 +1,48 @@
+from datetime import date
+
+import numpy as np
+
+from series import PeriodPoint, Series
+
+POINTS = [
+    PeriodPoint("Jan", date(2024, 1, 1), date(2024, 1, 31), 101.25, 900, 4.5, False),
+    PeriodPoint("Feb", date(2024, 2, 1), date(2024, 2, 29), None, 0, None, True),
+    PeriodPoint("Mar", date(2024, 3, 1), date(2024, 3, 31), 98.5, 20, 1.0, True),
+]
+
+
+def test_points_round_trip_through_columns():
+    series = Series.from_points(POINTS)
+
+    assert len(series) == 3
+    assert series.value.dtype == np.float32
+    assert np.isnan(series.value[1]) and np.isnan(series.observations[1])
+    assert [p.to_dict() for p in series] == [p.to_dict() for p in POINTS]
+
+
+def test_sparse_and_missing_periods_are_not_plotted():
+    series = Series.from_points(POINTS)
+
+    assert series.valid().tolist() == [True, False, False]
+    assert series.plot_values() == [101.25, None, None]
+
+
+def test_records_use_iso_dates():
+    record = Series.from_points(POINTS).to_records()[0]
+
+    assert record == {
+        "period": "Jan",
+        "start": "2024-01-01",
+        "end": "2024-01-31",
+        "value": 101.25,
+        "count": 900,
+        "observations": 4.5,
+        "sparse": False,
+    }
+
+
+def test_empty_series():
+    series = Series.from_points([])
+
+    assert len(series) == 0
+    assert series.plot_values() == [] and series.to_records() == []
@@ -0,0 +1,68 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+from shared_raster import SharedRasters, call_attached
+
+
+def block_exists(handle):
+    try:
+        shared_memory.SharedMemory(name=handle.name).close()
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def masked_sum(values, scale):
+    return float(np.nansum(values)) * scale
+
+
+def test_consumers_see_a_read_only_copy():
+    rasters = SharedRasters()
+    values = np.arange(12, dtype=np.float32).reshape(3, 4)
+    handle = rasters.share(values)
+
+    assert call_attached(masked_sum, handle, 2) == 132.0
+
+    def write(view):
+        view[0, 0] = 1
+
+    with pytest.raises(ValueError):
+        call_attached(write, handle)
+    rasters.close()
+
+
+def test_block_is_unlinked_after_the_last_release():
+    rasters = SharedRasters()
+    handle = rasters.share(np.ones(8), refs=2)
+
+    rasters.release(handle)
+    assert block_exists(handle)
+    rasters.release(handle)
+    assert not block_exists(handle) and len(rasters) == 0
+
+
+def test_submitted_jobs_keep_the_block_alive():
+    rasters = SharedRasters()
+    handle = rasters.share(np.full((4, 4), 0.5))
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        futures = [rasters.submit(pool, masked_sum, handle, i) for i in range(4)]
+        # The caller's reference can go before the jobs finish
+        rasters.release(handle)
+        assert [f.result() for f in futures] == [0.0, 8.0, 16.0, 24.0]
+
+    assert len(rasters) == 0
+    assert not block_exists(handle)
+
+
+@pytest.mark.skipif(not os.path.isdir("/dev/shm"), reason="POSIX shared memory")
+def test_close_leaves_nothing_behind():
+    rasters = SharedRasters()
+    handles = [rasters.share(np.zeros(16)) for _ in range(3)]
+    rasters.close()
+
+    assert not any(block_exists(handle) for handle in handles)
@@ -0,0 +1,60 @@
+from datetime import date
+
+import time_series_engine
+from time_series_engine import build_batch, generate_periods, make_points
+
+
+def stats(observations, count=6000):
+    return {"ppb_mean": 100.0, "ppb_count": count, "obs_mean": observations}
+
+
+def test_one_overpass_is_enough_for_a_day():
+    batch = list(generate_periods("2024-01-01", "2024-01-02", "day"))
+    assert batch[0] == ("2024-01-01", date(2024, 1, 1), date(2024, 1, 1))
+    points = make_points(batch, {0: stats(1.0), 1: stats(1.0, count=10)})
+
+    assert not points[0].sparse
+    # Too few pixels is still sparse
+    assert points[1].sparse
+
+
+def test_longer_periods_need_repeat_overpasses():
+    for interval in ("15day", "month"):
+        batch = list(generate_periods("2024-01-01", "2024-03-30", interval))
+        points = make_points(batch, {0: stats(1.0), 1: stats(2.5)})
+
+        assert points[0].sparse
+        assert not points[1].sparse
+
+
+def test_month_periods_cover_whole_months():
+    periods = list(generate_periods("2023-11-15", "2024-02-01", "month"))
+
+    assert [name for name, _, _ in periods] == [
+        "Nov 2023",
+        "Dec 2023",
+        "Jan 2024",
+        "Feb 2024",
+    ]
+    assert periods[1][1:] == (date(2023, 12, 1), date(2023, 12, 31))
+
+
+def test_filter_dates_include_the_last_day(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        time_series_engine,
+        "build_period_value",
+        lambda pollutant, geometry, start, end: calls.append((start, end)),
+    )
+    for interval in ("day", "15day", "month"):
+        batch = list(generate_periods("2024-01-01", "2024-01-31", interval))
+        build_batch("CO", None, batch)
+
+    assert calls[0] == ("2024-01-01", "2024-01-02")
+    # 15-day periods end on the 15th and the 30th, then 31 January
+    assert calls[31:34] == [
+        ("2024-01-01", "2024-01-16"),
+        ("2024-01-16", "2024-01-31"),
+        ("2024-01-31", "2024-02-01"),
+    ]
+    assert calls[34] == ("2024-01-01", "2024-02-01")
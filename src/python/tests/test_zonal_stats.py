@@ -0,0 +1,76 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from cities import get_bounding_box, get_city_coords
+from zonal_stats import buffer_mask, city_zonal_stats, percentiles, zonal_stats
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+RECORDED_FIXTURE = "zonal_stats_delhi_ee.json"
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURE_DIR, name)) as f:
+        fixture = json.load(f)
+    raster = np.array(fixture["raster"], dtype=float)
+    return fixture, raster
+
+
+# Against an independent pure-Python computation over the same pixels
+# (regenerate with make_zonal_reference.py), so the same definitions give the
+# same numbers
+def test_city_zonal_stats_matches_reference():
+    fixture, raster = load_fixture("zonal_stats_delhi_reference.json")
+    expected = fixture["reference"]
+    stats = city_zonal_stats(raster, fixture["city"], fixture["quantiles"])
+
+    for key, value in expected.items():
+        assert stats[key] == pytest.approx(value), key
+
+
+# Parity with a reduceRegion over the same pixel grid, once a fixture has been
+# recorded with record_zonal_fixture.py. Earth Engine weights edge pixels by
+# their covered fraction and bins its percentiles, hence the tolerances.
+@pytest.mark.skipif(
+    not os.path.exists(os.path.join(FIXTURE_DIR, RECORDED_FIXTURE)),
+    reason=f"record {RECORDED_FIXTURE} with record_zonal_fixture.py",
+)
+def test_city_zonal_stats_matches_recorded_reduce_region():
+    fixture, raster = load_fixture(RECORDED_FIXTURE)
+    expected = fixture["reduceRegion"]
+    stats = city_zonal_stats(raster, fixture["city"], fixture["quantiles"])
+
+    spread = expected["ppb_max"] - expected["ppb_min"]
+    assert stats["count"] == pytest.approx(expected["ppb_count"], rel=0.02)
+    assert stats["mean"] == pytest.approx(expected["ppb_mean"], rel=0.005)
+    assert stats["min"] == pytest.approx(expected["ppb_min"], abs=0.02 * spread)
+    assert stats["max"] == pytest.approx(expected["ppb_max"], abs=0.02 * spread)
+    for q in fixture["quantiles"]:
+        assert stats[f"p{q}"] == pytest.approx(expected[f"ppb_p{q}"], abs=0.01 * spread)
+
+
+def test_percentiles_match_numpy():
+    values = np.random.default_rng(0).normal(size=1001)
+    qs = [0, 2, 50, 98, 100]
+    np.testing.assert_allclose(percentiles(values, qs), np.percentile(values, qs))
+
+
+def test_buffer_mask_is_a_disc_around_the_city():
+    bbox = get_bounding_box("Delhi")
+    lat, long = get_city_coords("Delhi")
+    mask = buffer_mask(bbox, (64, 64), lat, long)
+
+    assert mask[32, 32]
+    assert not mask[0, 0] and not mask[-1, -1]
+    # The box is fitted to the buffer, so the disc covers about pi/4 of it
+    assert mask.mean() == pytest.approx(np.pi / 4, abs=0.03)
+
+
+def test_empty_raster_has_no_stats():
+    values = np.full((16, 16), np.nan)
+    stats = zonal_stats(values, get_bounding_box("Delhi"))
+
+    assert stats["count"] == 0
+    assert stats["mean"] is None and stats["p2"] is None
@@ -0,0 +1,285 @@
+import ee
+import calendar
+import itertools
+import json
+import sys
+from datetime import date, timedelta
+
+from cities import get_city_geometry
+from deadline import check_deadline
+from series import PeriodPoint, Series
+
+# Dataset, band and reduction scale used for each pollutant's time series
+POLLUTANTS = {
+    "CO": {
+        "collection": "COPERNICUS/S5P/OFFL/L3_CO",
+        "band": "CO_column_number_density",
+        "dry_air": True,
+        "scale": 1113.2,
+    },
+    "NO2": {
+        "collection": "COPERNICUS/S5P/OFFL/L3_NO2",
+        "band": "tropospheric_NO2_column_number_density",
+        "dry_air": False,
+        "scale": 1000,
+    },
+    "HCHO": {
+        "collection": "COPERNICUS/S5P/OFFL/L3_HCHO",
+        "band": "tropospheric_HCHO_column_number_density",
+        "dry_air": False,
+        "scale": 1000,
+    },
+    "SO2": {
+        "collection": "COPERNICUS/S5P/OFFL/L3_SO2",
+        "band": "SO2_column_number_density",
+        "dry_air": False,
+        "scale": 1000,
+    },
+}
+
+# Number of periods resolved by a single getInfo() round trip
+BATCH_SIZE = 6
+
+# L3 collections carrying a cloud_fraction band; L3_CO has none, and CO is
+# retrieved through clouds anyway
+CLOUD_MASKED_COLLECTIONS = {
+    "COPERNICUS/S5P/OFFL/L3_NO2",
+    "COPERNICUS/S5P/OFFL/L3_SO2",
+    "COPERNICUS/S5P/OFFL/L3_HCHO",
+}
+
+# Pixels with a larger cloud fraction are dropped before averaging
+MAX_CLOUD_FRACTION = 0.3
+
+# Periods averaging fewer valid pixels or overpasses per pixel are flagged
+# sparse; with about one overpass a day, a single-day period needs only one
+MIN_VALID_PIXELS = 50
+MIN_OBSERVATIONS = 2
+MIN_DAILY_OBSERVATIONS = 1
+
+# Constants
+g = 9.82  # m/s^2
+m_H2O = 0.01801528  # kg/mol
+m_dry_air = 0.0289644  # kg/mol
+
+
+def is_seasonal(start_date, end_date):
+    duration = date.fromisoformat(end_date) - date.fromisoformat(start_date)
+
+    # Approximate 3 months with a tolerance of 5 days
+    return abs(duration.days - 90) <= 5
+
+
+# Periods as (name, start, end) with datetime.date bounds; end is the last day
+# of the period, for labels, and filter_end gives the bound for filterDate
+def generate_periods(start_date, end_date, interval=None):
+    start = date.fromisoformat(start_date)
+    end = date.fromisoformat(end_date)
+
+    if interval is None:
+        interval = "15day" if is_seasonal(start_date, end_date) else "month"
+
+    if interval == "day":
+        day = start
+        while day <= end:
+            yield day.isoformat(), day, day
+            day += timedelta(days=1)
+
+    elif interval == "15day":
+        # Generate 15-day intervals within the specified season
+        while start <= end:
+            end_interval_date = min(start + timedelta(days=14), end)
+            yield f"{start} - {end_interval_date}", start, end_interval_date
+            start = end_interval_date + timedelta(days=1)
+
+    elif interval == "month":
+        # Calendar months covering the range, labelled "Jan" within a single year
+        single_year = start.year == end.year
+        year, month = start.year, start.month
+        while (year, month) <= (end.year, end.month):
+            last_day = calendar.monthrange(year, month)[1]
+            name = calendar.month_abbr[month]
+            if not single_year:
+                name = f"{name} {year}"
+            yield name, date(year, month, 1), date(year, month, last_day)
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+    else:
+        raise ValueError(f"Unknown interval: {interval}")
+
+
+# filterDate excludes its end date, so a period is filtered up to the day
+# after its last
+def filter_end(end):
+    return (end + timedelta(days=1)).isoformat()
+
+
+def dry_air_column(geometry, start_date, end_date):
+    watervapor_collection = (
+        ee.ImageCollection("COPERNICUS/S5P/OFFL/L3_CO")
+        .filterBounds(geometry)
+        .filterDate(start_date, end_date)
+        .select("H2O_column_number_density")
+    )
+    surface_pressure_collection = (
+        ee.ImageCollection("ECMWF/ERA5_LAND/DAILY_AGGR")
+        .filterBounds(geometry)
+        .filterDate(start_date, end_date)
+        .select("surface_pressure")
+    )
+
+    TC_dry_air = (
+        surface_pressure_collection.mean()
+        .divide(g * m_dry_air)
+        .subtract(watervapor_collection.mean().multiply(m_H2O / m_dry_air))
+    )
+    sizes = [watervapor_collection.size(), surface_pressure_collection.size()]
+    return TC_dry_air, sizes
+
+
+# Band of a collection over the window, with cloudy pixels masked server-side
+def qa_collection(collection_id, band, geometry, start_date, end_date):
+    collection = (
+        ee.ImageCollection(collection_id)
+        .filterBounds(geometry)
+        .filterDate(start_date, end_date)
+    )
+    if collection_id not in CLOUD_MASKED_COLLECTIONS:
+        return collection.select(band)
+
+    return collection.map(
+        lambda image: image.select(band).updateMask(
+            image.select("cloud_fraction").lt(MAX_CLOUD_FRACTION)
+        )
+    )
+
+
+# Server-side mean and valid-pixel counts for one period; empty collections
+# resolve to null inside the graph, so a period costs no separate size check
+def build_period_value(pollutant, geometry, start_date, end_date):
+    spec = POLLUTANTS[pollutant]
+    collection = qa_collection(
+        spec["collection"], spec["band"], geometry, start_date, end_date
+    )
+    sizes = [collection.size()]
+    image = collection.mean()
+
+    if spec["dry_air"]:
+        TC_dry_air, dry_air_sizes = dry_air_column(geometry, start_date, end_date)
+        image = image.divide(TC_dry_air)
+        sizes += dry_air_sizes
+
+    # Valid overpasses per pixel ride along in the same reduction as the mean
+    ppb = image.multiply(1e9).rename("ppb")
+    observations = collection.count().rename("obs")
+    reducer = ee.Reducer.mean().combine(ee.Reducer.count(), sharedInputs=True)
+    stats = ppb.addBands(observations).reduceRegion(
+        reducer=reducer, geometry=geometry, scale=spec["scale"]
+    )
+
+    # Only the taken branch is evaluated, so empty periods never reach the reducer
+    non_empty = ee.Number(ee.List(sizes).reduce(ee.Reducer.min())).gt(0)
+    return ee.Algorithms.If(
+        non_empty, stats.select(["ppb_mean", "ppb_count", "obs_mean"]), None
+    )
+
+
+def build_batch(pollutant, geometry, batch):
+    return [
+        build_period_value(pollutant, geometry, s.isoformat(), filter_end(e))
+        for _, s, e in batch
+    ]
+
+
+def min_observations(start, end):
+    return MIN_DAILY_OBSERVATIONS if start == end else MIN_OBSERVATIONS
+
+
+def is_sparse(count, observations, required=MIN_OBSERVATIONS):
+    return count < MIN_VALID_PIXELS or observations is None or observations < required
+
+
+def make_points(batch, values):
+    points = []
+    for i, (name, start, end) in enumerate(batch):
+        stats = values.get(i) or {}
+        value = stats.get("ppb_mean")
+        count = stats.get("ppb_count") or 0
+        observations = stats.get("obs_mean")
+        points.append(
+            PeriodPoint(
+                name,
+                start,
+                end,
+                round(value, 3) if value is not None else None,
+                count,
+                round(observations, 2) if observations is not None else None,
+                is_sparse(count, observations, min_observations(start, end)),
+            )
+        )
+    return points
+
+
+# getInfo() round trips made by this process, reported by benchmark.py
+round_trips = 0
+
+
+def evaluate(obj):
+    global round_trips
+    round_trips += 1
+    return obj.getInfo()
+
+
+# A whole batch of periods is resolved in a single evaluation
+def resolve_batch(pollutant, geometry, batch):
+    values = evaluate(ee.List(build_batch(pollutant, geometry, batch)))
+    return make_points(batch, dict(enumerate(values)))
+
+
+# Yield one PeriodPoint per period as each batch completes, so memory stays
+# bounded
+def iter_time_series(
+    pollutant,
+    city,
+    start_date,
+    end_date,
+    interval=None,
+    batch_size=BATCH_SIZE,
+    deadline=None,
+):
+    geometry = get_city_geometry(city)
+    periods = generate_periods(start_date, end_date, interval)
+
+    while True:
+        batch = list(itertools.islice(periods, batch_size))
+        if not batch:
+            break
+        check_deadline(f"period {batch[0][1]}", deadline)
+        for point in resolve_batch(pollutant, geometry, batch):
+            yield point
+
+
+# The whole series in column arrays
+def time_series(pollutant, city, start_date, end_date, interval=None, **kwargs):
+    return Series.from_points(
+        iter_time_series(pollutant, city, start_date, end_date, interval, **kwargs)
+    )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (5, 6):
+        print(
+            "Usage: python time_series_engine.py <pollutant> <city> <start_date> <end_date> [interval]"
+        )
+        sys.exit(1)
+
+    # Initialize the Earth Engine API
+    ee.Authenticate()
+    ee.Initialize(project="ee-narravarsha1")
+
+    pollutant, city, start_date, end_date = sys.argv[1:5]
+    interval = sys.argv[5] if len(sys.argv) == 6 else None
+
+    # Stream one JSON object per line (NDJSON) as each batch completes
+    for point in iter_time_series(pollutant, city, start_date, end_date, interval):
+        print(json.dumps(point.to_dict()), flush=True)
@@ -0,0 +1,84 @@
+import os
+
+import plotly.graph_objs as go
+
+from series import Series
+from time_series_engine import is_seasonal, iter_time_series
+
+
+def time_series_figure(pollutant, city, start_date, end_date, series):
+    # Determine if the duration is approximately 3 months
+    seasonal = is_seasonal(start_date, end_date)
+
+    period_names = series.periods
+    # Leave sparsely observed periods out of the plot
+    values = series.plot_values()
+
+    # Create a Plotly trace for the concentration data
+    trace = go.Scatter(
+        x=period_names,
+        y=values,
+        mode="lines+markers+text",  # Include text mode to display y values
+        name=f"{pollutant} Concentration",
+        hoverinfo="x+y",
+        text=[
+            f"{v:.3f}" if v is not None else None for v in values
+        ],  # Format y values to 3 decimal places
+        textposition="top center",  # Position of the text relative to the markers
+        line=dict(color="royalblue", width=2, dash="dash"),
+        marker=dict(color="darkorange", size=8, symbol="circle"),
+    )
+
+    # Create layout for the plot
+    layout = go.Layout(
+        title={
+            "text": f'{"Seasonal" if seasonal else "Monthly"} Mean {pollutant} Concentration for {city} from {start_date} to {end_date}',
+            "x": 0.5,
+            "xanchor": "center",
+        },
+        xaxis=dict(
+            title="Period",
+            tickmode="array",
+            tickvals=period_names,
+            ticktext=period_names,
+            showgrid=True,
+            gridcolor="lightgrey",
+        ),
+        yaxis=dict(
+            title=f"Mean {pollutant} Concentration (ppb)",
+            showgrid=True,
+            gridcolor="lightgrey",
+        ),
+        plot_bgcolor="whitesmoke",
+        hovermode="closest",
+        showlegend=True,
+        legend=dict(
+            x=0.1,
+            y=1.1,
+            bgcolor="rgba(255, 255, 255, 0)",
+            bordercolor="rgba(255, 255, 255, 0)",
+        ),
+    )
+
+    return go.Figure(data=[trace], layout=layout)
+
+
+def pollutant_time_series(pollutant, city, start_date, end_date, plot_file_path):
+    # Collect concentration values as each batch of periods completes
+    points = []
+    for point in iter_time_series(pollutant, city, start_date, end_date):
+        print(
+            f"Period: {point.start} to {point.end}, Value: {point.value}"
+        )  # Debug statement
+        points.append(point)
+
+    series = Series.from_points(points)
+    fig = time_series_figure(pollutant, city, start_date, end_date, series)
+
+    # Ensure plots directory exists
+    os.makedirs(os.path.dirname(plot_file_path), exist_ok=True)
+
+    # Save plot to the file
+    fig.write_html(plot_file_path)
+    print(f"Plot saved to {plot_file_path}")
+    return fig
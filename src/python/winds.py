@@ -6,6 +6,8 @@ from folium import plugins
 import math
 import calendar
 
+from display_mode import show_html
+
 # Initialize the Earth Engine API
 ee.Authenticate()
 ee.Initialize(project="ee-sandhyarajagiri930")
@@ -117,6 +119,7 @@ for lat in np.linspace(bounding_box[1], bounding_box[3], 10):
                 ),
             ).add_to(wind_dir_layer)
 
-# Add layer control and display the map
+# Add layer control, save the map and display it in interactive mode
 folium.LayerControl().add_to(map_city)
-map_city
+map_city.save("wind_map.html")
+show_html("wind_map.html", map_city)
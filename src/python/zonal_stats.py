@@ -0,0 +1,86 @@
+import numpy as np
+
+from cities import buffer_radius, get_bounding_box, get_city_coords
+
+# Mean Earth radius used for the buffer distance, in meters
+EARTH_RADIUS = 6371008.8
+
+
+# Latitudes (rows) and longitudes (columns) of pixel centers in a raster
+def pixel_centers(bbox, shape):
+    min_lon, min_lat, max_lon, max_lat = bbox
+    height, width = shape
+    lat_step = (max_lat - min_lat) / height
+    lon_step = (max_lon - min_lon) / width
+    lats = max_lat - (np.arange(height) + 0.5) * lat_step
+    lons = min_lon + (np.arange(width) + 0.5) * lon_step
+    return lats, lons
+
+
+# Pixels whose centers fall inside the circular buffer (haversine distance)
+def buffer_mask(bbox, shape, center_lat, center_lon, radius=buffer_radius):
+    lats, lons = pixel_centers(bbox, shape)
+    lat1 = np.radians(center_lat)
+    lat2 = np.radians(lats)[:, None]
+    dlat = lat2 - lat1
+    dlon = np.radians(lons - center_lon)[None, :]
+
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    distance = 2 * EARTH_RADIUS * np.arcsin(np.sqrt(a))
+    return distance <= radius
+
+
+# Pixel area relative to the equator; degree pixels shrink with cos(latitude)
+def area_weights(bbox, shape):
+    lats, _ = pixel_centers(bbox, shape)
+    return np.broadcast_to(np.cos(np.radians(lats))[:, None], shape)
+
+
+# Linear-interpolated percentiles using partial sorts instead of a full sort
+def percentiles(values, qs):
+    n = values.size
+    ranks = np.asarray(qs, dtype=float) / 100 * (n - 1)
+    lower = np.floor(ranks).astype(int)
+    upper = np.ceil(ranks).astype(int)
+    partitioned = np.partition(values, np.unique(np.concatenate([lower, upper])))
+    fraction = ranks - lower
+    return partitioned[lower] * (1 - fraction) + partitioned[upper] * fraction
+
+
+def zonal_stats(values, bbox, mask=None, qs=(2, 98)):
+    data = np.ma.masked_invalid(np.asarray(values, dtype=np.float64))
+    if mask is not None:
+        data = np.ma.masked_where(~mask, data, copy=False)
+
+    valid = data.compressed()
+    stats = {"count": int(valid.size)}
+    if valid.size == 0:
+        stats.update({"mean": None, "min": None, "max": None, "std": None})
+        stats.update({f"p{q:g}": None for q in qs})
+        return stats
+
+    weights = np.ma.masked_where(
+        np.ma.getmaskarray(data), area_weights(bbox, data.shape)
+    )
+    mean = float(np.ma.average(data, weights=weights))
+    variance = float(np.ma.average((data - mean) ** 2, weights=weights))
+
+    stats.update(
+        {
+            "mean": mean,
+            "min": float(valid.min()),
+            "max": float(valid.max()),
+            "std": variance**0.5,
+        }
+    )
+    for q, value in zip(qs, percentiles(valid, qs)):
+        stats[f"p{q:g}"] = float(value)
+    return stats
+
+
+# Statistics over a city's 50 km buffer for a raster fetched on its bounding box
+def city_zonal_stats(values, city, qs=(2, 98), radius=buffer_radius):
+    bbox = get_bounding_box(city, radius)
+    lat, long = get_city_coords(city)
+    mask = buffer_mask(bbox, values.shape, lat, long, radius)
+    return zonal_stats(values, bbox, mask, qs)
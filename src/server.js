@@ -2,32 +2,67 @@ const express = require("express");
 const bodyParser = require("body-parser");
 const { spawn } = require("child_process");
 const cors = require("cors");
+const crypto = require("crypto");
 const path = require("path");
 const fs = require("fs");
+const fsPromises = require("fs/promises");
+const { pipeline } = require("stream/promises");
+const zlib = require("zlib");
+const { claimJob, createArtifactStore, finishJob } = require("./artifactStore");
 
 const app = express();
 const port = 3001;
 
-const mapPlotFilePath = path.join(__dirname, "plots", "latest_Map.html");
-const timeSeriesPlotFilePath = path.join(
-  __dirname,
-  "plots",
-  "latest_Timeseries.html"
-);
-const ntlPlotFilePath = path.join(__dirname, "plots", "NTL.png");
-
 // Middleware
 app.use(bodyParser.json());
 app.use(cors());
 
-// Utility function to execute Python scripts
-const executePythonScript = (scriptPath, args) => {
-  return new Promise((resolve, reject) => {
-    if (!fs.existsSync(scriptPath)) {
-      return reject(new Error("Python script not found."));
+// Default and maximum time budget for a job, in milliseconds
+const DEFAULT_BUDGET_MS = 120000;
+const MAX_BUDGET_MS = 600000;
+
+// Read the request's time budget from the header or the JSON body
+const getRequestBudget = (req) => {
+  const requested = Number(
+    req.get("X-Request-Budget-Ms") || (req.body && req.body.budgetMs)
+  );
+  if (!requested || requested <= 0) {
+    return DEFAULT_BUDGET_MS;
+  }
+  return Math.min(requested, MAX_BUDGET_MS);
+};
+
+// Abort the job if the client disconnects before the response is finished
+const abortOnDisconnect = (res) => {
+  const controller = new AbortController();
+  res.on("close", () => {
+    if (!res.writableFinished) {
+      controller.abort();
     }
+  });
+  return controller.signal;
+};
+
+const jobError = (message, code) => {
+  const error = new Error(message);
+  error.code = code;
+  return error;
+};
+
+// Spawn a Python job that is killed on timeout or when the signal aborts.
+// The deadline is also passed to Python so it can stop between stages.
+const spawnPythonJob = (scriptPath, args, { budgetMs, signal, env } = {}) => {
+  const budget = budgetMs || DEFAULT_BUDGET_MS;
+  const deadline = Date.now() + budget;
 
-    const pythonProcess = spawn("python", [scriptPath, ...args]);
+  const pythonProcess = spawn("python", [scriptPath, ...args], {
+    env: { ...process.env, ...env, JOB_DEADLINE: String(deadline / 1000) },
+    timeout: budget,
+    killSignal: "SIGKILL",
+    signal,
+  });
+
+  const finished = new Promise((resolve, reject) => {
     let errorData = "";
 
     pythonProcess.stderr.on("data", (data) => {
@@ -35,12 +70,18 @@ const executePythonScript = (scriptPath, args) => {
     });
 
     pythonProcess.on("error", (error) => {
-      reject(new Error(`Failed to start subprocess: ${error.message}`));
+      if (error.name === "AbortError") {
+        reject(jobError("Client disconnected, job cancelled.", "ABORT_ERR"));
+      } else {
+        reject(new Error(`Failed to start subprocess: ${error.message}`));
+      }
     });
 
     pythonProcess.on("close", (code) => {
       if (code === 0) {
         resolve();
+      } else if (Date.now() >= deadline) {
+        reject(jobError("Job exceeded its time budget.", "ETIMEDOUT"));
       } else {
         reject(
           new Error("Python script execution failed. Error: " + errorData)
@@ -48,16 +89,284 @@ const executePythonScript = (scriptPath, args) => {
       }
     });
   });
+
+  return { pythonProcess, finished };
+};
+
+// File stats, or null when the file does not exist; never blocks the event loop
+const statFile = (filePath) =>
+  fsPromises.stat(filePath).catch((error) => {
+    if (error.code === "ENOENT") {
+      return null;
+    }
+    throw error;
+  });
+
+// Utility function to execute Python scripts
+const executePythonScript = async (scriptPath, args, options) => {
+  if (!(await statFile(scriptPath))) {
+    throw new Error("Python script not found.");
+  }
+  return spawnPythonJob(scriptPath, args, options).finished;
+};
+
+// Utility function to pipe a Python script's stdout (NDJSON) to the response
+const streamPythonScript = async (scriptPath, args, res, options) => {
+  if (!(await statFile(scriptPath))) {
+    throw new Error("Python script not found.");
+  }
+
+  const { pythonProcess, finished } = spawnPythonJob(
+    scriptPath,
+    args,
+    options
+  );
+  res.setHeader("Content-Type", "application/x-ndjson");
+  pythonProcess.stdout.pipe(res, { end: false });
+  return finished;
+};
+
+// Send the error response for a failed job
+const sendJobError = (res, error, message) => {
+  console.error(error.message);
+  if (error.code === "ABORT_ERR") {
+    return; // The client is gone, nothing to send
+  }
+  if (error.code === "ETIMEDOUT") {
+    return res.status(504).send(message + error.message);
+  }
+  res.status(500).send(message + error.message);
+};
+
+// Rendered artifacts live in the artifact store, under src/plots/cache by
+// default; python/artifact_store.py uses the same keys, freshness rules and
+// job records for the prewarm scheduler and report jobs
+const cacheRoot = path.join(__dirname, "plots", "cache");
+const artifactStore = createArtifactStore(cacheRoot);
+
+// Windows ending more than this long ago will not receive new data
+const DATA_LATENCY_DAYS = 7;
+
+// Recent windows are recomputed once their artifact is older than this
+const REFRESH_MS = 6 * 60 * 60 * 1000;
+
+// How often a node waiting on another node's job checks for its result
+const JOB_POLL_MS = 2000;
+
+const isSafeKeyPart = (value) => /^[A-Za-z0-9_-]+$/.test(String(value));
+
+const artifactKey = (kind, pollutant, city, startDate, endDate, ext) =>
+  `${kind}/${pollutant}/${city}/${startDate}_${endDate}.${ext}`;
+
+const isHistorical = (endDate) =>
+  Date.now() - new Date(endDate).getTime() >
+  DATA_LATENCY_DAYS * 24 * 60 * 60 * 1000;
+
+const isFresh = async (key, endDate) => {
+  const stats = await artifactStore.stat(key);
+  if (!stats) {
+    return false;
+  }
+  if (isHistorical(endDate)) {
+    return true;
+  }
+  return Date.now() - stats.mtimeMs < REFRESH_MS;
+};
+
+// Date range NTL.py derives from its year/half-year arguments
+const ntlDateRange = (year, halfYear) => {
+  if (halfYear === "jan-jun") {
+    return [`${year}-01-01`, `${year}-06-30`];
+  }
+  if (halfYear === "jan-dec") {
+    return [`${year}-01-01`, `${year}-12-31`];
+  }
+  return [`${year}-07-01`, `${year}-12-30`];
+};
+
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+// Serve a cached artifact when fresh, otherwise run the script into the store.
+// The job index makes sure only one node runs a given job; other nodes wait
+// for its result. The script writes a scratch file, stored once complete.
+const runCached = async (key, endDate, scriptPath, args, options = {}) => {
+  if (await isFresh(key, endDate)) {
+    return key;
+  }
+
+  const budget = options.budgetMs || DEFAULT_BUDGET_MS;
+  const deadline = Date.now() + budget;
+  while (!(await claimJob(artifactStore, key, budget))) {
+    if (options.signal && options.signal.aborted) {
+      throw jobError("Client disconnected, job cancelled.", "ABORT_ERR");
+    }
+    if (Date.now() >= deadline) {
+      throw jobError("Job exceeded its time budget.", "ETIMEDOUT");
+    }
+    await sleep(JOB_POLL_MS);
+    if (await isFresh(key, endDate)) {
+      return key;
+    }
+  }
+  // Another node may have finished the job just before this claim
+  if (await isFresh(key, endDate)) {
+    await finishJob(artifactStore, key, "done");
+    return key;
+  }
+
+  try {
+    const scratchPath = await artifactStore.scratchPath(key);
+    await executePythonScript(scriptPath, [...args, scratchPath], {
+      ...options,
+      budgetMs: Math.max(deadline - Date.now(), 1),
+    });
+    await artifactStore.putFile(key, scratchPath);
+  } catch (error) {
+    await finishJob(artifactStore, key, "failed", { error: error.message });
+    throw error;
+  }
+  await finishJob(artifactStore, key, "done");
+  return key;
+};
+
+// Historical artifacts never change, so browsers may keep them for a year;
+// recent ones are revalidated with their ETag on every view
+const HISTORICAL_CACHE_CONTROL = "public, max-age=31536000, immutable";
+const RECENT_CACHE_CONTROL = "no-cache";
+
+// Text artifacts are sent compressed; variants are stored next to the artifact
+const COMPRESSIBLE_TYPES = ["text/html", "application/json"];
+const ENCODINGS = [
+  { name: "br", ext: "br", createStream: zlib.createBrotliCompress },
+  { name: "gzip", ext: "gz", createStream: zlib.createGzip },
+];
+
+// Strong ETag from the artifact key; recent artifacts are recomputed, so
+// their modification time is part of the key. Each content-coding is its
+// own representation, so compressed bodies get their own tag.
+const artifactEtag = (key, endDate, stats, encoding) => {
+  const version = isHistorical(endDate) ? key : `${key}:${stats.mtimeMs}`;
+  const hash = crypto.createHash("sha1").update(version).digest("hex");
+  return encoding ? `"${hash}-${encoding.name}"` : `"${hash}"`;
+};
+
+// If-None-Match uses the weak comparison, and only applies to GET and HEAD
+const isNotModified = (req, etag) => {
+  const ifNoneMatch = req.get("If-None-Match");
+  return (
+    (req.method === "GET" || req.method === "HEAD") &&
+    Boolean(ifNoneMatch) &&
+    ifNoneMatch
+      .split(",")
+      .some((tag) => tag.trim().replace(/^W\//, "") === etag)
+  );
+};
+
+// Compressions in progress, so concurrent requests share one write
+const pendingVariants = new Map();
+
+const writeVariant = async (key, variantKey, encoding) => {
+  const scratchPath = await artifactStore.scratchPath(variantKey);
+  await pipeline(
+    await artifactStore.createReadStream(key),
+    encoding.createStream(),
+    fs.createWriteStream(scratchPath)
+  );
+  await artifactStore.putFile(variantKey, scratchPath);
+};
+
+// Compressed variant of an artifact, streamed into the store on first use
+const compressedVariant = async (key, stats, encoding) => {
+  const variantKey = `${key}.${encoding.ext}`;
+  const variantStats = await artifactStore.stat(variantKey);
+  if (variantStats && variantStats.mtimeMs >= stats.mtimeMs) {
+    return { bodyKey: variantKey, bodyStats: variantStats };
+  }
+
+  if (!pendingVariants.has(variantKey)) {
+    pendingVariants.set(
+      variantKey,
+      writeVariant(key, variantKey, encoding).finally(() =>
+        pendingVariants.delete(variantKey)
+      )
+    );
+  }
+  await pendingVariants.get(variantKey);
+  return {
+    bodyKey: variantKey,
+    bodyStats: await artifactStore.stat(variantKey),
+  };
+};
+
+// Stream an artifact with caching headers, answering 304 when the client's
+// copy is current and compressing text for clients that accept it.
+// Resolves to false when the artifact does not exist.
+const sendArtifact = async (req, res, key, endDate, contentType) => {
+  const stats = await artifactStore.stat(key);
+  if (!stats) {
+    return false;
+  }
+
+  let encoding;
+  if (COMPRESSIBLE_TYPES.includes(contentType)) {
+    res.setHeader("Vary", "Accept-Encoding");
+    encoding = ENCODINGS.find(({ name }) => req.acceptsEncodings(name));
+  }
+  const etag = artifactEtag(key, endDate, stats, encoding);
+
+  res.setHeader("Content-Type", contentType);
+  res.setHeader("ETag", etag);
+  res.setHeader(
+    "Cache-Control",
+    isHistorical(endDate) ? HISTORICAL_CACHE_CONTROL : RECENT_CACHE_CONTROL
+  );
+
+  if (isNotModified(req, etag)) {
+    res.status(304).end();
+    return true;
+  }
+
+  let body = { bodyKey: key, bodyStats: stats };
+  if (encoding) {
+    body = await compressedVariant(key, stats, encoding);
+    res.setHeader("Content-Encoding", encoding.name);
+  }
+
+  res.setHeader("Content-Length", body.bodyStats.size);
+  try {
+    await pipeline(await artifactStore.createReadStream(body.bodyKey), res);
+  } catch (error) {
+    // The client went away mid-transfer; the response is already committed
+    console.error(`Artifact stream ended early: ${error.message}`);
+  }
+  return true;
+};
+
+// Register an artifact endpoint for GET (query string, cacheable by the
+// browser) and POST (JSON body, as before)
+const artifactRoute = (route, handler) => {
+  app.get(route, (req, res) => handler(req.query, req, res));
+  app.post(route, (req, res) => handler(req.body, req, res));
 };
 
-app.post("/pollution-data", async (req, res) => {
-  const { city, pollutant, startDate, endDate } = req.body;
+// Colour scales a map can be rendered with: "auto" is the map's own min/max,
+// the others are precomputed p2/p98 tables (python/color_scales.py)
+const MAP_SCALES = ["auto", "global", "global-season", "city", "city-season"];
+
+const mapKind = (scale) => (scale === "auto" ? "map" : `map-${scale}`);
+
+artifactRoute("/pollution-data", async (params, req, res) => {
+  const { city, pollutant, startDate, endDate, scale = "auto" } = params;
 
   if (!city || !pollutant || !startDate || !endDate) {
     return res.status(400).send("All fields are required.");
   }
-
-  const mapPlotFilePath = path.join(__dirname, "plots", "latest_Map.png"); // Path to the PNG file
+  if (
+    ![city, pollutant, startDate, endDate].every(isSafeKeyPart) ||
+    !MAP_SCALES.includes(scale)
+  ) {
+    return res.status(400).send("Invalid request parameters.");
+  }
 
   try {
     const firstPythonFilePath = path.join(
@@ -66,59 +375,130 @@ app.post("/pollution-data", async (req, res) => {
       `${pollutant}_Map.py`
     );
 
-    // Execute the first Python script
-    await executePythonScript(firstPythonFilePath, [city, startDate, endDate]);
+    // Execute the first Python script unless the map is already cached
+    const mapPlotKey = await runCached(
+      artifactKey(mapKind(scale), pollutant, city, startDate, endDate, "png"),
+      endDate,
+      firstPythonFilePath,
+      [city, startDate, endDate],
+      {
+        budgetMs: getRequestBudget(req),
+        signal: abortOnDisconnect(res),
+        env: { MAP_SCALE: scale },
+      }
+    );
 
-    if (fs.existsSync(mapPlotFilePath)) {
-      // Send the PNG file
-      res.setHeader("Content-Type", "image/png");
-      const pngContent = fs.readFileSync(mapPlotFilePath);
-      res.send(pngContent);
-    } else {
+    const sent = await sendArtifact(
+      req,
+      res,
+      mapPlotKey,
+      endDate,
+      "image/png"
+    );
+    if (!sent) {
       res.status(404).send("Map plot file not found.");
     }
   } catch (error) {
-    console.error(error.message);
-    res.status(500).send("Error generating plot. " + error.message);
+    sendJobError(res, error, "Error generating plot. ");
+  }
+});
+
+// Animated map with one frame per month of the window, in a single download
+const ANIMATION_TYPES = {
+  gif: "image/gif",
+  webp: "image/webp",
+  mp4: "video/mp4",
+};
+
+artifactRoute("/pollution-animation", async (params, req, res) => {
+  const { city, pollutant, startDate, endDate, format = "gif" } = params;
+
+  if (!city || !pollutant || !startDate || !endDate) {
+    return res.status(400).send("All fields are required.");
+  }
+  if (
+    ![city, pollutant, startDate, endDate].every(isSafeKeyPart) ||
+    !Object.hasOwn(ANIMATION_TYPES, format)
+  ) {
+    return res.status(400).send("Invalid request parameters.");
+  }
+
+  try {
+    const pythonFilePath = path.join(__dirname, "python", "animation.py");
+    const animationKey = await runCached(
+      artifactKey("animation", pollutant, city, startDate, endDate, format),
+      endDate,
+      pythonFilePath,
+      [pollutant, city, startDate, endDate],
+      { budgetMs: getRequestBudget(req), signal: abortOnDisconnect(res) }
+    );
+
+    const sent = await sendArtifact(
+      req,
+      res,
+      animationKey,
+      endDate,
+      ANIMATION_TYPES[format]
+    );
+    if (!sent) {
+      res.status(404).send("Animation file not found.");
+    }
+  } catch (error) {
+    sendJobError(res, error, "Error generating animation. ");
   }
 });
 
-// Endpoint for NTL data
-app.post("/ntl-data", async (req, res) => {
-  const { ntlCity: city, ntlYear: year, halfYear } = req.body;
+// Endpoint for NTL data, sent as a binary PNG
+artifactRoute("/ntl-data", async (params, req, res) => {
+  const { ntlCity: city, ntlYear: year, halfYear } = params;
 
   if (!city || !year || !halfYear) {
     return res.status(400).send("All fields are required.");
   }
+  if (![city, year, halfYear].every(isSafeKeyPart)) {
+    return res.status(400).send("Invalid request parameters.");
+  }
 
   try {
     const pythonFilePath = path.join(__dirname, "python", `NTL.py`);
-    await executePythonScript(pythonFilePath, [city, year, halfYear]);
+    const [startDate, endDate] = ntlDateRange(year, halfYear);
+    const ntlPlotKey = await runCached(
+      artifactKey("ntl", "NTL", city, startDate, endDate, "png"),
+      endDate,
+      pythonFilePath,
+      [city, year, halfYear],
+      { budgetMs: getRequestBudget(req), signal: abortOnDisconnect(res) }
+    );
 
-    if (fs.existsSync(ntlPlotFilePath)) {
-      res.send({
-        ntlPlot: fs.readFileSync(ntlPlotFilePath, { encoding: "base64" }),
-      });
-    } else {
+    const sent = await sendArtifact(
+      req,
+      res,
+      ntlPlotKey,
+      endDate,
+      "image/png"
+    );
+    if (!sent) {
       res.status(404).send("NTL plot file not found.");
     }
   } catch (error) {
-    console.error(error.message);
-    res.status(500).send("Error generating NTL plot. " + error.message);
+    sendJobError(res, error, "Error generating NTL plot. ");
   }
 });
 
-app.post("/time-series-data", async (req, res) => {
+artifactRoute("/time-series-data", async (params, req, res) => {
   const {
     timeSeriesCity: city,
     timeSeriesPollutant: pollutant,
     timeSeriesStartDate: startDate,
     timeSeriesEndDate: endDate,
-  } = req.body;
+  } = params;
 
   if (!city || !pollutant || !startDate || !endDate) {
     return res.status(400).send("All fields are required.");
   }
+  if (![city, pollutant, startDate, endDate].every(isSafeKeyPart)) {
+    return res.status(400).send("Invalid request parameters.");
+  }
 
   try {
     const pythonFilePath = path.join(
@@ -126,26 +506,170 @@ app.post("/time-series-data", async (req, res) => {
       "python",
       `${pollutant}_Time_Series.py`
     );
-    await executePythonScript(pythonFilePath, [city, startDate, endDate]);
-
-    const timeSeriesPlotFilePath = path.join(
-      __dirname,
-      "plots",
-      "latest_Timeseries.html"
+    const timeSeriesPlotKey = await runCached(
+      artifactKey("timeseries", pollutant, city, startDate, endDate, "html"),
+      endDate,
+      pythonFilePath,
+      [city, startDate, endDate],
+      { budgetMs: getRequestBudget(req), signal: abortOnDisconnect(res) }
     );
 
-    if (fs.existsSync(timeSeriesPlotFilePath)) {
-      const htmlContent = fs.readFileSync(timeSeriesPlotFilePath, {
-        encoding: "utf8",
-      });
-      res.setHeader("Content-Type", "text/html"); // Set content type to HTML
-      res.send(htmlContent);
-    } else {
+    const sent = await sendArtifact(
+      req,
+      res,
+      timeSeriesPlotKey,
+      endDate,
+      "text/html"
+    );
+    if (!sent) {
       res.status(404).send("Time series plot file not found.");
     }
   } catch (error) {
-    console.error(error.message);
-    res.status(500).send("Error generating time series plot. " + error.message);
+    sendJobError(res, error, "Error generating time series plot. ");
+  }
+});
+
+// Endpoint returning the period series and summary stats from one job; the
+// job also renders the map, which is then fetched from /pollution-data
+artifactRoute("/city-report", async (params, req, res) => {
+  const { city, pollutant, startDate, endDate } = params;
+
+  if (!city || !pollutant || !startDate || !endDate) {
+    return res.status(400).send("All fields are required.");
+  }
+  if (![city, pollutant, startDate, endDate].every(isSafeKeyPart)) {
+    return res.status(400).send("Invalid request parameters.");
+  }
+
+  try {
+    const pythonFilePath = path.join(__dirname, "python", "city_report.py");
+    const reportKey = await runCached(
+      artifactKey("report", pollutant, city, startDate, endDate, "json"),
+      endDate,
+      pythonFilePath,
+      [pollutant, city, startDate, endDate],
+      { budgetMs: getRequestBudget(req), signal: abortOnDisconnect(res) }
+    );
+
+    const sent = await sendArtifact(
+      req,
+      res,
+      reportKey,
+      endDate,
+      "application/json"
+    );
+    if (!sent) {
+      res.status(404).send("City report file not found.");
+    }
+  } catch (error) {
+    sendJobError(res, error, "Error generating city report. ");
+  }
+});
+
+// Variables multivariable.py can stack, and the ones correlated by default
+const CORRELATION_VARIABLES = [
+  "CO",
+  "NO2",
+  "HCHO",
+  "SO2",
+  "wind_speed",
+  "u_wind",
+  "v_wind",
+  "surface_pressure",
+  "NTL",
+];
+const DEFAULT_CORRELATION_VARIABLES = "CO,NO2,HCHO,NTL";
+
+// Endpoint returning an aligned per-period table of several variables and
+// their correlation matrix, all reduced together in one job
+artifactRoute("/correlation-data", async (params, req, res) => {
+  const {
+    city,
+    startDate,
+    endDate,
+    variables = DEFAULT_CORRELATION_VARIABLES,
+  } = params;
+
+  if (!city || !startDate || !endDate) {
+    return res.status(400).send("All fields are required.");
+  }
+  const names = String(variables).split(",");
+  if (
+    ![city, startDate, endDate].every(isSafeKeyPart) ||
+    !names.every((name) => CORRELATION_VARIABLES.includes(name))
+  ) {
+    return res.status(400).send("Invalid request parameters.");
+  }
+
+  try {
+    const pythonFilePath = path.join(__dirname, "python", "multivariable.py");
+    const correlationKey = await runCached(
+      artifactKey(
+        "correlation",
+        names.join("-"),
+        city,
+        startDate,
+        endDate,
+        "json"
+      ),
+      endDate,
+      pythonFilePath,
+      [names.join(","), city, startDate, endDate],
+      { budgetMs: getRequestBudget(req), signal: abortOnDisconnect(res) }
+    );
+
+    const sent = await sendArtifact(
+      req,
+      res,
+      correlationKey,
+      endDate,
+      "application/json"
+    );
+    if (!sent) {
+      res.status(404).send("Correlation report file not found.");
+    }
+  } catch (error) {
+    sendJobError(res, error, "Error generating correlation report. ");
+  }
+});
+
+// Endpoint streaming time-series periods as NDJSON while batches complete
+app.post("/time-series-stream", async (req, res) => {
+  const {
+    timeSeriesCity: city,
+    timeSeriesPollutant: pollutant,
+    timeSeriesStartDate: startDate,
+    timeSeriesEndDate: endDate,
+    interval,
+  } = req.body;
+
+  if (!city || !pollutant || !startDate || !endDate) {
+    return res.status(400).send("All fields are required.");
+  }
+
+  const args = [pollutant, city, startDate, endDate];
+  if (interval) {
+    args.push(interval);
+  }
+
+  try {
+    const pythonFilePath = path.join(
+      __dirname,
+      "python",
+      "time_series_engine.py"
+    );
+    await streamPythonScript(pythonFilePath, args, res, {
+      budgetMs: getRequestBudget(req),
+      signal: abortOnDisconnect(res),
+    });
+    res.end();
+  } catch (error) {
+    if (res.headersSent) {
+      console.error(error.message);
+      res.end(JSON.stringify({ error: error.message }) + "\n");
+    } else {
+      sendJobError(res, error, "Error generating time series data. ");
+    }
   }
 });
 